@@ -0,0 +1,136 @@
+"""
+Heartbeat latency under concurrent slow management calls
+========================================================
+Starts the API server on an ephemeral port, fires heartbeats from several
+executor-like clients and, at the same time, keeps POSTing /restart and
+/shutdown. Shutdown is replaced with a sleep that stands in for the 2-4
+Roblox round trips the real call makes.
+
+Runs the same load against the old single-threaded http.server.HTTPServer
+and the pooled server, and prints p50 / p99 / max heartbeat latency for both.
+
+Usage:
+  python benchmarks/bench_api_latency.py [--clients 10] [--seconds 10] [--shutdown-s 3]
+"""
+
+import argparse
+import http.client
+import http.server
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANAGER_FILE = os.path.join(ROOT, "roblox_manager__39_.py")
+
+
+def load_manager():
+    """Import the manager script with its data files redirected to a temp dir."""
+    os.environ.setdefault("RM_DATA_DIR", tempfile.mkdtemp(prefix="rm_bench_"))
+    spec = importlib.util.spec_from_file_location("roblox_manager", MANAGER_FILE)
+    rm = importlib.util.module_from_spec(spec)
+    sys.modules["roblox_manager"] = rm
+    spec.loader.exec_module(rm)
+    return rm
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[k]
+
+
+def post(port, path, body, timeout=30):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("POST", path, body=json.dumps(body), headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status
+    finally:
+        conn.close()
+
+
+def run_scenario(rm, server, clients, seconds):
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stop = time.time() + seconds
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def heartbeat_client(i):
+        body = {"username": f"bench{i}", "players": [f"bench{j}" for j in range(clients)],
+                "jobId": "bench-job", "server": "raid"}
+        while time.time() < stop:
+            t0 = time.perf_counter()
+            try:
+                post(port, "/heartbeat", body)
+                dt = time.perf_counter() - t0
+                with lock:
+                    latencies.append(dt)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            time.sleep(0.05)
+
+    def management_client():
+        while time.time() < stop:
+            try:
+                post(port, "/restart/raid", {"delay": 0})
+                post(port, "/shutdown/raid", {})
+            except Exception:
+                pass
+
+    threads = [threading.Thread(target=heartbeat_client, args=(i,), daemon=True) for i in range(clients)]
+    threads.append(threading.Thread(target=management_client, daemon=True))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(seconds + 60)
+    server.shutdown()
+    server.server_close()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, default=10)
+    ap.add_argument("--seconds", type=float, default=10)
+    ap.add_argument("--shutdown-s", type=float, default=3.0, help="simulated shutdown_server duration")
+    args = ap.parse_args()
+
+    rm = load_manager()
+    for i in range(args.clients):
+        rm.manager.accounts[f"bench{i}"] = {"cookie": "x", "username": f"bench{i}", "display_name": f"bench{i}"}
+    rm.manager.presence.set_accounts(rm.manager.accounts)
+
+    def slow_shutdown(account_name, server_key, game_id=None):
+        time.sleep(args.shutdown_s)
+        return {"status": 200, "body": {}}
+
+    rm.manager.shutdown_server = slow_shutdown
+    rm.manager.launch_instance = lambda *a, **kw: {"success": True, "pid": 0}
+
+    results = {
+        "single_threaded": run_scenario(
+            rm, http.server.HTTPServer(("127.0.0.1", 0), rm.APIHandler), args.clients, args.seconds),
+        "pooled": run_scenario(rm, rm.make_api_server(port=0), args.clients, args.seconds),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
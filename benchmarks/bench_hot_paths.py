@@ -0,0 +1,238 @@
+"""
+Hot-path microbenchmarks
+========================
+Times the manager's hot paths in-process and prints a JSON report:
+
+  heartbeat_<n>        process_heartbeat + heartbeat_missing per reporter, n reporters in one server
+  heartbeat_batch_<n>  the same round as one process_heartbeat_batch call
+  missing_<n>          get_missing_accounts with n reporters listed
+  server_players_<n>   get_server_players with n reporters
+  status_http          GET /status with the ETag body cache cleared every request
+  status_http_cached   GET /status served from the ETag body cache
+  status_encode_<fmt>  wire_encode of a 1000-account /status body (json / terse / bin)
+  store_save           save_data of the large account map + journal flush
+  store_compact        full snapshot write of the large data file
+  store_reload         DataStore load of the large data file + load_servers
+  launch_url           build_launch_url for a private server
+  handle_scan          scan_handle_table over a 300k-entry synthetic handle table
+
+Each case reports the min and median time per op over --repeats runs and the
+tracemalloc peak of one run. With --baseline, cases whose median is more than
+--threshold slower than the stored report are listed and the exit code is 1.
+
+Usage:
+  python benchmarks/bench_hot_paths.py [--only heartbeat] [--out report.json]
+  python benchmarks/bench_hot_paths.py --save-baseline        # writes benchmarks/baseline.json
+  python benchmarks/bench_hot_paths.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_api_latency import load_manager  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SIZES = (10, 100, 1000)
+
+
+def measure(fn, ops, repeats):
+    """Run fn() `repeats` times and return per-op stats; fn() does `ops` operations."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) / ops)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "ops": ops,
+        "min_us": round(min(times) * 1e6, 3),
+        "median_us": round(statistics.median(times) * 1e6, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def add_accounts(rm, n):
+    rm.manager.accounts = {f"acc{i}": {"cookie": "x", "username": f"acc{i}", "display_name": f"Acc {i}"}
+                           for i in range(n)}
+    rm.manager.player_reports.clear()
+    rm.manager.presence.set_accounts(rm.manager.accounts)
+    rm.manager.presence.clear()
+
+
+def heartbeat_cases(rm, repeats):
+    results = {}
+    for n in SIZES:
+        add_accounts(rm, n)
+        players = [f"acc{i}" for i in range(n)] + [f"stranger{i}" for i in range(5)]
+        bodies = [{"username": f"acc{i}", "players": players, "jobId": "job", "server": "raid"}
+                  for i in range(n)]
+
+        def round_trip():
+            for body in bodies:
+                rm.manager.process_heartbeat(body)
+                rm.manager.heartbeat_missing("raid")
+
+        results[f"heartbeat_{n}"] = measure(round_trip, n, repeats)
+        results[f"heartbeat_batch_{n}"] = measure(lambda: rm.manager.process_heartbeat_batch(bodies), n, repeats)
+        results[f"missing_{n}"] = measure(lambda: rm.manager.get_missing_accounts("raid"), 1, repeats)
+        results[f"server_players_{n}"] = measure(lambda: rm.manager.get_server_players(), 1, repeats)
+    return results
+
+
+def status_cases(rm, repeats):
+    add_accounts(rm, 1000)
+    players = [f"acc{i}" for i in range(1000)]
+    for i in range(0, 1000, 25):
+        rm.manager.process_heartbeat({"username": f"acc{i}", "players": players[i:i + 25],
+                                      "jobId": f"job{i}", "server": "raid"})
+    server = rm.make_api_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    def get_status(n, clear):
+        for _ in range(n):
+            if clear:
+                rm._view_cache.clear()
+            c = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            c.request("GET", "/status")
+            c.getresponse().read()
+            c.close()
+
+    results = {
+        "status_http": measure(lambda: get_status(20, True), 20, repeats),
+        "status_http_cached": measure(lambda: get_status(20, False), 20, repeats),
+    }
+    server.shutdown()
+    server.server_close()
+
+    body = {
+        "status": "running",
+        "accounts": {n: {"username": n, "display_name": a["display_name"], "running": False, "pid": None,
+                         "server": None} for n, a in rm.manager.accounts.items()},
+        "servers": {k: v["name"] for k, v in rm.SERVERS.items()},
+        "players": rm.manager.get_server_players(),
+        "heartbeats": len(rm.manager.player_reports),
+    }
+    for fmt in rm.WIRE_TYPES:
+        results[f"status_encode_{fmt}"] = measure(lambda: rm.wire_encode(body, fmt), 1, repeats)
+    return results
+
+
+def store_cases(rm, repeats):
+    add_accounts(rm, 1000)
+    for acc in rm.manager.accounts.values():
+        acc["cookie"] = "_|WARNING:-DO-NOT-SHARE-THIS.--" + "x" * 900
+    for i in range(200):
+        rm.SERVERS[f"srv{i}"] = {"name": f"Server {i}", "place_id": 1000 + i,
+                                 "link_code": "%032d" % i, "server_id": i}
+    rm.save_servers()
+    rm.store.compact()
+
+    def save():
+        rm.manager.save_data()
+        rm.store.flush()
+
+    def reload():
+        rm.store._load()
+        rm.load_servers()
+
+    return {
+        "store_save": measure(save, 1, repeats),
+        "store_compact": measure(rm.store.compact, 1, repeats),
+        "store_reload": measure(reload, 1, repeats),
+    }
+
+
+def launch_url_cases(rm, repeats):
+    ticket = "A" * 900
+    return {"launch_url": measure(
+        lambda: [rm.build_launch_url(ticket, 133322550157181, "92098597466172680429134969286305")
+                 for _ in range(1000)], 1000, repeats)}
+
+
+def handle_scan_cases(rm, repeats):
+    rng = random.Random(7)
+    entries = [(rng.randrange(4, 65536, 4), rng.randrange(2, 60), rng.randrange(4, 65536, 4))
+               for _ in range(300000)]
+    pids = {entries[i][0] for i in range(0, 300000, 30000)}
+    table = rm.pack_handle_table(entries)
+    return {"handle_scan": measure(lambda: list(rm.scan_handle_table(table, pids, {17, 18})), 1, repeats)}
+
+
+CASES = {
+    "heartbeat": heartbeat_cases,
+    "status": status_cases,
+    "store": store_cases,
+    "launch_url": launch_url_cases,
+    "handle_scan": handle_scan_cases,
+}
+
+
+def compare(report, baseline, threshold):
+    """Cases whose median per-op time grew by more than `threshold` (a fraction)."""
+    regressions = []
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("median_us"):
+            continue
+        ratio = result["median_us"] / old["median_us"]
+        if ratio > 1 + threshold:
+            regressions.append({"case": name, "baseline_us": old["median_us"],
+                                "now_us": result["median_us"], "ratio": round(ratio, 2)})
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--only", action="append", choices=sorted(CASES), help="run only these groups")
+    ap.add_argument("--repeats", type=int, default=5)
+    ap.add_argument("--out", help="also write the report to this file")
+    ap.add_argument("--baseline", help="compare against a stored report")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    ap.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+                    help=f"write the report as the baseline (default {DEFAULT_BASELINE})")
+    args = ap.parse_args()
+
+    rm = load_manager()
+    rm.activity.console_level = 100  # keep per-heartbeat debug lines off stdout
+    rm.supervisor.configure(enabled=False, persist=False)
+
+    results = {}
+    for group in args.only or CASES:
+        results.update(CASES[group](rm, args.repeats))
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "repeats": args.repeats,
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+        exit_code = 1 if report["regressions"] else 0
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            f.write(text + "\n")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
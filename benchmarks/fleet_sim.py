@@ -0,0 +1,439 @@
+"""
+Fleet simulator
+===============
+Runs the launch -> PID tracking -> heartbeat -> watchdog -> restart loop on a
+plain Linux box, without Roblox:
+
+  * a stub of the Roblox web endpoints the manager calls (CSRF, auth tickets,
+    private-server listing, game-instance shutdown), plus a tiny "world" that
+    tracks which simulated client is in which private server instance;
+  * SimLauncher, a manager launch backend that starts a stand-in client
+    process per launch (this file's `client` mode) and returns its PID;
+  * stand-in clients that join the server named by their launch URI after a
+    configurable latency, then post heartbeats to the manager API like the Lua
+    script does. They can crash, silently disconnect, and get kicked when the
+    server is shut down (they then idle until killed, like a real client
+    sitting on the disconnect screen).
+
+`loadtest` drives the manager in-process (temporary data dir) through an
+initial batch launch, a restart of every server, and an optional soak with the
+supervisor on, then prints a JSON report with convergence times.
+
+Usage:
+  python benchmarks/fleet_sim.py loadtest [--clients 200] [--servers 4] [--join-latency 3]
+                                          [--crash-rate 0] [--disconnect-rate 0] [--soak 0]
+"""
+
+import argparse
+import http.server
+import json
+import os
+import random
+import re
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+ROBLOX_HOSTS = ("auth.roblox.com", "users.roblox.com", "games.roblox.com",
+                "apis.roblox.com", "clientsettings.roblox.com")
+SIM_PLACE_ID = 133322550157181
+
+
+# ============================================================================
+# ROBLOX WEB STUB
+# ============================================================================
+
+class World:
+    """Private servers and who is in their current instance."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.servers = {}  # {link_code: {vip, name, place_id, gen, job, players}}
+
+    def add(self, link_code, vip, name, place_id=SIM_PLACE_ID):
+        with self._lock:
+            self.servers[link_code] = {"vip": vip, "name": name, "place_id": place_id, "gen": 1,
+                                       "job": str(uuid.uuid4()), "players": set()}
+
+    def join(self, link_code, account):
+        with self._lock:
+            srv = self.servers.get(link_code)
+            if srv is None:
+                return None
+            srv["players"].add(account)
+            return {"jobId": srv["job"], "gen": srv["gen"]}
+
+    def leave(self, link_code, account):
+        with self._lock:
+            srv = self.servers.get(link_code)
+            if srv:
+                srv["players"].discard(account)
+
+    def players(self, link_code):
+        with self._lock:
+            srv = self.servers.get(link_code)
+            if srv is None:
+                return None
+            return {"gen": srv["gen"], "jobId": srv["job"], "players": sorted(srv["players"])}
+
+    def listing(self, place_id):
+        with self._lock:
+            return [{"vipServerId": s["vip"], "name": s["name"], "accessCode": code}
+                    for code, s in self.servers.items() if str(s["place_id"]) == str(place_id)]
+
+    def shutdown(self, vip):
+        """Close the server's running instance: everyone in it is kicked."""
+        with self._lock:
+            for srv in self.servers.values():
+                if srv["vip"] == vip:
+                    srv["gen"] += 1
+                    srv["job"] = str(uuid.uuid4())
+                    srv["players"] = set()
+                    return True
+        return False
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    CSRF = "sim-csrf-token"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code, data=None, headers=None):
+        body = json.dumps(data if data is not None else {}).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.stats_lock:
+            key = f"{self.command} {urllib.parse.urlsplit(self.path).path}"
+            key = re.sub(r"/\d+/", "/<id>/", key)
+            self.server.stats[key] = self.server.stats.get(key, 0) + 1
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw) if raw.strip() else {}
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        world = self.server.world
+        m = re.fullmatch(r"/v1/games/(\d+)/private-servers", url.path)
+        if m:
+            self._send(200, {"data": world.listing(m.group(1)), "nextPageCursor": None})
+        elif url.path == "/v1/users/authenticated":
+            self._send(200, {"id": 1, "name": "sim", "displayName": "sim"})
+        elif url.path == "/sim/players":
+            st = world.players(query.get("link", ""))
+            self._send(200 if st else 404, st or {"error": "unknown server"})
+        else:
+            self._send(404, {"errors": [{"message": "NotFound"}]})
+
+    def do_POST(self):
+        path = urllib.parse.urlsplit(self.path).path
+        data = self._body()
+        world = self.server.world
+        if path == "/v2/logout":
+            self._send(403, {"errors": [{"message": "Token Validation Failed"}]}, {"x-csrf-token": self.CSRF})
+            return
+        if self.headers.get("Host") in ROBLOX_HOSTS and path.startswith(("/v1/", "/matchmaking-api/")) \
+                and self.headers.get("x-csrf-token") != self.CSRF:
+            self._send(403, {"errors": [{"message": "Token Validation Failed"}]}, {"x-csrf-token": self.CSRF})
+            return
+        if path == "/v1/authentication-ticket":
+            time.sleep(self.server.ticket_latency)
+            self._send(200, {}, {"rbx-authentication-ticket": uuid.uuid4().hex * 8})
+        elif path == "/matchmaking-api/v1/game-instances/shutdown":
+            ok = world.shutdown(data.get("privateServerId"))
+            self._send(200 if ok else 404, {} if ok else {"errors": [{"message": "NotFound"}]})
+        elif path == "/sim/join":
+            joined = world.join(data.get("link", ""), data.get("account", ""))
+            self._send(200 if joined else 404, joined or {"error": "unknown server"})
+        elif path == "/sim/leave":
+            world.leave(data.get("link", ""), data.get("account", ""))
+            self._send(200, {})
+        else:
+            self._send(404, {"errors": [{"message": "NotFound"}]})
+
+
+class StubServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, ticket_latency=0.05):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.world = World()
+        self.ticket_latency = ticket_latency
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)  # Killed clients drop connections mid-request
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name="roblox-stub").start()
+        return self
+
+
+# ============================================================================
+# STAND-IN CLIENT
+# ============================================================================
+
+def _call(method, url, body=None, timeout=5):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as ex:
+        return {"error": ex.code}
+    except (OSError, ValueError):
+        return None
+
+
+def run_client(args):
+    """One simulated Roblox client. Exits on crash or after --ttl; otherwise it is killed by the manager."""
+    rng = random.Random(f"{args.account}-{os.getpid()}")
+    deadline = time.time() + args.ttl
+    match = re.search(r"linkCode=([^&+]+)", urllib.parse.unquote(args.url))
+    link = match.group(1) if match else ""
+    per_tick = args.interval / 60.0
+
+    def idle():
+        time.sleep(max(0, deadline - time.time()))
+        sys.exit(0)
+
+    time.sleep(max(0.0, rng.gauss(args.join_latency, args.join_latency * 0.25)))
+    joined = _call("POST", f"{args.stub}/sim/join", {"link": link, "account": args.account})
+    if not joined or "gen" not in joined:
+        idle()
+    while time.time() < deadline:
+        st = _call("GET", f"{args.stub}/sim/players?link={urllib.parse.quote(link)}")
+        if st and st.get("gen") != joined["gen"]:
+            idle()  # Server shut down: sit on the disconnect screen
+        if rng.random() < args.crash_rate * per_tick:
+            os._exit(3)
+        if rng.random() < args.disconnect_rate * per_tick:
+            _call("POST", f"{args.stub}/sim/leave", {"link": link, "account": args.account})
+            idle()  # Dropped out of the game, process still open
+        if st:
+            _call("POST", f"{args.api}/heartbeat", {"username": args.account, "players": st["players"],
+                                                    "jobId": st["jobId"], "server": args.server})
+        time.sleep(args.interval)
+    idle()
+
+
+class SimLauncher:
+    """Manager launch backend that starts a stand-in client per launch."""
+
+    name = "sim"
+
+    def __init__(self, api_url, stub_url, join_latency=3.0, crash_rate=0.0, disconnect_rate=0.0,
+                 interval=2.0, ttl=3600):
+        self.options = ["--api", api_url, "--stub", stub_url, "--join-latency", str(join_latency),
+                        "--crash-rate", str(crash_rate), "--disconnect-rate", str(disconnect_rate),
+                        "--interval", str(interval), "--ttl", str(ttl)]
+        self._lock = threading.Lock()
+        self.procs = []
+        self.launches = 0
+
+    def launch(self, prepared):
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "client", "--account", prepared["account"],
+             "--server", prepared["server"] or "", "--url", prepared["url"]] + self.options,
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with self._lock:
+            self.procs.append(proc)
+            self.launches += 1
+        return proc.pid
+
+    def kill_all(self):
+        with self._lock:
+            procs, self.procs = self.procs, []
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+        for proc in procs:
+            proc.wait()
+
+
+# ============================================================================
+# LOAD TEST
+# ============================================================================
+
+def presence(rm, assigned, max_age=60):
+    """{server: number of its assigned accounts listed in a heartbeat within max_age}"""
+    out = {}
+    for server, accounts in assigned.items():
+        present = set(rm.manager.get_missing_accounts(server, max_age).get("present", []))
+        out[server] = len(present & accounts)
+    return out
+
+
+def wait_converged(rm, assigned, timeout, marks=(0.5, 0.9, 1.0)):
+    """Poll presence until every assigned account is in; return seconds to each fraction in marks."""
+    total = sum(len(a) for a in assigned.values())
+    t0, reached = time.time(), {}
+    while time.time() - t0 < timeout:
+        frac = sum(presence(rm, assigned).values()) / total
+        for m in marks:
+            if frac >= m and m not in reached:
+                reached[m] = round(time.time() - t0, 2)
+        if frac >= 1.0:
+            break
+        time.sleep(0.25)
+    return {f"p{int(m * 100)}_s": reached.get(m) for m in marks}
+
+
+def loadtest(args):
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_api_latency import load_manager
+
+    stub = StubServer(ticket_latency=args.ticket_latency).start()
+    rm = load_manager()
+    if not args.verbose:
+        rm.activity.console_level = rm.ActivityLog.LEVELS["warn"]
+    rm.http_client.base_overrides.update({host: stub.url for host in ROBLOX_HOSTS})
+    rm.RESTART_RELAUNCH_STAGGER = args.stagger
+    rm.SUPERVISOR_STAGGER = args.stagger
+    rm.SUPERVISOR_COOLDOWN = args.cooldown
+    rm.supervisor.configure(enabled=False, persist=False)
+
+    assigned = {}
+    for i in range(args.servers):
+        key, link = f"sim{i}", f"{i:032d}"
+        rm.SERVERS[key] = {"name": f"Sim Server {i}", "place_id": SIM_PLACE_ID, "link_code": link,
+                           "server_id": 9000 + i}
+        stub.world.add(link, 9000 + i, f"Sim Server {i}")
+        assigned[key] = set()
+    rm.manager.accounts = {}
+    targets = []
+    for i in range(args.clients):
+        name, key = f"sim{i:04d}", f"sim{i % args.servers}"
+        rm.manager.accounts[name] = {"cookie": f"sim-cookie-{i}", "username": name, "display_name": name}
+        assigned[key].add(name)
+        targets.append((name, key))
+    rm.manager.save_data()
+
+    api = rm.make_api_server(port=0)
+    threading.Thread(target=api.serve_forever, daemon=True).start()
+    launcher = SimLauncher(f"http://127.0.0.1:{api.server_address[1]}", stub.url, args.join_latency,
+                           args.crash_rate, args.disconnect_rate, args.interval)
+    rm.manager.launcher = launcher
+    report = {"clients": args.clients, "servers": args.servers, "join_latency_s": args.join_latency,
+              "crash_rate_per_min": args.crash_rate, "disconnect_rate_per_min": args.disconnect_rate}
+    try:
+        # 1) Cold start: batch launch everyone
+        t0 = time.time()
+        rm.batch_launcher.start(targets, pacing=args.pacing)
+        report["launch"] = wait_converged(rm, assigned, args.timeout)
+        report["launch"]["batch"] = {k: rm.batch_launcher.status().get(k) for k in ("launched", "failed")}
+        report["launch"]["tracked_pids"] = sum(1 for n in rm.manager.accounts if rm.manager.instances.get(n, {}).get("pid"))
+        report["launch"]["wall_s"] = round(time.time() - t0, 2)
+
+        # 2) Restart every server at once and time each job to "everyone back in"
+        t0 = time.time()
+        jobs = {key: rm.restart_jobs.submit(key, delay=args.delay)[0]["id"] for key in assigned}
+        pending = dict(jobs)
+        restart = {}
+        while pending and time.time() - t0 < args.timeout:
+            for key, job_id in list(pending.items()):
+                job = rm.restart_jobs.get(job_id)
+                if job["state"] in ("done", "failed"):
+                    attempts = [j.get("attempts", 1) for j in job["joins"].values()]
+                    restart[key] = {"state": job["state"], "seconds": round(job["finished_at"] - job["created_at"], 2),
+                                    "killed": len(job["killed"]), "relaunched": len(job["relaunched"]),
+                                    "missing": job["missing"], "retries": sum(a - 1 for a in attempts)}
+                    del pending[key]
+            time.sleep(0.25)
+        for key in pending:
+            restart[key] = {"state": "timeout"}
+        report["restart"] = {"servers": restart, "wall_s": round(time.time() - t0, 2),
+                             "converged": not pending and all(r["state"] == "done" for r in restart.values())}
+
+        # 3) Optional soak with the supervisor watching the first server's accounts
+        if args.soak > 0:
+            server = next(iter(assigned))
+            watched = sorted(assigned[server])
+            rm.supervisor.configure(enabled=True, interval=args.check_interval, server=server, accounts=watched,
+                                    require_heartbeat=True, persist=False)
+            launches_before, samples = launcher.launches, []
+            t0 = time.time()
+            while time.time() - t0 < args.soak:
+                samples.append(presence(rm, {server: set(watched)}, args.interval * 3)[server] / len(watched))
+                time.sleep(1)
+            rm.supervisor.configure(enabled=False, persist=False)
+            report["soak"] = {"seconds": args.soak, "server": server, "watched": len(watched),
+                              "availability_mean": round(sum(samples) / len(samples), 4),
+                              "availability_min": round(min(samples), 4),
+                              "relaunches": launcher.launches - launches_before}
+        report["stub_calls"] = dict(stub.stats)
+        report["http"] = dict(rm.http_client.stats)
+    finally:
+        launcher.kill_all()
+        api.shutdown()
+        stub.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="mode", required=True)
+
+    lt = sub.add_parser("loadtest", help="run the end-to-end load test")
+    lt.add_argument("--clients", type=int, default=200)
+    lt.add_argument("--servers", type=int, default=4)
+    lt.add_argument("--join-latency", type=float, default=3.0, help="mean seconds from launch to in-game")
+    lt.add_argument("--crash-rate", type=float, default=0.0, help="crashes per client per minute")
+    lt.add_argument("--disconnect-rate", type=float, default=0.0, help="silent disconnects per client per minute")
+    lt.add_argument("--interval", type=float, default=2.0, help="client heartbeat interval")
+    lt.add_argument("--ticket-latency", type=float, default=0.05, help="stub auth-ticket latency")
+    lt.add_argument("--pacing", type=float, default=0.05, help="batch launch pacing")
+    lt.add_argument("--stagger", type=float, default=0.05, help="restart / supervisor relaunch stagger")
+    lt.add_argument("--delay", type=float, default=2, help="restart delay after shutdown")
+    lt.add_argument("--soak", type=float, default=0, help="seconds to run with the supervisor on")
+    lt.add_argument("--check-interval", type=int, default=10, help="supervisor check interval")
+    lt.add_argument("--cooldown", type=float, default=10, help="supervisor relaunch cooldown")
+    lt.add_argument("--timeout", type=float, default=300)
+    lt.add_argument("--verbose", action="store_true", help="echo the manager's activity log")
+
+    cl = sub.add_parser("client", help="(internal) one stand-in Roblox client")
+    cl.add_argument("--account", required=True)
+    cl.add_argument("--server", default="")
+    cl.add_argument("--url", required=True)
+    cl.add_argument("--api", required=True)
+    cl.add_argument("--stub", required=True)
+    cl.add_argument("--join-latency", type=float, default=3.0)
+    cl.add_argument("--crash-rate", type=float, default=0.0)
+    cl.add_argument("--disconnect-rate", type=float, default=0.0)
+    cl.add_argument("--interval", type=float, default=2.0)
+    cl.add_argument("--ttl", type=float, default=3600)
+
+    args = ap.parse_args()
+    if args.mode == "client":
+        run_client(args)
+    else:
+        loadtest(args)
+
+
+if __name__ == "__main__":
+    main()
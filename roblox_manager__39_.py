@@ -14,7 +14,9 @@ Features:
   - Integrated HTTP API for Lua executor
 
 Usage:
-  python roblox_manager.py
+  python roblox_manager.py              # desktop app + API
+  python roblox_manager.py --headless   # backend + API only (no Tk), e.g. as a service
+  python roblox_manager.py --sqlite     # also keep state/heartbeat history in SQLite (or RM_SQLITE=1)
 
 Requirements (auto-installed on first run):
   pip install pycryptodome psutil
@@ -36,9 +38,13 @@ import base64
 import tempfile
 import struct
 import random
+import copy
+import atexit
+import heapq
+from collections import deque
+import http.client
 import http.server
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 # ============================================================================
@@ -82,8 +88,58 @@ import psutil
 # ============================================================================
 
 PORT = 8080
+API_WORKERS = 16  # Bounded pool for concurrent API requests (heartbeats never queue behind a restart)
 PLACE_ID = 133322550157181
-DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "roblox_manager_data.json")
+DATA_DIR = os.environ.get("RM_DATA_DIR") or os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(DATA_DIR, "roblox_manager_data.json")
+
+STATE_DB_FILE = os.path.join(DATA_DIR, "roblox_manager_state.db")
+
+# Optional SQLite backend: mirrors accounts/servers/instances and keeps heartbeat
+# history in STATE_DB_FILE so presence queries are indexed and survive restarts.
+# Turned on with --sqlite or RM_SQLITE=1.
+SQLITE_BACKEND = "--sqlite" in sys.argv[1:] or os.environ.get("RM_SQLITE", "").lower() in ("1", "true", "yes", "on")
+HEARTBEAT_HISTORY_DAYS = 7
+
+BATCH_TICKET_WORKERS = 8    # Concurrent auth-ticket fetches during a batch launch
+BATCH_LAUNCH_PACING = 3.0   # Seconds between process starts in a batch launch
+LAUNCH_BACKEND = "shell"    # Default launch mode, a key of LAUNCHERS: "shell" (roblox-player: protocol handler)
+                            # or "direct" (run RobloxPlayerBeta.exe); the "launchMode" setting overrides it
+
+CSRF_TTL = 1800  # Cached x-csrf-token lifetime; a 403 with a new token refreshes it early
+LAUNCH_TICKET_MAX_AGE = 60  # A prepared launch (auth ticket) older than this is refetched before use
+
+RESTART_DEDUPE_WINDOW = 60  # Seconds after a restart job finishes during which repeat /restart calls attach to it
+RESTART_JOB_HISTORY = 50    # Finished restart jobs kept for GET /jobs
+RESTART_KILL_TIMEOUT = 5.0  # Seconds to wait for a terminated client before force-killing it
+RESTART_PREFETCH_LEAD = 10      # Start fetching relaunch tickets this many seconds before a restart's wait ends
+RESTART_RELAUNCH_STAGGER = 2.0  # Seconds between relaunches within one restart job
+RESTART_SWEEP_UNATTRIBUTED = False  # Also kill Roblox processes no account owns (POST body "sweep" overrides)
+VERIFY_JOIN_TIMEOUT = 45.0  # Seconds a relaunched account gets to show up in a heartbeat before it's retried
+VERIFY_MAX_ATTEMPTS = 3     # Launch attempts per account during verify (first launch included)
+VERIFY_BACKOFF = 1.5        # Each retry's deadline is the previous one times this
+
+SUPERVISOR_COOLDOWN = 120    # Don't relaunch the same account within this many seconds
+SUPERVISOR_JOIN_GRACE = 90   # Seconds a relaunched account has to start heartbeating before it's stale again
+SUPERVISOR_STAGGER = 5       # Seconds between supervisor relaunches
+
+EVENT_BUFFER = 2000      # Events kept for /events resume cursors
+EVENT_STREAMS_MAX = 4    # Concurrent GET /events SSE streams (each holds an API worker)
+EVENT_POLLS_MAX = 4      # Concurrent GET /events/poll long-polls (each holds an API worker)
+
+API_ETAG_WINDOW = 5.0  # Cached /status and /players bodies (and their ETags) live at most this long without events
+
+HEARTBEAT_MISSING_TTL = 5.0  # Seconds a server's missing/present answer is reused while presence is unchanged
+HEARTBEAT_REDRAW_MS = 5000   # A heartbeat-triggered UI refresh waits this long (coalescing the rest)
+
+LOG_BUFFER = 2000                 # Log entries kept in memory for the UI and GET /logs
+LOG_CONSOLE_LEVEL = "debug"       # Minimum level echoed to stdout
+LOG_UI_LEVEL = "dim"              # Minimum level shown in the Logs tab
+LOG_UI_LINES = 500                # Lines kept in the Logs tab widget
+LOG_UI_FRAME_MS = 100             # Logs tab appends are batched to at most one per frame
+LOG_FILE = os.path.join(DATA_DIR, "roblox_manager.log")  # None disables the file
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
 
 SERVERS = {}  # Loaded from data file at startup
 
@@ -97,86 +153,515 @@ DEFAULT_SERVERS = {
 }
 
 
+# ============================================================================
+# LOGGING (one ring buffer for console, log file, UI and GET /logs)
+# ============================================================================
+
+class ActivityLog:
+    """Structured log pipeline. Entries ({seq, ts, time, level, tag, text}) go into
+    a bounded deque that the UI and GET /logs?since=<seq> read from; a background
+    writer echoes them to stdout and appends them to a rotating log file, so
+    callers never block on I/O. Listeners get each new entry."""
+
+    LEVELS = {"debug": 10, "dim": 15, "info": 20, "success": 25, "warn": 30, "error": 40}
+
+    def __init__(self, maxlen=LOG_BUFFER, path=LOG_FILE, max_bytes=LOG_FILE_MAX_BYTES,
+                 backups=LOG_FILE_BACKUPS, console_level=LOG_CONSOLE_LEVEL):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=maxlen)
+        self._seq = 0
+        self._listeners = []
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.console_level = self.LEVELS.get(console_level, 0)
+        self._out = deque()              # entries not yet written to console/file
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._writer = None
+
+    def subscribe(self, fn):
+        self._listeners.append(fn)
+
+    def log(self, text, level="info", tag=None):
+        with self._lock:
+            self._seq += 1
+            entry = {"seq": self._seq, "ts": time.time(), "time": datetime.now().strftime("%H:%M:%S"),
+                     "level": level, "tag": tag, "text": text}
+            self._entries.append(entry)
+        self._out.append(entry)
+        if self._writer is None:
+            self._start_writer()
+        self._wake.set()
+        for fn in list(self._listeners):
+            try:
+                fn(entry)
+            except Exception:
+                pass
+        return entry
+
+    def entries(self, since=0, limit=None, level=None):
+        floor = self.LEVELS.get(level, 0)
+        with self._lock:
+            out = [e for e in self._entries if e["seq"] > since and self.LEVELS.get(e["level"], 20) >= floor]
+        return out[-limit:] if limit else out
+
+    def last_seq(self):
+        return self._seq
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def format(entry):
+        return f"[{entry['tag']}] {entry['text']}" if entry["tag"] else entry["text"]
+
+    # -- background writer -------------------------------------------
+    def _start_writer(self):
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True, name="log-writer")
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _write_loop(self):
+        while True:
+            self._wake.wait(1.0)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write queued entries to stdout and the log file (rotating it when full)."""
+        with self._write_lock:
+            batch = []
+            while self._out:
+                batch.append(self._out.popleft())
+            if not batch:
+                return
+            console = [self.format(e) for e in batch if self.LEVELS.get(e["level"], 20) >= self.console_level]
+            if console:
+                try:
+                    sys.stdout.write("\n".join(console) + "\n")
+                    sys.stdout.flush()
+                except Exception:
+                    pass
+            if self.path:
+                try:
+                    self._write_file(batch)
+                except OSError:
+                    pass
+
+    def _write_file(self, batch):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(
+            f"{datetime.fromtimestamp(e['ts']):%Y-%m-%d %H:%M:%S} {e['level'].upper():<7} {self.format(e)}\n"
+            for e in batch))
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._file.close()
+            self._file = None
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            if self.backups:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+
+
+activity = ActivityLog()
+
+
+# ============================================================================
+# PERSISTENCE
+# ============================================================================
+# One DataStore owns DATA_FILE for the whole process. Writers update the
+# in-memory document and the store appends coalesced path deltas to a journal
+# after a short debounce window. The journal is periodically folded back into
+# DATA_FILE through a temp file + rename, so the main file is never half-written.
+
+_DELETED = object()
+
+
+class DataStore:
+    """Process-wide in-memory document backed by DATA_FILE + a write-behind journal.
+    Journal lines are {"p": [path...], "v": value} or {"p": [path...], "d": 1}."""
+
+    def __init__(self, path, debounce=0.5, compact_every=200):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.debounce = debounce
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._doc = {}
+        self._pending = {}  # {path tuple: value or _DELETED}, insertion-ordered
+        self._journal_entries = 0
+        self._timer = None
+        self.stats = {"writes": 0, "flushes": 0, "compactions": 0}
+        self._load()
+
+    def _load(self):
+        doc = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    doc = json.load(f)
+            except Exception:
+                doc = {}
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            try:
+                with open(self.journal_path, "r") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break  # torn tail from a crash mid-append; everything before is intact
+                        self._apply(doc, entry["p"], _DELETED if entry.get("d") else entry.get("v"))
+                        replayed += 1
+            except Exception:
+                pass
+        self._doc = doc if isinstance(doc, dict) else {}
+        self._journal_entries = replayed
+        if replayed:
+            self.compact()
+
+    @staticmethod
+    def _apply(doc, path, value):
+        node = doc
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                if value is _DELETED:
+                    return
+                child = node[key] = {}
+            node = child
+        if value is _DELETED:
+            node.pop(path[-1], None)
+        else:
+            node[path[-1]] = value
+
+    def get(self, *path, default=None):
+        """Return a deep copy of the value at path, or default if missing."""
+        with self._lock:
+            node = self._doc
+            for key in path:
+                if not isinstance(node, dict) or key not in node:
+                    return default
+                node = node[key]
+            return copy.deepcopy(node)
+
+    def set(self, path, value):
+        """Set the value at path (str or tuple of keys). Persisted after the debounce window."""
+        self._write(path, copy.deepcopy(value))
+
+    def delete(self, path):
+        self._write(path, _DELETED)
+
+    def _write(self, path, value):
+        path = (path,) if isinstance(path, str) else tuple(path)
+        with self._lock:
+            self._apply(self._doc, path, value)
+            # A write to a path supersedes pending writes at or below it
+            for p in [p for p in self._pending if p[:len(path)] == path]:
+                del self._pending[p]
+            self._pending[path] = value
+            self.stats["writes"] += 1
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Append all pending deltas to the journal with a single fsync."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            lines = []
+            for path, value in self._pending.items():
+                entry = {"p": list(path), "d": 1} if value is _DELETED else {"p": list(path), "v": value}
+                lines.append(json.dumps(entry, separators=(",", ":"), default=str))
+            self._pending = {}
+            try:
+                with open(self.journal_path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except Exception as ex:
+                activity.log(f"Journal append failed: {ex} - compacting instead", "warn", tag="STORE")
+                self.compact()
+                return
+            self._journal_entries += len(lines)
+            self.stats["flushes"] += 1
+            if self._journal_entries >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Write the full document atomically (temp file + rename) and truncate the journal."""
+        with self._lock:
+            data = json.dumps(self._doc, indent=2, default=str)
+            fd, tmp = tempfile.mkstemp(prefix=".rm_data_", suffix=".tmp",
+                                       dir=os.path.dirname(self.path) or ".")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except Exception as ex:
+                activity.log(f"Compaction failed: {ex}", "warn", tag="STORE")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                return False
+            # The snapshot now holds every journaled and pending change
+            self._pending = {}
+            try:
+                open(self.journal_path, "w").close()
+            except OSError:
+                pass
+            self._journal_entries = 0
+            self.stats["compactions"] += 1
+            return True
+
+    def close(self):
+        """Flush and compact. Registered with atexit so no debounced write is lost."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending or self._journal_entries:
+                self.compact()
+
+
+store = DataStore(DATA_FILE)
+atexit.register(store.close)
+
+
+class SqliteStateStore:
+    """WAL-mode SQLite store for accounts, servers, instances and heartbeats.
+    `reports`/`report_players` hold the latest report per reporter (what
+    player_reports holds in memory); `heartbeat_log` keeps the history."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS accounts (
+        name TEXT PRIMARY KEY, username_lc TEXT, display_lc TEXT, data TEXT);
+    CREATE INDEX IF NOT EXISTS idx_accounts_username ON accounts(username_lc);
+    CREATE INDEX IF NOT EXISTS idx_accounts_display ON accounts(display_lc);
+    CREATE TABLE IF NOT EXISTS servers (key TEXT PRIMARY KEY, data TEXT);
+    CREATE TABLE IF NOT EXISTS instances (
+        account TEXT PRIMARY KEY, pid INTEGER, server_key TEXT, launched_at REAL);
+    CREATE INDEX IF NOT EXISTS idx_instances_server ON instances(server_key);
+    CREATE TABLE IF NOT EXISTS reports (
+        reporter TEXT PRIMARY KEY, server TEXT, job_id TEXT, ts REAL);
+    CREATE INDEX IF NOT EXISTS idx_reports_server_ts ON reports(server, ts);
+    CREATE TABLE IF NOT EXISTS report_players (
+        reporter TEXT, player TEXT, player_lc TEXT, PRIMARY KEY (reporter, player));
+    CREATE INDEX IF NOT EXISTS idx_report_players_lc ON report_players(player_lc);
+    CREATE TABLE IF NOT EXISTS heartbeat_log (
+        id INTEGER PRIMARY KEY, reporter TEXT, server TEXT, job_id TEXT, ts REAL, players TEXT);
+    CREATE INDEX IF NOT EXISTS idx_hblog_server_ts ON heartbeat_log(server, ts);
+    CREATE INDEX IF NOT EXISTS idx_hblog_reporter_ts ON heartbeat_log(reporter, ts);
+    CREATE INDEX IF NOT EXISTS idx_hblog_ts ON heartbeat_log(ts);
+    """
+
+    def __init__(self, path, history_days=HEARTBEAT_HISTORY_DAYS):
+        self.path = path
+        self.history_s = history_days * 86400
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # -- accounts / servers ------------------------------------------------
+
+    def sync_accounts(self, accounts):
+        """Replace the accounts table with the given {name: account} dict."""
+        rows = [(n, a.get("username", "").lower(), a.get("display_name", "").lower(),
+                 json.dumps({k: v for k, v in a.items() if k != "cookie"}))
+                for n, a in accounts.items()]
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM accounts")
+            self.conn.executemany("INSERT INTO accounts VALUES (?, ?, ?, ?)", rows)
+            self.conn.execute("COMMIT")
+
+    def sync_servers(self, servers):
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM servers")
+            self.conn.executemany("INSERT INTO servers VALUES (?, ?)",
+                                  [(k, json.dumps(v)) for k, v in servers.items()])
+            self.conn.execute("COMMIT")
+
+    # -- instances ---------------------------------------------------------
+
+    def save_instance(self, account, inst):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO instances VALUES (?, ?, ?, ?)",
+                (account, inst.get("pid") or 0, inst.get("server_key"), inst.get("launched_at", 0)))
+
+    def delete_instance(self, account):
+        with self._lock:
+            self.conn.execute("DELETE FROM instances WHERE account = ?", (account,))
+
+    def load_instances(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT account, pid, server_key, launched_at FROM instances").fetchall()
+        return {a: {"pid": pid, "server_key": srv, "launched_at": ts} for a, pid, srv, ts in rows}
+
+    # -- heartbeats --------------------------------------------------------
+
+    def record_heartbeat(self, reporter, server, job_id, players, ts):
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?)",
+                              (reporter, server, job_id, ts))
+            self.conn.execute("DELETE FROM report_players WHERE reporter = ?", (reporter,))
+            self.conn.executemany("INSERT OR IGNORE INTO report_players VALUES (?, ?, ?)",
+                                  [(reporter, p, p.lower()) for p in players])
+            self.conn.execute("INSERT INTO heartbeat_log (reporter, server, job_id, ts, players) VALUES (?, ?, ?, ?, ?)",
+                              (reporter, server, job_id, ts, json.dumps(players)))
+            self.conn.execute("COMMIT")
+            self._inserts += 1
+            if self._inserts % 1000 == 0:
+                self.conn.execute("DELETE FROM heartbeat_log WHERE ts < ?", (ts - self.history_s,))
+
+    def clear_reports(self, server=None, reporter=None):
+        """Drop latest reports (history is kept) for a server and/or reporter."""
+        where, args = [], []
+        if server is not None:
+            where.append("server = ?")
+            args.append(server)
+        if reporter is not None:
+            where.append("reporter = ?")
+            args.append(reporter)
+        cond = (" WHERE " + " AND ".join(where)) if where else ""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.execute(f"DELETE FROM report_players WHERE reporter IN (SELECT reporter FROM reports{cond})", args)
+            self.conn.execute(f"DELETE FROM reports{cond}", args)
+            self.conn.execute("COMMIT")
+
+    def load_reports(self):
+        """Rebuild the in-memory player_reports dict from the latest reports."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT r.reporter, r.server, r.job_id, r.ts, rp.player FROM reports r "
+                "LEFT JOIN report_players rp ON rp.reporter = r.reporter").fetchall()
+        reports = {}
+        for reporter, server, job_id, ts, player in rows:
+            rep = reports.setdefault(reporter, {"players": [], "jobId": job_id, "server": server, "timestamp": ts})
+            if player is not None:
+                rep["players"].append(player)
+        return reports
+
+    def reports_with_players(self, server=None):
+        """All latest reports joined with their players, optionally for one server."""
+        sql = ("SELECT r.reporter, r.server, r.job_id, r.ts, rp.player FROM reports r "
+               "LEFT JOIN report_players rp ON rp.reporter = r.reporter")
+        args = ()
+        if server is not None:
+            sql += " WHERE r.server = ?"
+            args = (server,)
+        with self._lock:
+            return self.conn.execute(sql, args).fetchall()
+
+    def presence(self, server, max_age, now=None):
+        """Who is in `server` within max_age. One indexed query.
+        Returns (have_report, {player_lc, ...}, {present account names})."""
+        cutoff = (now or time.time()) - max_age
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT rp.player_lc, a.name FROM reports r "
+                "LEFT JOIN report_players rp ON rp.reporter = r.reporter "
+                "LEFT JOIN accounts a ON a.username_lc = rp.player_lc OR a.display_lc = rp.player_lc "
+                "WHERE r.server = ? AND r.ts >= ?", (server, cutoff)).fetchall()
+        players = {p for p, _ in rows if p is not None}
+        present = {a for _, a in rows if a is not None}
+        return bool(rows), players, present
+
+    def heartbeat_history(self, server=None, since=0, limit=500):
+        sql = "SELECT reporter, server, job_id, ts, players FROM heartbeat_log WHERE ts >= ?"
+        args = [since]
+        if server is not None:
+            sql += " AND server = ?"
+            args.append(server)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [{"reporter": r, "server": srv, "jobId": j, "timestamp": ts, "players": json.loads(pl)}
+                for r, srv, j, ts, pl in rows]
+
+
 def load_servers():
     """Load servers from data file, or use defaults.
     Merges link_code/server_id from DEFAULT_SERVERS into saved configs.
     Clears cached server_id if link_code was added or changed (forces re-resolve)."""
     global SERVERS
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-                saved = data.get("servers", {})
-                if saved:
-                    changed = False
-                    for key, defaults in DEFAULT_SERVERS.items():
-                        if key in saved:
-                            # Sync link_code from defaults
-                            if "link_code" in defaults:
-                                old_lc = saved[key].get("link_code")
-                                new_lc = defaults["link_code"]
-                                if old_lc != new_lc:
-                                    saved[key]["link_code"] = new_lc
-                                    # link_code changed or added â€” cached server_id is stale
-                                    if "server_id" in saved[key]:
-                                        print(f"[CONFIG] {key}: link_code changed, clearing cached server_id={saved[key]['server_id']}")
-                                        del saved[key]["server_id"]
-                                    changed = True
-                            # Merge server_id from defaults only if not already set
-                            if "server_id" in defaults and "server_id" not in saved[key]:
-                                saved[key]["server_id"] = defaults["server_id"]
-                                changed = True
-                        else:
-                            saved[key] = dict(defaults)
-                            changed = True
-                    SERVERS = saved
-                    if changed:
-                        save_servers()
-                    return
-        except Exception:
-            pass
+    saved = store.get("servers", default={})
+    if saved:
+        changed = False
+        for key, defaults in DEFAULT_SERVERS.items():
+            if key in saved:
+                # Sync link_code from defaults
+                if "link_code" in defaults:
+                    old_lc = saved[key].get("link_code")
+                    new_lc = defaults["link_code"]
+                    if old_lc != new_lc:
+                        saved[key]["link_code"] = new_lc
+                        # link_code changed or added â€” cached server_id is stale
+                        if "server_id" in saved[key]:
+                            activity.log(f"{key}: link_code changed, clearing cached server_id={saved[key]['server_id']}", "info", tag="CONFIG")
+                            del saved[key]["server_id"]
+                        changed = True
+                # Merge server_id from defaults only if not already set
+                if "server_id" in defaults and "server_id" not in saved[key]:
+                    saved[key]["server_id"] = defaults["server_id"]
+                    changed = True
+            else:
+                saved[key] = dict(defaults)
+                changed = True
+        SERVERS = saved
+        if changed:
+            save_servers()
+        return
     SERVERS = {k: dict(v) for k, v in DEFAULT_SERVERS.items()}
     save_servers()
 
 
 def save_servers():
     """Save servers to data file."""
-    try:
-        data = {}
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-        data["servers"] = SERVERS
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=2)
-    except Exception:
-        pass
+    store.set("servers", SERVERS)
+    if "manager" in globals():
+        manager.touch()
+        if manager.db:
+            manager.db.sync_servers(SERVERS)
 
 
 def save_ui_settings(settings):
     """Persist UI settings (watchdog, etc) to data file."""
-    try:
-        data = {}
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-        data["ui_settings"] = settings
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=2)
-    except Exception:
-        pass
+    store.set("ui_settings", settings)
 
 
 def load_ui_settings():
     """Load saved UI settings from data file."""
-    try:
-        if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r") as f:
-                data = json.load(f)
-            return data.get("ui_settings", {})
-    except Exception:
-        pass
-    return {}
+    return store.get("ui_settings", default={})
 
 
 def add_server(name, link_code, place_id=None):
@@ -249,6 +734,50 @@ class Theme:
 # WINDOWS HELPERS
 # ============================================================================
 
+# SystemHandleInformation (class 16) layout, keyed by pointer size. The table is
+# a ULONG count padded to pointer alignment, then fixed-size entries of
+# UniqueProcessId:u16 CreatorBackTraceIndex:u16 ObjectTypeIndex:u8
+# HandleAttributes:u8 HandleValue:u16 Object:ptr GrantedAccess:u32 (+ padding).
+HANDLE_ENTRY_LAYOUTS = {
+    8: struct.Struct("<HHBBHQI4x"),  # 24 bytes, entries start at offset 8
+    4: struct.Struct("<HHBBHII"),    # 16 bytes, entries start at offset 4
+}
+HANDLE_TABLE_MAX = 4000000
+
+
+def scan_handle_table(buf, pids, type_indices=None, ptr_size=struct.calcsize("P")):
+    """One pass over a raw SystemHandleInformation buffer, without copying it.
+    Yields (pid, object_type_index, handle_value) for entries whose 16-bit PID is
+    in `pids` (and whose type is in `type_indices`, if given). Only the PID column
+    is walked; matching entries are unpacked in place."""
+    layout = HANDLE_ENTRY_LAYOUTS[ptr_size]
+    size = layout.size
+    view = memoryview(buf).cast("B")
+    if len(view) < ptr_size:
+        return
+    count = min(struct.unpack_from("<I", view, 0)[0], (len(view) - ptr_size) // size, HANDLE_TABLE_MAX)
+    body = view[ptr_size:ptr_size + count * size]
+    pid_column = body.cast("H")[::size // 2]
+    for i, pid in enumerate(pid_column):
+        if pid in pids:
+            _, _, type_index, _, handle_val = layout.unpack_from(body, i * size)[:5]
+            if type_indices is None or type_index in type_indices:
+                yield pid, type_index, handle_val
+
+
+def pack_handle_table(entries, ptr_size=struct.calcsize("P")):
+    """Build a SystemHandleInformation buffer from (pid, type_index, handle_value)
+    tuples - the inverse of scan_handle_table, for benchmarks and offline checks."""
+    layout = HANDLE_ENTRY_LAYOUTS[ptr_size]
+    out = bytearray(ptr_size + len(entries) * layout.size)
+    struct.pack_into("<I", out, 0, len(entries))
+    off = ptr_size
+    for pid, type_index, handle_val in entries:
+        layout.pack_into(out, off, pid & 0xFFFF, 0, type_index, 0, handle_val, 0, 0x1F0003)
+        off += layout.size
+    return out
+
+
 if IS_WINDOWS:
     class DATA_BLOB(ctypes.Structure):
         _fields_ = [
@@ -285,131 +814,136 @@ if IS_WINDOWS:
             handle = kernel32.CreateMutexW(None, True, name)
             if handle:
                 _held_handles.append(handle)
-                print(f"[+] Holding mutex: {name} (handle={handle})")
+                activity.log(f"[+] Holding mutex: {name} (handle={handle})", "info")
             else:
-                print(f"[-] Failed to create mutex: {name} (error={kernel32.GetLastError()})")
+                activity.log(f"[-] Failed to create mutex: {name} (error={kernel32.GetLastError()})", "error")
 
         # CreateEventW(lpEventAttributes, bManualReset, bInitialState, lpName)
         for name in ["ROBLOX_singletonEvent"]:
             handle = kernel32.CreateEventW(None, True, False, name)
             if handle:
                 _held_handles.append(handle)
-                print(f"[+] Holding event: {name} (handle={handle})")
+                activity.log(f"[+] Holding event: {name} (handle={handle})", "info")
             else:
-                print(f"[-] Failed to create event: {name} (error={kernel32.GetLastError()})")
+                activity.log(f"[-] Failed to create event: {name} (error={kernel32.GetLastError()})", "error")
 
-    def close_singleton_from_process(pid):
-        """Close ROBLOX_singletonEvent handle inside a specific Roblox process.
-        This is needed when a Roblox instance managed to create the event before us,
-        or when we need to clean up a specific process's hold on it."""
-        ntdll = ctypes.windll.ntdll
-        kernel32 = ctypes.windll.kernel32
+    _scan_lock = threading.Lock()
+    _scan_state = {"buf": None, "size": 0x10000, "types": set()}  # Reused buffer + learned Mutex/Event type indices
+    _SINGLETON_TYPE_GUESS = frozenset(range(15, 25))  # Mutex/Event indices vary by Windows version
 
-        class SYSTEM_HANDLE_TABLE_ENTRY_INFO(ctypes.Structure):
-            _fields_ = [
-                ("UniqueProcessId", ctypes.c_ushort),
-                ("CreatorBackTraceIndex", ctypes.c_ushort),
-                ("ObjectTypeIndex", ctypes.c_ubyte),
-                ("HandleAttributes", ctypes.c_ubyte),
-                ("HandleValue", ctypes.c_ushort),
-                ("Object", ctypes.c_void_p),
-                ("GrantedAccess", ctypes.c_ulong),
-            ]
-
-        buf_size = 0x10000
+    def _query_handle_table():
+        """NtQuerySystemInformation(SystemHandleInformation) into a buffer reused across sweeps.
+        Returns the buffer, or None on failure. Call with _scan_lock held."""
+        ntdll = ctypes.windll.ntdll
+        state = _scan_state
         while True:
-            buf = ctypes.create_string_buffer(buf_size)
+            if state["buf"] is None or len(state["buf"]) < state["size"]:
+                state["buf"] = ctypes.create_string_buffer(state["size"])
             ret_length = ctypes.c_ulong(0)
-            status = ntdll.NtQuerySystemInformation(16, buf, buf_size, ctypes.byref(ret_length))
-            if status == 0xC0000004:  # STATUS_INFO_LENGTH_MISMATCH
-                buf_size *= 2
+            status = ntdll.NtQuerySystemInformation(16, state["buf"], state["size"], ctypes.byref(ret_length))
+            if status == 0xC0000004:  # STATUS_INFO_LENGTH_MISMATCH - the table grows between calls, leave headroom
+                state["size"] = max(state["size"] * 2, ret_length.value + 0x10000)
                 continue
-            break
-
-        if status != 0:
-            return 0
+            return state["buf"] if status == 0 else None
 
-        handle_count = struct.unpack_from("I", buf.raw, 0)[0]
-        offset = ctypes.sizeof(ctypes.c_ulong)
-        entry_size = ctypes.sizeof(SYSTEM_HANDLE_TABLE_ENTRY_INFO)
+    def close_singletons(pids):
+        """Close ROBLOX_singleton* handles inside every process in `pids` with one
+        handle-table query and one pass over it.
+        This is needed when a Roblox instance managed to create the event before us,
+        or when we need to clean up a specific process's hold on it."""
+        ntdll = ctypes.windll.ntdll
+        kernel32 = ctypes.windll.kernel32
         DUPLICATE_CLOSE_SOURCE = 0x00000001
         DUPLICATE_SAME_ACCESS = 0x00000002
         PROCESS_DUP_HANDLE = 0x0040
         HANDLE = ctypes.c_void_p
+        # The table only carries the low 16 bits of each PID
+        targets = {pid & 0xFFFF: pid for pid in pids if pid}
+        if not targets:
+            return 0
+        own = os.getpid() & 0xFFFF
+        own_handles = {h & 0xFFFF for h in _held_handles}
         closed = 0
 
-        target_pids = {pid}
-
-        for i in range(min(handle_count, 500000)):
-            entry = SYSTEM_HANDLE_TABLE_ENTRY_INFO.from_buffer_copy(buf.raw, offset + i * entry_size)
-            if entry.UniqueProcessId not in target_pids:
-                continue
-            # Mutex/Event type indices vary by Windows version, check a broad range
-            if entry.ObjectTypeIndex not in range(15, 25):
-                continue
-
-            handle_val = entry.HandleValue
-            proc_handle = kernel32.OpenProcess(PROCESS_DUP_HANDLE, False, entry.UniqueProcessId)
-            if not proc_handle:
-                continue
-
-            dup_handle = HANDLE()
-            status = ntdll.NtDuplicateObject(
-                proc_handle, handle_val,
-                kernel32.GetCurrentProcess(), ctypes.byref(dup_handle),
-                0, 0, DUPLICATE_SAME_ACCESS,
-            )
-
-            if status != 0 or not dup_handle:
-                kernel32.CloseHandle(proc_handle)
-                continue
+        with _scan_lock:
+            buf = _query_handle_table()
+            if buf is None:
+                return 0
+            types = _scan_state["types"]
+            if not types and own_handles:
+                # Learn the Mutex/Event type indices from the singletons we hold ourselves
+                for _, type_index, handle_val in scan_handle_table(buf, {own}):
+                    if handle_val in own_handles:
+                        types.add(type_index)
+            matches = list(scan_handle_table(buf, targets.keys(), types or _SINGLETON_TYPE_GUESS))
+
+        current = kernel32.GetCurrentProcess()
+        opened = {}
+        try:
+            for short_pid, type_index, handle_val in matches:
+                pid = targets[short_pid]
+                if pid not in opened:
+                    opened[pid] = kernel32.OpenProcess(PROCESS_DUP_HANDLE, False, pid)
+                proc_handle = opened[pid]
+                if not proc_handle:
+                    continue
 
-            buf2 = ctypes.create_string_buffer(1024)
-            ret_len = ctypes.c_ulong(0)
-            status = ntdll.NtQueryObject(dup_handle, 1, buf2, 1024, ctypes.byref(ret_len))
-            kernel32.CloseHandle(dup_handle.value if isinstance(dup_handle, ctypes.c_void_p) else dup_handle)
+                dup_handle = HANDLE()
+                status = ntdll.NtDuplicateObject(
+                    proc_handle, handle_val, current, ctypes.byref(dup_handle),
+                    0, 0, DUPLICATE_SAME_ACCESS,
+                )
+                if status != 0 or not dup_handle:
+                    continue
 
-            if status == 0 and ret_len.value > 0:
-                try:
-                    name_len = struct.unpack_from("H", buf2.raw, 0)[0]
-                    if name_len > 0:
-                        name_bytes = buf2.raw[8 : 8 + name_len]
-                        name = name_bytes.decode("utf-16-le", errors="ignore")
-                        if "ROBLOX_singleton" in name:
-                            dup2 = HANDLE()
-                            ntdll.NtDuplicateObject(
-                                proc_handle, handle_val,
-                                kernel32.GetCurrentProcess(), ctypes.byref(dup2),
-                                0, 0, DUPLICATE_CLOSE_SOURCE,
-                            )
-                            if dup2:
-                                kernel32.CloseHandle(dup2.value if isinstance(dup2, ctypes.c_void_p) else dup2)
-                            closed += 1
-                            print(f"[+] Closed singleton handle '{name}' from PID {entry.UniqueProcessId}")
-                except Exception:
-                    pass
+                buf2 = ctypes.create_string_buffer(1024)
+                ret_len = ctypes.c_ulong(0)
+                status = ntdll.NtQueryObject(dup_handle, 1, buf2, 1024, ctypes.byref(ret_len))
+                kernel32.CloseHandle(dup_handle.value if isinstance(dup_handle, ctypes.c_void_p) else dup_handle)
 
-            kernel32.CloseHandle(proc_handle)
+                if status == 0 and ret_len.value > 0:
+                    try:
+                        name_len = struct.unpack_from("H", buf2, 0)[0]
+                        if name_len > 0:
+                            name = buf2.raw[8 : 8 + name_len].decode("utf-16-le", errors="ignore")
+                            if "ROBLOX_singleton" in name:
+                                dup2 = HANDLE()
+                                ntdll.NtDuplicateObject(
+                                    proc_handle, handle_val, current, ctypes.byref(dup2),
+                                    0, 0, DUPLICATE_CLOSE_SOURCE,
+                                )
+                                if dup2:
+                                    kernel32.CloseHandle(dup2.value if isinstance(dup2, ctypes.c_void_p) else dup2)
+                                closed += 1
+                                _scan_state["types"].add(type_index)
+                                activity.log(f"[+] Closed singleton handle '{name}' from PID {pid}", "debug")
+                    except Exception:
+                        pass
+        finally:
+            for proc_handle in opened.values():
+                if proc_handle:
+                    kernel32.CloseHandle(proc_handle)
 
         return closed
 
+    def close_singleton_from_process(pid):
+        """Close ROBLOX_singletonEvent handle inside a specific Roblox process."""
+        return close_singletons([pid])
+
     def ensure_multi_instance():
         """Ensure multi-instance is possible: hold mutex + clean existing processes."""
         # First, hold the mutex ourselves
         hold_mutex()
         # Then close any existing Roblox singleton handles
-        for proc in psutil.process_iter(["pid", "name"]):
-            try:
-                if proc.info["name"] and "RobloxPlayerBeta" in proc.info["name"]:
-                    close_singleton_from_process(proc.info["pid"])
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        close_singletons(process_registry.pids(fresh=True))
 
 else:
     def dpapi_decrypt(encrypted):
         return None
     def hold_mutex():
         pass
+    def close_singletons(pids):
+        return 0
     def close_singleton_from_process(pid):
         return 0
     def ensure_multi_instance():
@@ -669,208 +1203,226 @@ def login_via_browser(account_name, on_success, on_fail, on_status):
 
 
 # ============================================================================
-# ACCOUNT MANAGER (backend logic)
+# ROBLOX WEB CLIENT (keep-alive HTTPS pools)
 # ============================================================================
 
-class AccountManager:
-    def __init__(self):
-        self.accounts = {}
-        self.instances = {}
-        # Player reports from Lua heartbeats: {reporter_username: {players, jobId, server, timestamp}}
-        self.player_reports = {}
-        self.load_data()
-
-    def load_data(self):
-        if os.path.exists(DATA_FILE):
+class HttpResponse:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body.decode("utf-8")) if self.body.strip() else {}
+
+
+class RobloxHttpClient:
+    """Shared HTTP client for every Roblox web API call.
+    One SSL context, a small pool of persistent connections per host, per-call
+    timeouts and retry-with-backoff on connection errors, 429 and 5xx. Only
+    idempotent methods retry by default; a POST retries only when the caller
+    passes `retries`.
+    `base_overrides` maps a hostname to another base URL, e.g.
+    {"auth.roblox.com": "https://127.0.0.1:8443"}, to run against a local stub."""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    IDEMPOTENT = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+    # A pooled connection the server already closed fails like this before any response
+    STALE_ERRORS = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+    def __init__(self, ssl_context=None, pool_size=8, timeout=10, retries=2, backoff=0.5,
+                 idle_timeout=60, base_overrides=None):
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.idle_timeout = idle_timeout
+        self.base_overrides = dict(base_overrides or {})
+        self._pools = {}  # {(scheme, host, port): [(conn, last_used), ...]}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections": 0, "reused": 0, "retries": 0}
+
+    def _target(self, url):
+        parts = urllib.parse.urlsplit(url)
+        scheme, host, port = parts.scheme, parts.hostname, parts.port
+        override = self.base_overrides.get(host)
+        if override:
+            o = urllib.parse.urlsplit(override)
+            scheme, host, port = o.scheme, o.hostname, o.port
+        port = port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (scheme, host, port), parts.hostname, path
+
+    def _acquire(self, key, timeout):
+        now = time.time()
+        with self._lock:
+            idle = self._pools.get(key, [])
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self.idle_timeout:
+                    conn.timeout = timeout
+                    if conn.sock is not None:
+                        conn.sock.settimeout(timeout)
+                    self.stats["reused"] += 1
+                    return conn, True
+                conn.close()
+            self.stats["connections"] += 1
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context), False
+        return http.client.HTTPConnection(host, port, timeout=timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._pools.setdefault(key, [])
+            if len(idle) < self.pool_size:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def request(self, method, url, headers=None, body=None, timeout=None, retries=None):
+        """Send a request and return an HttpResponse for any HTTP status.
+        `retries` defaults to the client's setting for idempotent methods and 0
+        otherwise. Raises OSError / http.client.HTTPException once retries are exhausted."""
+        key, orig_host, path = self._target(url)
+        timeout = timeout or self.timeout
+        if retries is None:
+            retries = self.retries if method.upper() in self.IDEMPOTENT else 0
+        hdrs = {"Host": orig_host, "Connection": "keep-alive"}
+        hdrs.update(headers or {})
+        if body is not None and "Content-Length" not in hdrs:
+            hdrs["Content-Length"] = str(len(body))
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            resp = None
             try:
-                with open(DATA_FILE, "r") as f:
-                    data = json.load(f)
-                    self.accounts = data.get("accounts", {})
-            except Exception:
-                pass
-
-    def save_data(self):
-        try:
-            data = {}
-            if os.path.exists(DATA_FILE):
-                with open(DATA_FILE, "r") as f:
-                    data = json.load(f)
-            data["accounts"] = self.accounts
-            with open(DATA_FILE, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception:
-            pass
-
-    def add_account(self, name, cookie):
-        user_info = self.verify_cookie(cookie)
-        if user_info:
-            self.accounts[name] = {
-                "cookie": cookie,
-                "user_id": user_info.get("id"),
-                "username": user_info.get("name", "Unknown"),
-                "display_name": user_info.get("displayName", "Unknown"),
-            }
-            self.save_data()
-            return user_info
-        return None
-
-    def remove_account(self, name):
-        if name in self.accounts:
-            del self.accounts[name]
-            self.save_data()
-            return True
-        return False
-
-    def set_default_server(self, name, server_key):
-        """Set the default server for an account. None or '' for public."""
-        if name in self.accounts:
-            self.accounts[name]["default_server"] = server_key or ""
-            self.save_data()
-            return True
-        return False
+                conn.request(method, path, body=body, headers=hdrs)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.HTTPException, OSError) as ex:
+                conn.close()
+                if reused and resp is None and isinstance(ex, self.STALE_ERRORS):
+                    continue  # Server dropped an idle keep-alive connection - retry on a fresh one
+                if attempt >= retries:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+                continue
+            with self._lock:
+                self.stats["requests"] += 1
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            if resp.status in self.RETRY_STATUSES and attempt < retries:
+                attempt += 1
+                with self._lock:
+                    self.stats["retries"] += 1
+                retry_after = resp.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * (2 ** (attempt - 1))
+                time.sleep(min(delay, 10))
+                continue
+            return HttpResponse(resp.status, resp.headers, data)
 
-    def get_default_server(self, name):
-        """Get the default server key for an account."""
-        if name in self.accounts:
-            return self.accounts[name].get("default_server", "")
-        return ""
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for idle in pools.values():
+            for conn, _ in idle:
+                conn.close()
 
-    def verify_cookie(self, cookie):
-        ctx = ssl.create_default_context()
-        req = urllib.request.Request(
-            "https://users.roblox.com/v1/users/authenticated",
-            headers={"Cookie": f".ROBLOSECURITY={cookie}"},
-        )
-        try:
-            resp = urllib.request.urlopen(req, context=ctx, timeout=10)
-            return json.loads(resp.read().decode())
-        except Exception:
-            return None
 
-    def get_cookie(self, name):
-        acc = self.accounts.get(name)
-        return acc["cookie"] if acc else None
+http_client = RobloxHttpClient()
 
-    def get_auth_ticket(self, cookie):
-        csrf = self._get_csrf(cookie)
-        if not csrf:
-            return None
-        ctx = ssl.create_default_context()
-        req = urllib.request.Request(
-            "https://auth.roblox.com/v1/authentication-ticket",
-            method="POST",
-            headers={
-                "Cookie": f".ROBLOSECURITY={cookie}",
-                "x-csrf-token": csrf,
-                "Content-Type": "application/json",
-                "Referer": "https://www.roblox.com/",
-            },
-            data=b"",
-        )
-        try:
-            resp = urllib.request.urlopen(req, context=ctx, timeout=10)
-            return resp.headers.get("rbx-authentication-ticket")
-        except urllib.error.HTTPError as e:
-            ticket = e.headers.get("rbx-authentication-ticket")
-            return ticket if ticket else None
-        except Exception:
-            return None
 
-    def _get_csrf(self, cookie):
-        ctx = ssl.create_default_context()
-        req = urllib.request.Request(
-            "https://auth.roblox.com/v2/logout",
-            method="POST",
-            headers={"Cookie": f".ROBLOSECURITY={cookie}", "Content-Type": "application/json"},
-            data=b"",
-        )
-        try:
-            urllib.request.urlopen(req, context=ctx, timeout=10)
-        except urllib.error.HTTPError as e:
-            return e.headers.get("x-csrf-token")
-        except Exception:
-            pass
-        return None
+# ============================================================================
+# ROBLOX CLIENT RESOLVER (cached RobloxPlayerBeta.exe lookup)
+# ============================================================================
 
-    def _roblox_post(self, cookie, url, body):
-        print(f"[POST] Getting CSRF token...")
-        csrf = self._get_csrf(cookie)
-        if not csrf:
-            return {"error": "Failed to get CSRF token"}
-        print(f"[POST] CSRF: {csrf[:10]}...")
-        ctx = ssl.create_default_context()
-        data = json.dumps(body).encode("utf-8")
-        print(f"[POST] Sending to {url}")
-        print(f"[POST] Body: {data.decode()}")
-        req = urllib.request.Request(
-            url, method="POST",
-            headers={
-                "Cookie": f".ROBLOSECURITY={cookie}",
-                "Content-Type": "application/json;charset=UTF-8",
-                "x-csrf-token": csrf,
-                "Origin": "https://www.roblox.com",
-                "Referer": "https://www.roblox.com/",
-            },
-            data=data,
-        )
-        try:
-            resp = urllib.request.urlopen(req, context=ctx, timeout=15)
-            resp_body = resp.read().decode()
-            print(f"[POST] Response: HTTP {resp.status}, body={resp_body[:200]}")
+class RobloxPathResolver:
+    """Find RobloxPlayerBeta.exe using the same method as Roblox Account Manager:
+    query clientsettings.roblox.com for the current clientVersionUpload, then look
+    for that exact version folder on disk (newest folder as fallback).
+    The result is cached in memory and in the data file under "roblox_client",
+    keyed by client version. A cached path stays valid while the Versions
+    directories' mtimes are unchanged (an update adds a folder, which bumps
+    them); the version check itself runs in the background, never on launch.
+    A miss is cached too, for `miss_ttl` seconds or until the mtimes change."""
+
+    def __init__(self, versions_dirs=None, refresh_interval=900, miss_ttl=60):
+        if versions_dirs is None:
+            versions_dirs = [
+                os.path.join(os.environ.get("LOCALAPPDATA", ""), "Roblox", "Versions"),
+                os.path.join(os.environ.get("PROGRAMFILES(X86)", ""), "Roblox", "Versions"),
+                os.path.join(os.environ.get("PROGRAMFILES", ""), "Roblox", "Versions"),
+            ] if IS_WINDOWS else []
+        self.versions_dirs = versions_dirs
+        self.refresh_interval = refresh_interval
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.cached = store.get("roblox_client", default={}) or {}  # {version, path, dirs_mtime, checked_at}
+        self.stats = {"hits": 0, "rescans": 0, "refreshes": 0}
+
+    def _signature(self):
+        sig = {}
+        for d in self.versions_dirs:
             try:
-                parsed = json.loads(resp_body) if resp_body.strip() else {}
-            except (json.JSONDecodeError, ValueError):
-                parsed = resp_body
-            return {"status": resp.status, "body": parsed}
-        except urllib.error.HTTPError as e:
-            body_text = ""
-            try:
-                body_text = e.read().decode() if e.fp else ""
-            except Exception:
+                sig[d] = os.path.getmtime(d)
+            except OSError:
                 pass
-            print(f"[POST] HTTP Error: {e.code}, body={body_text[:200]}")
-            return {"status": e.code, "body": body_text, "error": f"HTTP {e.code}"}
-        except Exception as ex:
-            print(f"[POST] Exception: {ex}")
-            return {"error": str(ex)}
-
-    def find_roblox_path(self):
-        """Find RobloxPlayerBeta.exe using the same method as Roblox Account Manager:
-        Query clientsettings.roblox.com for the current clientVersionUpload,
-        then look for that exact version folder on disk."""
-        if not IS_WINDOWS:
-            return None
-
-        # Step 1: Query Roblox API for the current version (same as RAM)
-        api_version = None
+        return sig
+
+    def get(self):
+        """Return the cached exe path, rescanning disk only if a Versions dir changed."""
+        with self._lock:
+            cached = dict(self.cached)
+        path = cached.get("path")
+        if cached and cached.get("dirs_mtime") == self._signature():
+            if path and os.path.exists(path):
+                self.stats["hits"] += 1
+                return path
+            if not path and time.time() - cached.get("checked_at", 0) < self.miss_ttl:
+                self.stats["hits"] += 1
+                return None
+        # Install changed (or nothing cached yet): rescan disk for the last known version, no network
+        self.stats["rescans"] += 1
+        path, version = self._locate(cached.get("version"))
+        self._remember(version, path)
+        self.refresh_async()
+        return path
+
+    def _query_version(self):
         try:
-            ctx = ssl.create_default_context()
-            req = urllib.request.Request(
-                "https://clientsettings.roblox.com/v1/client-version/WindowsPlayer",
+            resp = http_client.request(
+                "GET", "https://clientsettings.roblox.com/v1/client-version/WindowsPlayer",
                 headers={"User-Agent": "Mozilla/5.0"},
             )
-            resp = urllib.request.urlopen(req, context=ctx, timeout=10)
-            data = json.loads(resp.read().decode())
-            api_version = data.get("clientVersionUpload", "")  # e.g. "version-db4634f0e27d4d36"
+            data = resp.json() if resp.status == 200 else {}
+            return data.get("clientVersionUpload", "") or None  # e.g. "version-db4634f0e27d4d36"
         except Exception:
-            pass
-
-        versions_dirs = [
-            os.path.join(os.environ.get("LOCALAPPDATA", ""), "Roblox", "Versions"),
-            os.path.join(os.environ.get("PROGRAMFILES(X86)", ""), "Roblox", "Versions"),
-            os.path.join(os.environ.get("PROGRAMFILES", ""), "Roblox", "Versions"),
-        ]
+            return None
 
-        # Step 2: If we got a version from the API, use that exact folder
-        if api_version:
-            for versions_dir in versions_dirs:
-                exe = os.path.join(versions_dir, api_version, "RobloxPlayerBeta.exe")
+    def _locate(self, version):
+        """Returns (exe_path, version) for the exact version folder, else the newest one."""
+        if version:
+            for versions_dir in self.versions_dirs:
+                exe = os.path.join(versions_dir, version, "RobloxPlayerBeta.exe")
                 if os.path.exists(exe):
-                    return exe
+                    return exe, version
 
-        # Step 3: Fallback - pick the version folder with the newest directory mtime
+        # Fallback - pick the version folder with the newest directory mtime
         candidates = []
-        for versions_dir in versions_dirs:
+        for versions_dir in self.versions_dirs:
             if not os.path.exists(versions_dir):
                 continue
             for vf in os.listdir(versions_dir):
@@ -881,134 +1433,1160 @@ class AccountManager:
                 if os.path.exists(exe):
                     try:
                         mtime = os.path.getmtime(folder)
-                        candidates.append((mtime, exe))
+                        candidates.append((mtime, exe, vf))
                     except OSError:
-                        candidates.append((0, exe))
+                        candidates.append((0, exe, vf))
         if not candidates:
-            return None
+            return None, version
         candidates.sort(reverse=True)
-        return candidates[0][1]
+        return candidates[0][1], candidates[0][2]
+
+    def _remember(self, version, path):
+        entry = {"version": version, "path": path, "dirs_mtime": self._signature(), "checked_at": time.time()}
+        with self._lock:
+            changed = (entry["version"], entry["path"]) != (self.cached.get("version"), self.cached.get("path"))
+            moved = changed or entry["dirs_mtime"] != self.cached.get("dirs_mtime")
+            self.cached = entry
+        if moved:
+            store.set("roblox_client", entry)
+        if changed and path:
+            activity.log(f"Using {version}: {path}", "info", tag="CLIENT")
+
+    def refresh(self):
+        """Ask Roblox for the current client version and re-resolve the path."""
+        if not self.versions_dirs:
+            return None
+        self.stats["refreshes"] += 1
+        version = self._query_version() or self.cached.get("version")
+        path, version = self._locate(version)
+        self._remember(version, path)
+        return path
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing or not self.versions_dirs:
+                return
+            self._refreshing = True
 
-    def launch_instance(self, account_name, server_key=None, place_id=None):
-        cookie = self.get_cookie(account_name)
-        if not cookie:
-            return {"error": f"Account '{account_name}' not found"}
-        ticket = self.get_auth_ticket(cookie)
-        if not ticket:
-            return {"error": "Failed to get auth ticket"}
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+        threading.Thread(target=run, daemon=True).start()
+
+    def preload(self):
+        """Resolve at startup and keep the version fresh in the background."""
+        if not self.versions_dirs:
+            return
 
-        place_id = place_id or PLACE_ID
-        launch_time = int(time.time() * 1000)
-        browser_tracker_id = str(random.randint(100000, 130000)) + str(random.randint(100000, 900000))
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as ex:
+                    activity.log(f"Version refresh failed: {ex}", "warn", tag="CLIENT")
+                time.sleep(self.refresh_interval)
+        threading.Thread(target=loop, daemon=True, name="client-resolver").start()
 
-        if server_key and server_key in SERVERS:
-            srv = SERVERS[server_key]
-            link_code = srv.get("link_code", "")
-            if not link_code:
-                return {"error": f"No link_code for server '{server_key}'. Edit the server and add the privateServerLinkCode."}
-            place_id = place_id or srv.get("place_id") or PLACE_ID
-            # URL-encode the placelauncherurl the same way RAM does (HttpUtility.UrlEncode)
-            place_launcher = urllib.parse.quote(
-                f"https://assetgame.roblox.com/game/PlaceLauncher.ashx"
-                f"?request=RequestPrivateGame&placeId={place_id}&accessCode=&linkCode={link_code}",
-                safe="",
-            )
-            launch_url = (
-                f"roblox-player:1+launchmode:play+gameinfo:{ticket}+launchtime:{launch_time}"
-                f"+placelauncherurl:{place_launcher}"
-                f"+browsertrackerid:{browser_tracker_id}+robloxLocale:en_us+gameLocale:en_us+channel:+LaunchExp:InApp"
-            )
-        else:
-            place_launcher = urllib.parse.quote(
-                f"https://assetgame.roblox.com/game/PlaceLauncher.ashx"
-                f"?request=RequestGame&browserTrackerId={browser_tracker_id}&placeId={place_id}",
-                safe="",
-            )
-            launch_url = (
-                f"roblox-player:1+launchmode:play+gameinfo:{ticket}+launchtime:{launch_time}"
-                f"+placelauncherurl:{place_launcher}"
-                f"+browsertrackerid:{browser_tracker_id}+robloxLocale:en_us+gameLocale:en_us+channel:+LaunchExp:InApp"
-            )
 
-        # Clean any singleton handles from existing Roblox processes
-        for p in psutil.process_iter(["pid", "name"]):
-            try:
-                if p.info["name"] and "RobloxPlayerBeta" in p.info["name"]:
-                    close_singleton_from_process(p.info["pid"])
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        time.sleep(0.3)
+roblox_resolver = RobloxPathResolver()
 
-        # Get PIDs of ALL currently running Roblox processes BEFORE we launch
-        pids_before = set()
-        for p in psutil.process_iter(["pid", "name"]):
-            try:
-                if p.info["name"] and "RobloxPlayerBeta" in p.info["name"]:
-                    pids_before.add(p.info["pid"])
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
 
-        try:
-            # Launch via shell execute with roblox-player: protocol URI
-            if IS_WINDOWS:
-                os.startfile(launch_url)
-            else:
-                subprocess.Popen(["xdg-open", launch_url])
-
-            # Store initial instance info
-            self.instances[account_name] = {"pid": 0, "server_key": server_key, "launched_at": time.time()}
-
-            # Wait for new Roblox process to appear, then track its PID
-            def track_real_pid():
-                # Wait for Roblox to start (bootstrapper â†’ actual game)
-                for attempt in range(20):  # Try for up to 20 seconds
-                    time.sleep(1)
-                    # Find NEW Roblox processes that weren't running before
-                    for p in psutil.process_iter(["pid", "name", "create_time"]):
-                        try:
-                            if (p.info["name"] and "RobloxPlayerBeta" in p.info["name"]
-                                    and p.info["pid"] not in pids_before):
-                                # Found a new process! Check if it's already tracked by another account
-                                already_tracked = False
-                                for other_name, other_inst in self.instances.items():
-                                    if other_name != account_name and other_inst.get("pid") == p.info["pid"]:
-                                        already_tracked = True
-                                        break
-                                if not already_tracked:
-                                    self.instances[account_name]["pid"] = p.info["pid"]
-                                    print(f"[PID] {account_name}: tracked PID {p.info['pid']}")
-                                    close_singleton_from_process(p.info["pid"])
-                                    # Add to pids_before so other concurrent launches don't grab it
-                                    pids_before.add(p.info["pid"])
-                                    return
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                print(f"[PID] {account_name}: could not find new Roblox process after 20s")
-
-            threading.Thread(target=track_real_pid, daemon=True).start()
-
-            return {"success": True, "pid": 0, "account": account_name, "server": server_key}
-        except Exception as e:
-            return {"error": f"Launch failed: {e}"}
+# ============================================================================
+# PRIVATE SERVER DIRECTORY (cached privateServerId resolution)
+# ============================================================================
 
-    def _find_new_roblox_pid(self, exclude_pids, after_timestamp=None):
-        """Find a RobloxPlayerBeta PID that wasn't in the exclude set.
-        If after_timestamp is provided, prefer processes created after that time."""
-        candidates = []
-        for p in psutil.process_iter(["pid", "name", "create_time"]):
-            try:
-                if (p.info["name"] and "RobloxPlayerBeta" in p.info["name"]
-                        and p.info["pid"] not in exclude_pids):
-                    candidates.append((p.info["pid"], p.info.get("create_time", 0)))
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+class PrivateServerDirectory:
+    """Place-level cache of the private-servers listing: accessCode -> vipServerId
+    and name -> vipServerId. One paginated listing (nextPageCursor) resolves every
+    server in SERVERS on that place. Persisted under "private_servers" in the data
+    file and refreshed in the background once older than `ttl`."""
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        # {place_id (str): {"servers": [{vipServerId, name, accessCode}], "fetched_at": ts}}
+        self.places = store.get("private_servers", default={}) or {}
+        self.stats = {"lookups": 0, "fetches": 0, "pages": 0}
+
+    def fetch(self, cookie, place_id):
+        """List every private server of a place (all pages) and update the cache."""
+        base = f"https://games.roblox.com/v1/games/{place_id}/private-servers?limit=100"
+        servers, cursor = [], None
+        for _ in range(100):
+            url = base + (f"&cursor={urllib.parse.quote(cursor)}" if cursor else "")
+            resp = http_client.request("GET", url, headers={
+                "Cookie": f".ROBLOSECURITY={cookie}",
+                "User-Agent": "Mozilla/5.0",
+            })
+            if resp.status != 200:
+                raise urllib.error.HTTPError(url, resp.status, f"HTTP {resp.status}", resp.headers, None)
+            data = resp.json()
+            self.stats["pages"] += 1
+            servers.extend({"vipServerId": srv.get("vipServerId"), "name": srv.get("name", ""),
+                            "accessCode": srv.get("accessCode", "")} for srv in data.get("data", []))
+            cursor = data.get("nextPageCursor")
+            if not cursor:
+                break
+        entry = {"servers": servers, "fetched_at": time.time()}
+        with self._lock:
+            self.places[str(place_id)] = entry
+        self.stats["fetches"] += 1
+        store.set(("private_servers", str(place_id)), entry)
+        activity.log(f"private-servers for place {place_id}: {len(servers)} server(s)", "info", tag="SERVERS")
+        self._populate(place_id)
+        return servers
+
+    def _populate(self, place_id):
+        """Fill/refresh server_id for every configured server on this place. An
+        accessCode match may correct a stored id; an exact-name match only fills
+        a missing one, since server names aren't unique."""
+        changed = False
+        for key, srv in list(SERVERS.items()):
+            if str(srv.get("place_id") or PLACE_ID) != str(place_id):
                 continue
-        
-        if not candidates:
+            vid = self.lookup(place_id, srv.get("link_code"), strict=True)
+            if not vid and not srv.get("server_id"):
+                vid = self.lookup(place_id, server_name=srv.get("name"), strict=True)
+            if vid and srv.get("server_id") != vid:
+                activity.log(f"{key}: server_id {srv.get('server_id')} â†’ {vid}", "info", tag="SERVERS")
+                srv["server_id"] = vid
+                changed = True
+        if changed:
+            save_servers()
+
+    def lookup(self, place_id, link_code=None, server_name=None, strict=False):
+        """Resolve from cache only. Matches by accessCode, then name; unless strict,
+        also tries a partial name match and falls back to the only (or first)
+        server. Returns None if nothing cached."""
+        with self._lock:
+            entry = self.places.get(str(place_id))
+        if not entry:
             return None
-        
-        # If we have a timestamp, prefer processes created after it
-        if after_timestamp:
-            newer = [(pid, ct) for pid, ct in candidates if ct >= after_timestamp]
+        self.stats["lookups"] += 1
+        servers = entry["servers"]
+        # 1) Match by link_code against accessCode
+        if link_code:
+            for srv in servers:
+                if srv.get("accessCode", "") == link_code:
+                    return srv.get("vipServerId")
+        # 2) Match by server name (exact; partial only when not strict)
+        if server_name:
+            name_lower = server_name.lower()
+            for srv in servers:
+                if srv.get("name", "").lower() == name_lower:
+                    return srv.get("vipServerId")
+        if strict:
+            return None
+        if server_name:
+            for srv in servers:
+                if name_lower in srv.get("name", "").lower():
+                    return srv.get("vipServerId")
+        # 3) If only one server, use it
+        if len(servers) == 1:
+            return servers[0].get("vipServerId")
+        # 4) Could not auto-match â€” return first one but warn
+        if servers:
+            vid = servers[0].get("vipServerId")
+            activity.log(f"Could not auto-match {server_name!r}, using first server â†’ vipServerId={vid}", "warn", tag="SERVERS")
+            activity.log(f"TIP: Set 'server_id' in your server config to the correct vipServerId", "warn", tag="SERVERS")
+            return vid
+        return None
+
+    def is_fresh(self, place_id):
+        entry = self.places.get(str(place_id))
+        return bool(entry) and time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def refresh_async(self, cookie, place_id):
+        key = str(place_id)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.fetch(cookie, place_id)
+            except Exception as ex:
+                activity.log(f"private-servers refresh for place {place_id} failed: {ex}", "warn", tag="SERVERS")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        threading.Thread(target=run, daemon=True).start()
+
+    def resolve(self, cookie, place_id, link_code=None, server_name=None):
+        """Cached lookup; only blocks on a listing when nothing is cached for the place."""
+        if str(place_id) not in self.places:
+            try:
+                self.fetch(cookie, place_id)
+            except Exception as ex:
+                activity.log(f"private-servers error: {ex}", "warn", tag="SERVERS")
+                return None
+        elif not self.is_fresh(place_id):
+            self.refresh_async(cookie, place_id)
+        return self.lookup(place_id, link_code, server_name)
+
+    def start(self, cookie_provider):
+        """Keep every configured place fresh in the background.
+        cookie_provider() returns a cookie to list with (or None to skip)."""
+        def loop():
+            while True:
+                cookie = cookie_provider()
+                if cookie:
+                    for place_id in {srv.get("place_id") or PLACE_ID for srv in list(SERVERS.values())}:
+                        if not self.is_fresh(place_id):
+                            try:
+                                self.fetch(cookie, place_id)
+                            except Exception as ex:
+                                activity.log(f"private-servers refresh for place {place_id} failed: {ex}", "warn", tag="SERVERS")
+                time.sleep(min(self.ttl, 300))
+        threading.Thread(target=loop, daemon=True, name="private-servers").start()
+
+
+private_servers = PrivateServerDirectory()
+
+
+# ============================================================================
+# PRESENCE INDEX (incremental, fed by heartbeats)
+# ============================================================================
+
+class PresenceIndex:
+    """Maintained server -> {player_lc: last_seen} index.
+    Each reporter's latest player list is reference-counted per server so a
+    player disappears as soon as no reporter lists them anymore. Old reporters
+    and sightings are expired lazily from a time-ordered heap, so nothing is
+    rescanned per heartbeat. Account lookups go through precomputed lowercased
+    username/display_name keys."""
+
+    def __init__(self, retention=300):
+        self.retention = retention
+        self._lock = threading.Lock()
+        self.servers = {}       # {server: {player_lc: last_seen}}
+        self.listed = {}        # {server: {player_lc: number of reporters listing them}}
+        self.server_seen = {}   # {server: last heartbeat time}
+        self.reporters = {}     # {reporter: (server, frozenset(player_lc), timestamp)}
+        self.account_keys = {}  # {account_name: (username_lc, display_lc)}
+        self._heap = []         # (expires_at, kind, server, key) - kind 0 = player, 1 = reporter
+        self._queued = set()    # (kind, server, key) entries currently in the heap
+        self.version = 0        # Bumped whenever who-is-listed-where or the account list changes (not on re-stamps)
+
+    def set_accounts(self, accounts):
+        keys = {name: (acc.get("username", "").lower(), acc.get("display_name", "").lower())
+                for name, acc in accounts.items()}
+        with self._lock:
+            if keys != self.account_keys:
+                self.account_keys = keys
+                self.version += 1  # present/missing answers depend on the account list
+
+    def update(self, reporter, server, players, now):
+        self.update_many([reporter], server, players, now)
+
+    def update_many(self, reporters, server, players, now):
+        """Apply one player list reported by several reporters (same server snapshot).
+        Sightings are stamped once; only the per-reporter refcounts are touched per reporter."""
+        lc = frozenset(p.lower() for p in players)
+        with self._lock:
+            seen = self.servers.setdefault(server, {})
+            counts = self.listed.setdefault(server, {})
+            for reporter in reporters:
+                prev = self.reporters.get(reporter)
+                if prev:
+                    removed = prev[1] - lc if prev[0] == server else prev[1]
+                    self._unlist(prev[0], removed)
+                    added = lc - prev[1] if prev[0] == server else lc
+                else:
+                    removed, added = (), lc
+                if added or removed or not prev:
+                    self.version += 1
+                for p in added:
+                    counts[p] = counts.get(p, 0) + 1
+                self._schedule(now, 1, server, reporter)
+                self.reporters[reporter] = (server, lc, now)
+            for p in lc:
+                seen[p] = now
+                self._schedule(now, 0, server, p)
+            self.server_seen[server] = now
+            self._expire(now)
+
+    def _schedule(self, now, kind, server, key):
+        # At most one heap entry per player/reporter; fresher sightings re-arm it on pop
+        if (kind, server, key) not in self._queued:
+            self._queued.add((kind, server, key))
+            heapq.heappush(self._heap, (now + self.retention, kind, server, key))
+
+    def _unlist(self, server, players):
+        counts = self.listed.get(server, {})
+        seen = self.servers.get(server, {})
+        for p in players:
+            n = counts.get(p, 0) - 1
+            if n > 0:
+                counts[p] = n
+            else:
+                counts.pop(p, None)
+                seen.pop(p, None)
+
+    def _expire(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, kind, server, key = heapq.heappop(heap)
+            if kind == 0:
+                last = self.servers.get(server, {}).get(key)
+                if last is not None and last + self.retention > now:
+                    heapq.heappush(heap, (last + self.retention, 0, server, key))
+                    continue
+                if last is not None:
+                    self.servers[server].pop(key, None)
+                    self.version += 1
+            else:
+                rep = self.reporters.get(key)
+                if rep is not None and rep[0] == server and rep[2] + self.retention > now:
+                    heapq.heappush(heap, (rep[2] + self.retention, 1, server, key))
+                    continue
+                if rep is not None and rep[0] == server:
+                    del self.reporters[key]
+                    self._unlist(rep[0], rep[1])
+                    self.version += 1
+            self._queued.discard((kind, server, key))
+
+    def clear(self, server=None, reporter=None):
+        with self._lock:
+            self.version += 1
+            emptied = set()
+            for r, (srv, lc, _) in list(self.reporters.items()):
+                if reporter is not None and r != reporter:
+                    continue
+                if server is not None and srv != server:
+                    continue
+                del self.reporters[r]
+                self._unlist(srv, lc)
+                emptied.add(srv)
+            if server is not None and reporter is None:
+                emptied.add(server)
+            # A server nobody reports from anymore has no heartbeat to go stale
+            emptied -= {rep[0] for rep in self.reporters.values()}
+            for srv in emptied:
+                self.servers.pop(srv, None)
+                self.listed.pop(srv, None)
+                self.server_seen.pop(srv, None)
+
+    def rebuild(self, reports):
+        """Seed the index from a {reporter: report} dict (e.g. reloaded from SQLite)."""
+        for reporter, rep in sorted(reports.items(), key=lambda kv: kv[1]["timestamp"]):
+            self.update(reporter, rep.get("server", ""), rep.get("players", []), rep["timestamp"])
+
+    def presence(self, server, max_age, now=None):
+        """Returns (have_report, players_in_server, present account names, missing account names)."""
+        now = now or time.time()
+        cutoff = now - max_age
+        with self._lock:
+            self._expire(now)
+            if self.server_seen.get(server, 0) < cutoff:
+                return False, [], [], []
+            seen = self.servers.get(server, {})
+            present, missing = [], []
+            for name, (u, d) in self.account_keys.items():
+                if seen.get(u, 0) >= cutoff or seen.get(d, 0) >= cutoff:
+                    present.append(name)
+                else:
+                    missing.append(name)
+            players = [p for p, ts in seen.items() if ts >= cutoff]
+        return True, players, present, missing
+
+
+# ============================================================================
+# EVENT BUS (instance / heartbeat / launch / restart deltas for clients)
+# ============================================================================
+
+class EventBus:
+    """In-process publish/subscribe with a bounded replay buffer.
+    Every event gets an increasing id; clients resume from the last id they saw
+    (SSE Last-Event-ID or ?since=). If the id has already fallen out of the
+    buffer the reply says reset=True and the client should re-read /status."""
+
+    def __init__(self, maxlen=EVENT_BUFFER):
+        self._cond = threading.Condition()
+        self._buf = deque(maxlen=maxlen)
+        self._seq = 0
+        self._listeners = []
+        self.streams = 0
+        self.polls = 0
+
+    @property
+    def version(self):
+        return self._seq
+
+    def subscribe(self, fn):
+        """fn(event) for every event, called on the publishing thread."""
+        self._listeners.append(fn)
+
+    def publish(self, etype, **data):
+        with self._cond:
+            self._seq += 1
+            event = {"id": self._seq, "type": etype, "ts": time.time(), "data": data}
+            self._buf.append(event)
+            self._cond.notify_all()
+        for fn in list(self._listeners):
+            try:
+                fn(event)
+            except Exception:
+                pass
+        return event
+
+    def _after(self, cursor, types):
+        # Cursor from before the buffer (or from a previous manager run): client must resync
+        reset = cursor > self._seq or (bool(self._buf) and cursor < self._buf[0]["id"] - 1)
+        out = [e for e in self._buf if e["id"] > cursor and (not types or e["type"] in types)]
+        return out, reset
+
+    def since(self, cursor, types=None):
+        """(events after cursor, reset) without blocking."""
+        with self._cond:
+            return self._after(cursor, types)
+
+    def wait(self, cursor, timeout, types=None):
+        """Block until there are events after cursor (or timeout). Returns (events, reset, cursor)."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                events, reset = self._after(cursor, types)
+                if events or reset:
+                    return events, reset, self._seq
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return [], False, self._seq
+                # Only wake on new ids; the filtered view may still be empty
+                self._cond.wait(remaining)
+
+
+events = EventBus()
+
+
+def _publish_log(entry):
+    # Debug lines (one per heartbeat) would flood the bus and push real events out
+    # of the resume buffer; they stay readable through GET /logs
+    if activity.LEVELS.get(entry["level"], 20) > activity.LEVELS["debug"]:
+        events.publish("log", seq=entry["seq"], text=entry["text"], level=entry["level"], tag=entry["tag"])
+
+
+activity.subscribe(_publish_log)
+
+
+# ============================================================================
+# PROCESS REGISTRY (one snapshot loop for every Roblox process)
+# ============================================================================
+
+class ProcessRegistry:
+    """Background snapshot of RobloxPlayerBeta processes.
+    Keeps {pid: create_time} and {pid: account}. New PIDs are assigned to
+    pending launches in FIFO order (oldest launch gets the oldest new process),
+    and exits are published to subscribers as ("exit", pid, account).
+    Everything else reads the tables instead of walking the process table."""
+
+    def __init__(self, name_fragment="RobloxPlayerBeta", interval=1.0, idle_interval=3.0,
+                 claim_timeout=20.0):
+        self.name_fragment = name_fragment
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.claim_timeout = claim_timeout
+        self._lock = threading.Lock()
+        self._spawn_lock = threading.RLock()  # held by a scan and by direct spawns until their claim
+        self._wake = threading.Event()
+        self.procs = {}           # {pid: create_time}
+        self.owners = {}          # {pid: account}
+        self.adopted = {}         # {pid: create_time} started by us, tracked whatever the process is called
+        self._claimed = {}        # {pid: create_time} claimed since the running scan took its snapshot
+        self.pending = deque()    # [(account, requested_at, on_claim)]
+        self._listeners = []
+        self._thread = None
+
+    def start(self):
+        if self._thread:
+            return
+        self.scan()
+        self.subscribe(self._log_event)
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="proc-registry")
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval if self.pending else self.idle_interval)
+            self._wake.clear()
+            try:
+                self.scan()
+            except Exception as ex:
+                activity.log(f"Registry scan failed: {ex}", "error", tag="PID")
+
+    @staticmethod
+    def _log_event(event, pid, account):
+        if event == "exit" and account:
+            activity.log(f"{account}: process {pid} exited", "info", tag="PID")
+        elif event == "claim_timeout":
+            activity.log(f"{account}: could not find new Roblox process after launch", "warn", tag="PID")
+
+    def subscribe(self, fn):
+        """fn(event, pid, account) for "claim", "exit" and "claim_timeout" events."""
+        self._listeners.append(fn)
+
+    def _publish(self, events):
+        for event in events:
+            for fn in list(self._listeners):
+                try:
+                    fn(*event)
+                except Exception:
+                    pass
+
+    def scan(self):
+        with self._spawn_lock:
+            claims, events = self._scan()
+        for on_claim, pid in claims:
+            if on_claim:
+                try:
+                    on_claim(pid)
+                except Exception:
+                    pass
+        self._publish(events)
+
+    def _scan(self):
+        current = {}
+        with self._lock:
+            adopted = dict(self.adopted)
+            self._claimed = {}
+        for p in psutil.process_iter(["pid", "name", "create_time"]):
+            try:
+                pid = p.info["pid"]
+                if pid in adopted:
+                    # Our own children linger as zombies until reaped - that's an exit
+                    if adopted[pid] == p.info["create_time"] and p.status() != psutil.STATUS_ZOMBIE:
+                        current[pid] = p.info["create_time"] or 0
+                elif p.info["name"] and self.name_fragment in p.info["name"]:
+                    current[pid] = p.info["create_time"] or 0
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        events, claims = [], []
+        now = time.time()
+        with self._lock:
+            # A claim that raced the walk is trusted until the next scan checks it
+            for pid, ct in self._claimed.items():
+                current.setdefault(pid, ct)
+            for pid in adopted:
+                if pid not in current:
+                    self.adopted.pop(pid, None)
+            old = self.procs
+            new = sorted((pid for pid, ct in current.items() if old.get(pid) != ct), key=current.get)
+            for pid, ct in old.items():
+                if current.get(pid) != ct:
+                    events.append(("exit", pid, self.owners.pop(pid, None)))
+            self.procs = current
+            while self.pending and now - self.pending[0][1] > self.claim_timeout:
+                account, _, _ = self.pending.popleft()
+                events.append(("claim_timeout", 0, account))
+            for pid in new:
+                if pid in self.owners or not self.pending:
+                    continue
+                account, requested_at, on_claim = self.pending.popleft()
+                self.owners[pid] = account
+                claims.append((on_claim, pid))
+                events.append(("claim", pid, account))
+        return claims, events
+
+    def spawning(self):
+        """Hold (as a context manager) from starting a client until its claim():
+        scans wait meanwhile, so the new PID can't go to a pending expect()."""
+        return self._spawn_lock
+
+    def expect(self, account, on_claim=None):
+        """Register a launch in progress; the next unowned new process is assigned to it."""
+        with self._lock:
+            self.pending = deque(p for p in self.pending if p[0] != account)
+            self.pending.append((account, time.time(), on_claim))
+        self._wake.set()
+
+    def claim(self, pid, account, adopt=False):
+        """Directly assign a known PID (e.g. restored or spawned by us) to an account.
+        adopt=True tracks it even if it isn't named like a Roblox client (launcher backends)."""
+        with self._lock:
+            self.owners[pid] = account
+            if pid not in self.procs:
+                try:
+                    p = psutil.Process(pid)
+                    if not adopt and self.name_fragment not in p.name():
+                        raise psutil.NoSuchProcess(pid)
+                    self.procs[pid] = p.create_time()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    self.owners.pop(pid, None)
+                    return False
+            self._claimed[pid] = self.procs[pid]
+            if adopt:
+                self.adopted[pid] = self.procs[pid]
+        return True
+
+    def release(self, account):
+        """Forget pending launches and PID ownership for an account."""
+        with self._lock:
+            self.pending = deque(p for p in self.pending if p[0] != account)
+            for pid in [pid for pid, a in self.owners.items() if a == account]:
+                del self.owners[pid]
+
+    def is_alive(self, pid):
+        return bool(pid) and pid in self.procs
+
+    def is_pending(self, account):
+        return any(p[0] == account for p in list(self.pending))
+
+    def pids(self, fresh=False):
+        """Tracked PIDs. fresh=True rescans first - for kills and sweeps that must also
+        catch a client started since the last (up to idle_interval old) snapshot."""
+        if fresh:
+            self.scan()
+        return list(self.procs)
+
+    def owner(self, pid):
+        return self.owners.get(pid)
+
+    def unattributed(self, fresh=False):
+        if fresh:
+            self.scan()
+        with self._lock:
+            return [pid for pid in self.procs if pid not in self.owners]
+
+    def kill(self, pid):
+        """Kill a tracked process. Checks create_time so a recycled PID is never killed."""
+        ct = self.procs.get(pid)
+        if ct is None:
+            return False
+        try:
+            p = psutil.Process(pid)
+            if ct and abs(p.create_time() - ct) > 1:
+                return False
+            p.kill()
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+
+    def kill_many(self, pids, timeout=RESTART_KILL_TIMEOUT):
+        """Terminate several tracked processes at once and wait (bounded) for them
+        to exit; force-kill whatever is still alive after `timeout`.
+        Returns the PIDs that are gone."""
+        procs = []
+        for pid in set(pids):
+            ct = self.procs.get(pid)
+            if ct is None:
+                continue
+            try:
+                p = psutil.Process(pid)
+                if ct and abs(p.create_time() - ct) > 1:
+                    continue
+                p.terminate()
+                procs.append(p)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        if not procs:
+            return []
+        gone, alive = psutil.wait_procs(procs, timeout=timeout)
+        for p in alive:
+            try:
+                p.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        if alive:
+            more, alive = psutil.wait_procs(alive, timeout=2)
+            gone += more
+        self._wake.set()
+        return [p.pid for p in gone]
+
+
+process_registry = ProcessRegistry()
+process_registry.subscribe(lambda event, pid, account: events.publish("process", event=event, pid=pid, account=account))
+
+
+# ============================================================================
+# LAUNCH BACKENDS (how a prepared launch becomes a client process)
+# ============================================================================
+# A backend has launch(prepared) -> pid or None. A PID is adopted by the process
+# registry straight away; None means the registry assigns the next new
+# RobloxPlayerBeta process to the launch. Other backends (e.g. the fleet
+# simulator in benchmarks/fleet_sim.py) are plugged in via manager.launcher.
+
+class ShellLauncher:
+    """Starts Roblox through the roblox-player: protocol handler. The bootstrapper
+    spawns the real client, so the PID isn't known here."""
+
+    name = "shell"
+
+    def launch(self, prepared):
+        if IS_WINDOWS:
+            os.startfile(prepared["url"])
+        else:
+            subprocess.Popen(["xdg-open", prepared["url"]])
+        return None
+
+
+class DirectLauncher:
+    """Runs RobloxPlayerBeta.exe itself with the arguments the bootstrapper would
+    pass, so the PID is known immediately and concurrent launches can't swap
+    PIDs. Falls back to the protocol handler when the exe can't be found or started."""
+
+    name = "direct"
+    FLAGS = getattr(subprocess, "DETACHED_PROCESS", 0) | getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
+
+    def __init__(self):
+        self.fallback = ShellLauncher()
+
+    def launch(self, prepared):
+        exe = roblox_resolver.get()
+        if exe and prepared.get("params"):
+            try:
+                proc = subprocess.Popen(build_launch_args(exe, prepared["params"]), cwd=os.path.dirname(exe),
+                                        creationflags=self.FLAGS, close_fds=True)
+                return proc.pid
+            except OSError as ex:
+                activity.log(f"{prepared['account']}: direct launch failed ({ex}) - using the protocol handler",
+                             "warn", tag="LAUNCH")
+        else:
+            activity.log(f"{prepared['account']}: RobloxPlayerBeta.exe not found - using the protocol handler",
+                         "warn", tag="LAUNCH")
+        return self.fallback.launch(prepared)
+
+
+LAUNCHERS = {"shell": ShellLauncher, "direct": DirectLauncher}
+
+
+# ============================================================================
+# ACCOUNT MANAGER (backend logic)
+# ============================================================================
+
+def build_launch_params(ticket, place_id, link_code=None, launch_time=None, browser_tracker_id=None):
+    """What a launch needs, shared by the protocol URI and the direct command line.
+    place_launcher is the raw PlaceLauncher.ashx URL for a public game or a private server (link_code)."""
+    launch_time = launch_time or int(time.time() * 1000)
+    browser_tracker_id = browser_tracker_id or (
+        str(random.randint(100000, 130000)) + str(random.randint(100000, 900000)))
+    if link_code:
+        place_launcher = (f"https://assetgame.roblox.com/game/PlaceLauncher.ashx"
+                          f"?request=RequestPrivateGame&placeId={place_id}&accessCode=&linkCode={link_code}")
+    else:
+        place_launcher = (f"https://assetgame.roblox.com/game/PlaceLauncher.ashx"
+                          f"?request=RequestGame&browserTrackerId={browser_tracker_id}&placeId={place_id}")
+    return {"ticket": ticket, "launch_time": launch_time, "browser_tracker_id": browser_tracker_id,
+            "place_launcher": place_launcher}
+
+
+def launch_url_from_params(params):
+    # URL-encode the placelauncherurl the same way RAM does (HttpUtility.UrlEncode)
+    place_launcher = urllib.parse.quote(params["place_launcher"], safe="")
+    return (
+        f"roblox-player:1+launchmode:play+gameinfo:{params['ticket']}+launchtime:{params['launch_time']}"
+        f"+placelauncherurl:{place_launcher}"
+        f"+browsertrackerid:{params['browser_tracker_id']}+robloxLocale:en_us+gameLocale:en_us+channel:+LaunchExp:InApp"
+    )
+
+
+def build_launch_url(ticket, place_id, link_code=None, launch_time=None, browser_tracker_id=None):
+    """Build the roblox-player: protocol URI for a public game or a private server (link_code)."""
+    return launch_url_from_params(build_launch_params(ticket, place_id, link_code, launch_time, browser_tracker_id))
+
+
+def build_launch_args(exe, params):
+    """Command line RobloxPlayerBeta.exe gets from the bootstrapper for the same launch."""
+    return [exe, "--app", "-t", params["ticket"], "-j", params["place_launcher"],
+            "-b", params["browser_tracker_id"], f"--launchtime={params['launch_time']}",
+            "--rloc", "en_us", "--gloc", "en_us"]
+
+
+class AccountManager:
+    def __init__(self, use_sqlite=SQLITE_BACKEND, launcher=None):
+        mode = load_ui_settings().get("launchMode", LAUNCH_BACKEND)
+        self.launcher = launcher or LAUNCHERS.get(mode, LAUNCHERS[LAUNCH_BACKEND])()
+        self.accounts = {}
+        self.instances = {}
+        # Player reports from Lua heartbeats: {reporter_username: {players, jobId, server, timestamp}}
+        self.player_reports = {}
+        self.db = SqliteStateStore(STATE_DB_FILE) if use_sqlite else None
+        self.presence = PresenceIndex()
+        # Per-cookie CSRF tokens: {cookie: (token, fetched_at)}
+        self._csrf_tokens = {}
+        self._csrf_lock = threading.Lock()
+        self.csrf_stats = {"hits": 0, "misses": 0, "refreshes": 0}
+        self._heartbeat_listeners = []
+        self._missing_cache = {}       # {server: (presence version, computed_at, result)}
+        self._missing_sent = {}        # {reporter: (server, frozenset(missing))} last batch answer per reporter
+        self._missing_lock = threading.Lock()
+        # Bumped by the account / instance / report mutators; keys the /status and /players ETags
+        self.state_version = 0
+        self._state_lock = threading.Lock()
+        self.load_data()
+
+    def touch(self):
+        """Note that something /status or /players shows has changed."""
+        with self._state_lock:
+            self.state_version += 1
+
+    def load_data(self):
+        self.accounts = store.get("accounts", default={})
+        self.presence.set_accounts(self.accounts)
+        if self.db:
+            self.db.sync_accounts(self.accounts)
+            self.player_reports = self.db.load_reports()
+            self.presence.rebuild(self.player_reports)
+            # Re-attach to Roblox processes that outlived a manager restart
+            for name, inst in self.db.load_instances().items():
+                if name in self.accounts and inst["pid"] and psutil.pid_exists(inst["pid"]):
+                    self.instances[name] = inst
+                else:
+                    self.db.delete_instance(name)
+
+    def save_data(self):
+        store.set("accounts", self.accounts)
+        self.presence.set_accounts(self.accounts)
+        if self.db:
+            self.db.sync_accounts(self.accounts)
+        self.touch()
+
+    def set_instance(self, name, **fields):
+        """Create or update the tracked instance for an account."""
+        inst = self.instances.setdefault(name, {"pid": 0, "server_key": None, "launched_at": time.time()})
+        inst.update(fields)
+        if self.db:
+            self.db.save_instance(name, inst)
+        self.touch()
+        events.publish("instance", account=name, state="tracked", pid=inst["pid"], server=inst["server_key"])
+        return inst
+
+    def server_pids(self, server_key, accounts=None):
+        """{account: pid} for tracked instances in server_key (or for `accounts`, if given)."""
+        result = {}
+        for name, inst in list(self.instances.items()):
+            if (name in accounts) if accounts is not None else inst.get("server_key") == server_key:
+                pid = inst.get("pid") or next((p for p, a in list(process_registry.owners.items()) if a == name), 0)
+                if pid:
+                    result[name] = pid
+        return result
+
+    def subscribe_heartbeats(self, fn):
+        """fn(reporter, server, players, ts) for every heartbeat processed."""
+        self._heartbeat_listeners.append(fn)
+        return fn
+
+    def unsubscribe_heartbeats(self, fn):
+        try:
+            self._heartbeat_listeners.remove(fn)
+        except ValueError:
+            pass
+
+    def drop_instance(self, name):
+        process_registry.release(name)
+        inst = self.instances.pop(name, None)
+        if self.db and inst is not None:
+            self.db.delete_instance(name)
+        if inst is not None:
+            self.touch()
+            events.publish("instance", account=name, state="dropped", pid=inst.get("pid"),
+                           server=inst.get("server_key"))
+        return inst
+
+    def clear_reports(self, server_key=None, reporter=None):
+        """Forget the latest heartbeat(s) for a server and/or reporter."""
+        for r in list(self.player_reports.keys()):
+            rep = self.player_reports.get(r)
+            if rep is None:
+                continue
+            if reporter is not None and r != reporter:
+                continue
+            if server_key is not None and rep.get("server") != server_key:
+                continue
+            self.player_reports.pop(r, None)
+        self.presence.clear(server_key, reporter)
+        if self.db:
+            self.db.clear_reports(server_key, reporter)
+        self.touch()
+
+    def add_account(self, name, cookie):
+        user_info = self.verify_cookie(cookie)
+        if user_info:
+            self.accounts[name] = {
+                "cookie": cookie,
+                "user_id": user_info.get("id"),
+                "username": user_info.get("name", "Unknown"),
+                "display_name": user_info.get("displayName", "Unknown"),
+            }
+            store.set(("accounts", name), self.accounts[name])
+            self.presence.set_accounts(self.accounts)
+            if self.db:
+                self.db.sync_accounts(self.accounts)
+            self.touch()
+            return user_info
+        return None
+
+    def remove_account(self, name):
+        if name in self.accounts:
+            del self.accounts[name]
+            store.delete(("accounts", name))
+            self.presence.set_accounts(self.accounts)
+            if self.db:
+                self.db.sync_accounts(self.accounts)
+            self.touch()
+            return True
+        return False
+
+    def set_default_server(self, name, server_key):
+        """Set the default server for an account. None or '' for public."""
+        if name in self.accounts:
+            self.accounts[name]["default_server"] = server_key or ""
+            store.set(("accounts", name, "default_server"), server_key or "")
+            if self.db:
+                self.db.sync_accounts(self.accounts)
+            return True
+        return False
+
+    def get_default_server(self, name):
+        """Get the default server key for an account."""
+        if name in self.accounts:
+            return self.accounts[name].get("default_server", "")
+        return ""
+
+    def launch_target(self, name):
+        """Server key an account launches into by default (None = public)."""
+        srv = self.get_default_server(name)
+        return srv if srv and srv in SERVERS else None
+
+    def verify_cookie(self, cookie):
+        try:
+            resp = http_client.request(
+                "GET", "https://users.roblox.com/v1/users/authenticated",
+                headers={"Cookie": f".ROBLOSECURITY={cookie}"},
+            )
+            return resp.json() if resp.status == 200 else None
+        except Exception:
+            return None
+
+    def get_cookie(self, name):
+        acc = self.accounts.get(name)
+        return acc["cookie"] if acc else None
+
+    def get_auth_ticket(self, cookie):
+        try:
+            resp = self._csrf_request(
+                cookie, "POST", "https://auth.roblox.com/v1/authentication-ticket",
+                headers={
+                    "Cookie": f".ROBLOSECURITY={cookie}",
+                    "Content-Type": "application/json",
+                    "Referer": "https://www.roblox.com/",
+                },
+                body=b"",
+            )
+            if resp is None:
+                return None
+            return resp.headers.get("rbx-authentication-ticket") or None
+        except Exception:
+            return None
+
+    def _get_csrf(self, cookie, force=False):
+        """Return the CSRF token for a cookie, from cache unless expired or force=True.
+        A miss costs one deliberately failing POST /v2/logout."""
+        now = time.time()
+        with self._csrf_lock:
+            cached = self._csrf_tokens.get(cookie)
+            if cached and not force and now - cached[1] < CSRF_TTL:
+                self.csrf_stats["hits"] += 1
+                return cached[0]
+            self.csrf_stats["misses"] += 1
+        try:
+            resp = http_client.request(
+                "POST", "https://auth.roblox.com/v2/logout",
+                headers={"Cookie": f".ROBLOSECURITY={cookie}", "Content-Type": "application/json"},
+                body=b"", retries=http_client.retries,  # the probe is rejected by design, so safe to resend
+            )
+            if resp.status >= 400:
+                token = resp.headers.get("x-csrf-token")
+                if token:
+                    with self._csrf_lock:
+                        self._csrf_tokens[cookie] = (token, now)
+                return token
+        except Exception:
+            pass
+        return None
+
+    def _csrf_request(self, cookie, method, url, headers, body=None, timeout=None):
+        """Send a request carrying the cached CSRF token. If Roblox rejects it with
+        403, retry once with the new x-csrf-token it hands back or, if it didn't,
+        with a force-fetched one. Returns None if no token could be obtained."""
+        csrf = self._get_csrf(cookie)
+        if not csrf:
+            return None
+        resp = http_client.request(method, url, headers=dict(headers, **{"x-csrf-token": csrf}),
+                                   body=body, timeout=timeout)
+        if resp.status == 403:
+            fresh = resp.headers.get("x-csrf-token")
+            if fresh and fresh != csrf:
+                with self._csrf_lock:
+                    self._csrf_tokens[cookie] = (fresh, time.time())
+            else:
+                fresh = self._get_csrf(cookie, force=True)
+            if fresh and fresh != csrf:
+                with self._csrf_lock:
+                    self.csrf_stats["refreshes"] += 1
+                resp = http_client.request(method, url, headers=dict(headers, **{"x-csrf-token": fresh}),
+                                           body=body, timeout=timeout)
+        return resp
+
+    def csrf_status(self):
+        with self._csrf_lock:
+            st = dict(self.csrf_stats)
+            st["cached"] = len(self._csrf_tokens)
+        lookups = st["hits"] + st["misses"]
+        st["hit_rate"] = round(st["hits"] / lookups, 3) if lookups else None
+        return st
+
+    def _roblox_post(self, cookie, url, body):
+        data = json.dumps(body).encode("utf-8")
+        activity.log(f"Sending to {url}", "debug", tag="POST")
+        activity.log(f"Body: {data.decode()}", "debug", tag="POST")
+        try:
+            resp = self._csrf_request(
+                cookie, "POST", url,
+                headers={
+                    "Cookie": f".ROBLOSECURITY={cookie}",
+                    "Content-Type": "application/json;charset=UTF-8",
+                    "Origin": "https://www.roblox.com",
+                    "Referer": "https://www.roblox.com/",
+                },
+                body=data, timeout=15,
+            )
+        except Exception as ex:
+            activity.log(f"Exception: {ex}", "error", tag="POST")
+            return {"error": str(ex)}
+        if resp is None:
+            return {"error": "Failed to get CSRF token"}
+        resp_body = resp.text()
+        if resp.status >= 400:
+            activity.log(f"HTTP Error: {resp.status}, body={resp_body[:200]}", "error", tag="POST")
+            return {"status": resp.status, "body": resp_body, "error": f"HTTP {resp.status}"}
+        activity.log(f"Response: HTTP {resp.status}, body={resp_body[:200]}", "debug", tag="POST")
+        try:
+            parsed = json.loads(resp_body) if resp_body.strip() else {}
+        except (json.JSONDecodeError, ValueError):
+            parsed = resp_body
+        return {"status": resp.status, "body": parsed}
+
+    def set_launch_mode(self, mode):
+        """Switch launch backend by LAUNCHERS key. Returns False for an unknown mode."""
+        if mode not in LAUNCHERS:
+            return False
+        if getattr(self.launcher, "name", None) != mode:
+            self.launcher = LAUNCHERS[mode]()
+            activity.log(f"Launch mode: {mode}", "info", tag="LAUNCH")
+        return True
+
+    def find_roblox_path(self):
+        """Find RobloxPlayerBeta.exe (cached, see RobloxPathResolver)."""
+        return roblox_resolver.get()
+
+    def prepare_launch(self, account_name, server_key=None, place_id=None):
+        """Network stage of a launch: fetch the auth ticket and build the launch URI.
+        Returns {account, server, url, prepared_at} or {error}."""
+        cookie = self.get_cookie(account_name)
+        if not cookie:
+            return {"error": f"Account '{account_name}' not found"}
+        link_code = None
+        if server_key and server_key in SERVERS:
+            link_code = SERVERS[server_key].get("link_code", "")
+            if not link_code:
+                return {"error": f"No link_code for server '{server_key}'. Edit the server and add the privateServerLinkCode."}
+        ticket = self.get_auth_ticket(cookie)
+        if not ticket:
+            return {"error": "Failed to get auth ticket"}
+        place_id = place_id or PLACE_ID
+        if link_code:
+            place_id = place_id or SERVERS[server_key].get("place_id") or PLACE_ID
+        params = build_launch_params(ticket, place_id, link_code)
+        return {
+            "account": account_name,
+            "server": server_key,
+            "place_id": place_id,
+            "url": launch_url_from_params(params),
+            "params": params,
+            "prepared_at": time.time(),
+        }
+
+    def ensure_fresh(self, prepared, max_age=LAUNCH_TICKET_MAX_AGE):
+        """Return `prepared`, or a newly prepared launch if its ticket is older than max_age."""
+        if "error" in prepared:
+            return prepared
+        age = time.time() - prepared["prepared_at"]
+        if age <= max_age:
+            return prepared
+        activity.log(f"{prepared['account']}: auth ticket is {age:.0f}s old - fetching a new one", "debug", tag="LAUNCH")
+        return self.prepare_launch(prepared["account"], prepared["server"], prepared.get("place_id"))
+
+    def launch_instance(self, account_name, server_key=None, place_id=None):
+        prepared = self.prepare_launch(account_name, server_key, place_id)
+        if "error" in prepared:
+            return prepared
+        return self.start_launch(prepared)
+
+    def start_launch(self, prepared):
+        """Process stage of a launch: start Roblox with a prepared launch URI and track its PID."""
+        account_name = prepared["account"]
+        server_key = prepared["server"]
+
+        # Clean any singleton handles from existing Roblox processes
+        if close_singletons(process_registry.pids(fresh=True)):
+            time.sleep(0.3)
+
+        try:
+            with process_registry.spawning():
+                pid = self.launcher.launch(prepared) or 0
+
+                # Store initial instance info
+                self.drop_instance(account_name)
+                self.set_instance(account_name, pid=pid, server_key=server_key, launched_at=time.time())
+                claimed = bool(pid) and process_registry.claim(pid, account_name, adopt=True)
+
+            if pid:
+                # The backend started the client itself - no discovery needed
+                if claimed:
+                    activity.log(f"{account_name}: tracked PID {pid} ({self.launcher.name})", "debug", tag="PID")
+                    if IS_WINDOWS:
+                        # The client creates its singleton event during startup
+                        threading.Timer(2.0, close_singleton_from_process, args=(pid,)).start()
+                else:
+                    activity.log(f"{account_name}: PID {pid} exited right after launch", "warn", tag="PID")
+            else:
+                # The registry hands us the next new Roblox process (bootstrapper â†’ actual game)
+                def on_claim(pid):
+                    self.set_instance(account_name, pid=pid)
+                    activity.log(f"{account_name}: tracked PID {pid}", "debug", tag="PID")
+                    close_singleton_from_process(pid)
+
+                process_registry.expect(account_name, on_claim)
+
+            events.publish("launch", account=account_name, server=server_key, ok=True, pid=pid)
+            return {"success": True, "pid": pid, "account": account_name, "server": server_key}
+        except Exception as e:
+            events.publish("launch", account=account_name, server=server_key, ok=False, error=str(e))
+            return {"error": f"Launch failed: {e}"}
+
+    def _find_new_roblox_pid(self, exclude_pids, after_timestamp=None):
+        """Find a RobloxPlayerBeta PID that wasn't in the exclude set.
+        If after_timestamp is provided, prefer processes created after that time."""
+        candidates = []
+        for p in psutil.process_iter(["pid", "name", "create_time"]):
+            try:
+                if (p.info["name"] and "RobloxPlayerBeta" in p.info["name"]
+                        and p.info["pid"] not in exclude_pids):
+                    candidates.append((p.info["pid"], p.info.get("create_time", 0)))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        if not candidates:
+            return None
+        
+        # If we have a timestamp, prefer processes created after it
+        if after_timestamp:
+            newer = [(pid, ct) for pid, ct in candidates if ct >= after_timestamp]
             if newer:
                 # Return the NEWEST one (highest create_time)
                 return max(newer, key=lambda x: x[1])[0]
@@ -1017,54 +2595,16 @@ class AccountManager:
         return candidates[0][0]
 
     def _get_private_server_id(self, cookie, place_id, link_code=None, server_name=None):
-        """Get the numeric privateServerId (vipServerId) from the private-servers API.
-        API returns: vipServerId (numeric), accessCode (UUID), name, owner, etc.
+        """Get the numeric privateServerId (vipServerId) from the private-servers directory.
         Tries to match by: accessCode, server name, or falls back to first owned."""
-        try:
-            ctx = ssl.create_default_context()
-            url = f"https://games.roblox.com/v1/games/{place_id}/private-servers"
-            req = urllib.request.Request(url, headers={
-                "Cookie": f".ROBLOSECURITY={cookie}",
-                "User-Agent": "Mozilla/5.0",
-            })
-            resp = urllib.request.urlopen(req, context=ctx, timeout=10)
-            data = json.loads(resp.read().decode())
-            servers = data.get("data", [])
-            print(f"[DEBUG] private-servers returned {len(servers)} server(s)")
-            for srv in servers:
-                print(f"[DEBUG]   vipServerId={srv.get('vipServerId')}, name=\"{srv.get('name','?')}\", accessCode={str(srv.get('accessCode',''))[:12]}...")
-            # 1) Match by link_code against accessCode
-            if link_code:
-                for srv in servers:
-                    if srv.get("accessCode", "") == link_code:
-                        print(f"[DEBUG] Matched by accessCode â†’ vipServerId={srv.get('vipServerId')}")
-                        return srv.get("vipServerId")
-            # 2) Match by server name (case-insensitive partial match)
-            if server_name:
-                name_lower = server_name.lower()
-                for srv in servers:
-                    if name_lower in srv.get("name", "").lower():
-                        print(f"[DEBUG] Matched by name \"{srv.get('name')}\" â†’ vipServerId={srv.get('vipServerId')}")
-                        return srv.get("vipServerId")
-            # 3) If only one server, use it
-            if len(servers) == 1:
-                print(f"[DEBUG] Only one server â†’ vipServerId={servers[0].get('vipServerId')}")
-                return servers[0].get("vipServerId")
-            # 4) Could not auto-match â€” return first one but warn
-            if servers:
-                vid = servers[0].get("vipServerId")
-                print(f"[DEBUG] Could not auto-match, using first server â†’ vipServerId={vid}")
-                print(f"[DEBUG] TIP: Set 'server_id' in your server config to the correct vipServerId from the list above")
-                return vid
-        except Exception as ex:
-            print(f"[DEBUG] private-servers error: {ex}")
-        return None
+        return private_servers.resolve(cookie, place_id, link_code, server_name)
 
     def shutdown_server(self, account_name, server_key, game_id=None):
         """Shutdown a private server. Matches the working boss_server.py approach:
         POST to matchmaking shutdown with placeId + privateServerId (numeric).
         gameId (jobId) is optional â€” sent if available from executor.
-        If 404, re-resolves privateServerId from API and retries once."""
+        If 404, retries once with a different ID from the directory cache; the
+        listing itself is refreshed in the background, never waited on."""
         if not account_name:
             account_name = next(iter(self.accounts), None)
         cookie = self.get_cookie(account_name)
@@ -1075,7 +2615,7 @@ class AccountManager:
         server = SERVERS[server_key]
         srv_place_id = server.get("place_id") or PLACE_ID
 
-        # Get numeric privateServerId â€” from cache or API
+        # Get numeric privateServerId â€” from config, directory cache or API
         ps_id = server.get("server_id")
         was_cached = ps_id is not None
         if not ps_id:
@@ -1095,29 +2635,25 @@ class AccountManager:
         if game_id:
             body["gameId"] = game_id
 
-        print(f"[SHUTDOWN] {server.get('name',server_key)} â†’ placeId={srv_place_id}, privateServerId={ps_id}, gameId={game_id or 'none'}")
-        print(f"[SHUTDOWN] Sending POST to shutdown endpoint...")
+        activity.log(f"{server.get('name',server_key)} â†’ placeId={srv_place_id}, privateServerId={ps_id}, gameId={game_id or 'none'}", "info", tag="SHUTDOWN")
+        activity.log(f"Sending POST to shutdown endpoint...", "debug", tag="SHUTDOWN")
         result = self._roblox_post(cookie, "https://apis.roblox.com/matchmaking-api/v1/game-instances/shutdown", body)
-        print(f"[SHUTDOWN] Result: {result}")
+        activity.log(f"Result: {result}", "info", tag="SHUTDOWN")
 
-        # If 404 and we used a cached server_id, the ID might be stale â€” re-resolve and retry
+        # If 404 and we used a cached server_id, the ID might be stale
         if result.get("status") == 404 and was_cached:
-            print(f"[SHUTDOWN] 404 with cached server_id={ps_id} â€” re-resolving from API...")
-            server.pop("server_id", None)
-            new_ps_id = self._get_private_server_id(cookie, srv_place_id, server.get("link_code"), server.get("name"))
+            new_ps_id = private_servers.lookup(srv_place_id, server.get("link_code"), server.get("name"), strict=True)
             if new_ps_id and new_ps_id != ps_id:
-                print(f"[SHUTDOWN] Resolved NEW server_id={new_ps_id} (was {ps_id}) â€” retrying shutdown...")
+                activity.log(f"Directory has server_id={new_ps_id} (was {ps_id}) â€” retrying shutdown...", "info", tag="SHUTDOWN")
                 server["server_id"] = new_ps_id
                 save_servers()
                 body["privateServerId"] = new_ps_id
                 result = self._roblox_post(cookie, "https://apis.roblox.com/matchmaking-api/v1/game-instances/shutdown", body)
-                print(f"[SHUTDOWN] Retry result: {result}")
-            elif new_ps_id:
-                print(f"[SHUTDOWN] Re-resolved same server_id={new_ps_id} â€” server likely has no active instance")
-                server["server_id"] = new_ps_id
-                save_servers()
+                activity.log(f"Retry result: {result}", "info", tag="SHUTDOWN")
             else:
-                print(f"[SHUTDOWN] Could not re-resolve server_id from API")
+                activity.log(f"404 with server_id={ps_id} â€” server likely has no active instance; "
+                      f"refreshing private-servers in the background", "warn", tag="SHUTDOWN")
+                private_servers.refresh_async(cookie, srv_place_id)
 
         return result
 
@@ -1127,13 +2663,8 @@ class AccountManager:
         # Kill the process immediately so stale windows don't pile up
         instance = self.instances.get(account_name)
         if instance:
-            try:
-                p = psutil.Process(instance["pid"])
-                if p.is_running():
-                    p.kill()
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        self.instances.pop(account_name, None)
+            process_registry.kill(instance["pid"])
+        self.drop_instance(account_name)
 
         def delayed_relaunch():
             time.sleep(delay)
@@ -1156,16 +2687,82 @@ class AccountManager:
         job_id = data.get("jobId", "")
         server = data.get("server", "")
 
-        print(f"[HEARTBEAT] Received from '{username}' in server '{server}' with {len(players)} players")
+        activity.log(f"Received from '{username}' in server '{server}' with {len(players)} players", "debug", tag="HEARTBEAT")
 
-        self.player_reports[username] = {
-            "players": players,
-            "jobId": job_id,
-            "server": server,
-            "timestamp": time.time(),
-        }
+        self._record_heartbeats([username], server, job_id, players, time.time())
         return {"ok": True, "tracked": len(self.player_reports)}
 
+    def process_heartbeat_batch(self, reports):
+        """Heartbeats from several clients at once: [{username, players, jobId, server}, ...].
+        Reports with the same server, jobId and player list are merged and applied once.
+        Returns (accepted, merged groups, set of servers touched)."""
+        groups = {}
+        accepted = 0
+        for r in reports:
+            if not r.get("username"):
+                continue
+            players = r.get("players", [])
+            key = (r.get("server", ""), r.get("jobId", ""), frozenset(p.lower() for p in players))
+            group = groups.setdefault(key, (players, []))
+            group[1].append(r["username"])
+            accepted += 1
+        now = time.time()
+        for (server, job_id, _), (players, reporters) in groups.items():
+            self._record_heartbeats(reporters, server, job_id, players, now)
+        activity.log(f"Batch of {accepted} from {len(groups)} distinct snapshot(s)", "debug", tag="HEARTBEAT")
+        return accepted, len(groups), {key[0] for key in groups}
+
+    def _record_heartbeats(self, reporters, server, job_id, players, now):
+        moved = False
+        for username in reporters:
+            prev = self.player_reports.get(username)
+            moved = moved or prev is None or prev.get("server") != server or prev.get("jobId") != job_id
+            self.player_reports[username] = {
+                "players": players,
+                "jobId": job_id,
+                "server": server,
+                "timestamp": now,
+            }
+        self.presence.update_many(reporters, server, players, now)
+        if self.db:
+            for username in reporters:
+                self.db.record_heartbeat(username, server, job_id, players, now)
+        if moved:
+            self.touch()
+        for username in reporters:
+            for fn in list(self._heartbeat_listeners):
+                try:
+                    fn(username, server, players, now)
+                except Exception:
+                    pass
+        events.publish("heartbeat", reporter=reporters[0], reporters=reporters, server=server, jobId=job_id,
+                       players=players)
+
+    def heartbeat_missing(self, server):
+        """get_missing_accounts(server) for heartbeat replies. Reused while the presence
+        index hasn't changed (identical player lists don't change it) for up to
+        HEARTBEAT_MISSING_TTL seconds, so N clients in one server cost one lookup."""
+        now = time.time()
+        with self._missing_lock:
+            cached = self._missing_cache.get(server)
+        if cached and cached[0] == self.presence.version and now - cached[1] < HEARTBEAT_MISSING_TTL:
+            return cached[2]
+        version = self.presence.version
+        result = self.get_missing_accounts(server)
+        with self._missing_lock:
+            self._missing_cache[server] = (version, now, result)
+        return result
+
+    def heartbeat_diff(self, reporter, server, missing):
+        """What changed in `missing` since the last batch answer to this reporter."""
+        missing = frozenset(missing)
+        with self._missing_lock:
+            prev_server, prev = self._missing_sent.get(reporter, (None, frozenset()))
+            self._missing_sent[reporter] = (server, missing)
+        if prev_server != server:
+            prev = frozenset()
+        return sorted(missing - prev), sorted(prev - missing)
+
     def get_server_players(self, server_key=None, max_age=60):
         """Get all known players across all reporting accounts.
         Returns: {server_key: {jobId, players: [...], reporters: [...], stale: bool}}
@@ -1173,7 +2770,22 @@ class AccountManager:
         now = time.time()
         servers = {}
 
-        for reporter, report in self.player_reports.items():
+        if self.db:
+            for reporter, srv, job_id, ts, player in self.db.reports_with_players(server_key):
+                entry = servers.get(srv)
+                if entry is None:
+                    entry = servers[srv] = {"players": set(), "reporters": [], "jobId": job_id, "stale": False}
+                if player is not None:
+                    entry["players"].add(player)
+                if reporter not in entry["reporters"]:
+                    entry["reporters"].append(reporter)
+                if now - ts > max_age:
+                    entry["stale"] = True
+            for srv in servers:
+                servers[srv]["players"] = sorted(servers[srv]["players"])
+            return servers
+
+        for reporter, report in list(self.player_reports.items()):
             age = now - report["timestamp"]
             srv = report.get("server", "unknown")
 
@@ -1193,91 +2805,924 @@ class AccountManager:
         for srv in servers:
             servers[srv]["players"] = sorted(servers[srv]["players"])
 
-        return servers
+        return servers
+
+    def get_missing_accounts(self, server_key, max_age=60):
+        """Check which managed accounts are NOT in the specified server.
+        Compares account usernames against the presence index fed by heartbeats.
+        Returns: {present: [...], missing: [...], unknown: [...]}"""
+        now = time.time()
+
+        if self.db and max_age > self.presence.retention:
+            # Older than the in-memory index keeps - ask the durable store
+            have_report, in_server, present_set = self.db.presence(server_key, max_age, now)
+            present = [n for n in self.accounts if n in present_set]
+            missing = [n for n in self.accounts if n not in present_set]
+        else:
+            have_report, in_server, present, missing = self.presence.presence(server_key, max_age, now)
+
+        if not have_report:
+            return {"present": [], "missing": [], "unknown": list(self.accounts.keys()),
+                    "error": "No recent heartbeats for this server"}
+
+        return {"present": present, "missing": missing, "unknown": [],
+                "players_in_server": sorted(in_server), "server": server_key}
+
+    def get_instance_status(self, name, require_heartbeat=True):
+        """Check if an account's Roblox instance is actually alive and in-game.
+        Returns: (running, pid, server_key)
+        If require_heartbeat=True (default): 'running' requires both process alive AND recent heartbeat
+        If require_heartbeat=False: 'running' only requires process to be alive (for when Lua isn't loaded)"""
+        inst = self.instances.get(name)
+        if not inst:
+            return False, None, None
+        pid = inst.get("pid")
+        srv = inst.get("server_key")
+
+        # Check if process is alive (pid 0 = launched, registry hasn't seen the process yet)
+        process_alive = process_registry.is_alive(pid) or (not pid and process_registry.is_pending(name))
+
+        if not process_alive:
+            return False, pid, srv
+
+        # If we don't require heartbeat, just check process is alive
+        if not require_heartbeat:
+            return True, pid, srv
+
+        # Process is alive â€” but is it actually in-game or stuck on disconnect screen?
+        # Check heartbeat freshness: if Lua hasn't reported in, the client is likely dead
+        account_data = self.accounts.get(name, {})
+        roblox_username = account_data.get("username", "")
+        report = self.player_reports.get(roblox_username)
+        
+        # Debug: show what we're looking for vs what we have
+        # print(f"[STATUS] {name}: looking for heartbeat from '{roblox_username}', reports={list(self.player_reports.keys())}")
+        
+        if report:
+            age = time.time() - report["timestamp"]
+            if age < 60:  # Heartbeat within last 60s = definitely alive
+                return True, pid, srv
+            # Stale heartbeat = client probably disconnected but process still running
+            return False, pid, srv
+
+        # No heartbeat at all â€” check how long ago we launched
+        launched_at = inst.get("launched_at", 0)
+        age_since_launch = time.time() - launched_at
+        if age_since_launch < 90:
+            # Launched less than 90s ago â€” still loading, give it time
+            return True, pid, srv
+
+        # Process alive, no heartbeat, been a while since launch = stuck/disconnected
+        return False, pid, srv
+
+
+# ============================================================================
+# BATCH LAUNCHER
+# ============================================================================
+
+class BatchLauncher:
+    """Pipelined multi-account launch.
+    Network stage: auth tickets for every account are fetched concurrently on a
+    bounded pool. Process stage: launch URIs are started in the order their
+    tickets come back, `pacing` seconds apart. Progress is kept in status() for
+    the API and pushed to an optional on_progress(event, status) callback."""
+
+    def __init__(self, mgr, workers=BATCH_TICKET_WORKERS, pacing=BATCH_LAUNCH_PACING):
+        self.mgr = mgr
+        self.workers = workers
+        self.pacing = pacing
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.current = None
+
+    def running(self):
+        with self._lock:
+            return bool(self.current and self.current["state"] != "done")
+
+    def status(self):
+        with self._lock:
+            return copy.deepcopy(self.current) if self.current else {"state": "idle"}
+
+    def start(self, targets, pacing=None, on_progress=None):
+        """targets: list of (account_name, server_key or None). Returns the batch status,
+        or {error} if a batch is already running."""
+        with self._lock:
+            if self.current and self.current["state"] != "done":
+                return {"error": "Batch launch already in progress", "batch": self.current["id"]}
+            self._seq += 1
+            self.current = {
+                "id": self._seq,
+                "state": "preparing",
+                "total": len(targets),
+                "prepared": 0,
+                "launched": 0,
+                "failed": 0,
+                "pacing": self.pacing if pacing is None else pacing,
+                "started_at": time.time(),
+                "finished_at": None,
+                "items": {name: {"server": srv, "state": "queued", "pid": None, "error": None}
+                          for name, srv in targets},
+            }
+            batch = self.current
+        threading.Thread(target=self._run, args=(batch, list(targets), on_progress), daemon=True).start()
+        return self.status()
+
+    def _update(self, batch, name, on_progress, event, **fields):
+        with self._lock:
+            item = batch["items"][name]
+            item.update(fields)
+            if fields.get("state") == "ready":
+                batch["prepared"] += 1
+            elif fields.get("state") == "launched":
+                batch["launched"] += 1
+            elif fields.get("state") == "failed":
+                batch["failed"] += 1
+        events.publish("batch", event=event, account=name, batch=batch["id"], state=item["state"],
+                       pid=item.get("pid"), error=item.get("error"))
+        if on_progress:
+            try:
+                on_progress(event, dict(item, account=name, id=batch["id"], total=batch["total"]))
+            except Exception:
+                pass
+
+    def _run(self, batch, targets, on_progress):
+        pacing = batch["pacing"]
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(targets))),
+                                  thread_name_prefix="ticket")
+        try:
+            futures = {}
+            for name, srv in targets:
+                self._update(batch, name, on_progress, "ticket", state="ticket")
+                futures[pool.submit(self.mgr.prepare_launch, name, srv)] = name
+            with self._lock:
+                batch["state"] = "launching"
+            last_spawn = 0.0
+            for fut in as_completed(futures):
+                name = futures[fut]
+                try:
+                    prepared = fut.result()
+                except Exception as ex:
+                    prepared = {"error": str(ex)}
+                if "error" in prepared:
+                    self._update(batch, name, on_progress, "failed", state="failed", error=prepared["error"])
+                    continue
+                self._update(batch, name, on_progress, "ready", state="ready")
+                wait = last_spawn + pacing - time.time()
+                if last_spawn and wait > 0:
+                    time.sleep(wait)
+                self._update(batch, name, on_progress, "launching", state="launching")
+                last_spawn = time.time()
+                prepared = self.mgr.ensure_fresh(prepared)
+                r = prepared if "error" in prepared else self.mgr.start_launch(prepared)
+                if r.get("success"):
+                    self._update(batch, name, on_progress, "launched", state="launched", pid=r.get("pid"))
+                else:
+                    self._update(batch, name, on_progress, "failed", state="failed", error=r.get("error", "?"))
+        finally:
+            pool.shutdown(wait=False)
+            with self._lock:
+                batch["state"] = "done"
+                batch["finished_at"] = time.time()
+            events.publish("batch", event="done", batch=batch["id"], launched=batch["launched"],
+                           failed=batch["failed"])
+            if on_progress:
+                try:
+                    on_progress("done", {"id": batch["id"], "total": batch["total"],
+                                         "launched": batch["launched"], "failed": batch["failed"]})
+                except Exception:
+                    pass
+
+
+def log_batch_progress(event, item):
+    """BatchLauncher on_progress callback that writes to the activity log."""
+    if event == "launching":
+        label = SERVERS[item["server"]]["name"] if item["server"] in SERVERS else "public"
+        activity.log(f"Launching {item['account']} \u2192 {label}...")
+    elif event == "launched":
+        activity.log(f"\u2714 {item['account']} launched (PID {item['pid']})", "success")
+    elif event == "failed":
+        activity.log(f"\u2718 {item['account']} failed: {item['error']}", "error")
+    elif event == "done":
+        activity.log(f"Batch launch complete ({item['total']} accounts)", "success")
+
+
+# ============================================================================
+# RESTART JOBS (one shutdown/kill/relaunch per server, however many callers)
+# ============================================================================
+
+class RestartScheduler:
+    """Coalesces POST /restart calls into one job per server.
+    Every executor in a server calls /restart when the boss dies; the first call
+    creates a job, the rest attach to it (and to a finished job for
+    RESTART_DEDUPE_WINDOW seconds, unless they report a different gameId) and get
+    the same job id back. Jobs are polled with GET /jobs/<id>."""
+
+    ACTIVE = ("queued", "shutdown", "killing", "waiting", "relaunching", "verifying")
+
+    def __init__(self, mgr, window=RESTART_DEDUPE_WINDOW, history=RESTART_JOB_HISTORY):
+        self.mgr = mgr
+        self.window = window
+        self.history = history
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.jobs = {}        # {job_id: job}
+        self.by_server = {}   # {server_key: job_id of the latest job}
+
+    def _pick_accounts(self, server_key, specific_account):
+        if specific_account:
+            return [specific_account]
+        # Relaunch the accounts tracked in this server
+        accounts, elsewhere = [], set()
+        for acc_name in list(self.mgr.accounts):
+            running, pid, srv = self.mgr.get_instance_status(acc_name, require_heartbeat=False)
+            if srv == server_key:
+                accounts.append(acc_name)
+            elif running:
+                elsewhere.add(acc_name)
+        # Fallback: relaunch every account that isn't busy in another server
+        return accounts or [n for n in self.mgr.accounts if n not in elsewhere]
+
+    def _attachable(self, job, game_id, now, specific_account=None):
+        if not specific_account and job["scoped_to"] and job["state"] not in ("queued", "shutdown"):
+            # A per-account job past its kill step doesn't cover the rest of the server
+            return False
+        if job["state"] in self.ACTIVE:
+            return True
+        if now - (job["finished_at"] or now) > self.window:
+            return False
+        # A different gameId means a new server instance died: that's a new restart
+        return not (game_id and job["game_id"] and game_id != job["game_id"])
+
+    def submit(self, server_key, game_id=None, delay=5, specific_account=None, sweep=None):
+        """Start a restart job for server_key, or attach to the one already covering it.
+        sweep: also kill Roblox processes no account owns (defaults to RESTART_SWEEP_UNATTRIBUTED).
+        Returns (job snapshot, duplicate)."""
+        now = time.time()
+        with self._lock:
+            job = self.jobs.get(self.by_server.get(server_key))
+            if job and self._attachable(job, game_id, now, specific_account):
+                job["requests"] += 1
+                job["updated_at"] = now
+                if not specific_account and job["scoped_to"] and job["state"] in ("queued", "shutdown"):
+                    job["scoped_to"] = None
+                    job["accounts"] += [a for a in self._pick_accounts(server_key, None) if a not in job["accounts"]]
+                # A per-account restart joining a job that hasn't relaunched yet rides along
+                if (specific_account and specific_account not in job["accounts"]
+                        and job["state"] in ("queued", "shutdown", "killing", "waiting")):
+                    job["accounts"].append(specific_account)
+                if sweep and job["state"] in ("queued", "shutdown"):
+                    job["sweep"] = True
+                return self._snapshot(job), True
+
+            self._seq += 1
+            job = {
+                "id": f"{server_key}-{int(now)}-{self._seq}",
+                "server": server_key,
+                "game_id": game_id,
+                "delay": delay,
+                "accounts": self._pick_accounts(server_key, specific_account),
+                "scoped_to": specific_account,
+                "sweep": RESTART_SWEEP_UNATTRIBUTED if sweep is None else bool(sweep),
+                "shutdown_account": specific_account or next(iter(self.mgr.accounts), None),
+                "state": "queued",
+                "requests": 1,
+                "created_at": now,
+                "updated_at": now,
+                "finished_at": None,
+                "shutdown": None,
+                "killed": [],
+                "relaunched": {},
+                "missing": [],
+                "joins": {},
+                "log": [],
+            }
+            self.jobs[job["id"]] = job
+            self.by_server[server_key] = job["id"]
+            self._trim()
+            snap = self._snapshot(job)
+        events.publish("restart", job=job["id"], server=server_key, state="queued")
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"restart-{server_key}").start()
+        return snap, False
+
+    def _trim(self):
+        finished = [j for j in self.jobs.values() if j["state"] not in self.ACTIVE]
+        for j in sorted(finished, key=lambda j: j["created_at"])[:max(0, len(finished) - self.history)]:
+            del self.jobs[j["id"]]
+
+    def _snapshot(self, job):
+        return copy.deepcopy(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def list(self):
+        with self._lock:
+            return [{k: j[k] for k in ("id", "server", "state", "requests", "created_at", "finished_at")}
+                    for j in sorted(self.jobs.values(), key=lambda j: j["created_at"], reverse=True)]
+
+    def _set(self, job, state=None, msg=None, level="info", tag="RESTART", **fields):
+        if state and state != job["state"]:
+            events.publish("restart", job=job["id"], server=job["server"], state=state)
+        with self._lock:
+            if state:
+                job["state"] = state
+            job.update(fields)
+            job["updated_at"] = time.time()
+            if msg:
+                job["log"].append([job["updated_at"], msg])
+        if msg:
+            activity.log(msg, level, tag=tag)
+
+    def _run(self, job):
+        try:
+            self._execute(job)
+            self._set(job, "done", finished_at=time.time())
+        except Exception as ex:
+            self._set(job, "failed", level="error", tag="RESTART", msg=f"Job {job['id']} failed: {ex}", finished_at=time.time())
+
+    def _execute(self, job):
+        mgr, server_key = self.mgr, job["server"]
+
+        # Attempt shutdown (best-effort â€” may 404 if not game owner)
+        self._set(job, "shutdown")
+        shutdown_result = mgr.shutdown_server(job["shutdown_account"], server_key, job["game_id"])
+        shutdown_ok = shutdown_result.get("status") == 200 or "error" not in shutdown_result
+        if not shutdown_ok:
+            self._set(job, level="warn", tag="API", msg=f"Restart {server_key}: shutdown failed (this is OK â€” will kill processes instead)",
+                      shutdown=shutdown_result)
+            activity.log(f"Private server will auto-close ~30s after all players leave", "info", tag="API")
+        else:
+            self._set(job, tag="API", msg=f"Restart {server_key}: shutdown successful", shutdown=shutdown_result)
+
+        # â”€â”€ KILL THIS SERVER'S ROBLOX PROCESSES IMMEDIATELY â”€â”€
+        # Do this right after shutdown so the disconnected clients close
+        # and don't pile up as stale windows. Only PIDs the instance table maps to
+        # this server (or to the one account being restarted) - other servers keep farming.
+        with self._lock:
+            accounts = list(job["accounts"])
+            scoped_to = job["scoped_to"]
+        process_registry.scan()  # the snapshot can be idle_interval old; the kill must be complete
+        targets = mgr.server_pids(server_key, accounts=accounts if scoped_to else None)
+        pids = set(targets.values())
+        if job["sweep"]:
+            pids.update(process_registry.unattributed())
+        self._set(job, "killing", tag="RESTART", msg=f"Killing {len(pids)} Roblox process(es) for {server_key}"
+                                  f"{' (+ unattributed sweep)' if job['sweep'] else ''}...")
+        killed = process_registry.kill_many(pids)
+        # Clear tracked instances for everything we killed or are about to relaunch
+        for acc_name in set(targets) | set(accounts):
+            mgr.drop_instance(acc_name)
+        self._set(job, tag="RESTART", msg=f"Killed {len(killed)} Roblox process(es)", killed=sorted(killed))
+
+        # Clear old heartbeats for this server so we get fresh ones
+        mgr.clear_reports(server_key=server_key)
+
+        # Wait for private server to auto-close after all players left
+        actual_delay = job["delay"] if shutdown_ok else max(job["delay"], 15)
+        wait_end = time.time() + actual_delay
+        self._set(job, "waiting", tag="RESTART", msg=f"Waiting {actual_delay}s for server to clear (shutdown_ok={shutdown_ok})...")
+        pool, prefetch = self._prefetch(job, wait_end)
+        try:
+            time.sleep(max(0, wait_end - time.time()))
+
+            # Relaunch all accounts (including any that attached while we waited)
+            ready = sum(1 for f in prefetch.values() if f.done())
+            self._set(job, "relaunching", tag="RESTART", level="debug",
+                      msg=f"Restart {server_key}: {ready}/{len(prefetch)} launch(es) prepared during the wait")
+            with self._lock:
+                accounts = list(job["accounts"])
+            launched_at = {}
+            for acc_name in accounts:
+                try:
+                    fut = prefetch.get(acc_name)
+                    prepared = fut.result() if fut else mgr.prepare_launch(acc_name, server_key)
+                except Exception as ex:
+                    prepared = {"error": str(ex)}
+                prepared = mgr.ensure_fresh(prepared)
+                launched_at[acc_name] = time.time()
+                result = prepared if "error" in prepared else mgr.start_launch(prepared)
+                with self._lock:
+                    job["relaunched"][acc_name] = result
+                activity.log(f"Relaunched {acc_name} â†’ {server_key}: {result}", "info", tag="RESTART")
+                time.sleep(RESTART_RELAUNCH_STAGGER)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        self._verify(job, launched_at)
+
+    def _prefetch(self, job, wait_end):
+        """Fetch auth tickets / build launch URIs for the job's accounts during the
+        restart wait, starting RESTART_PREFETCH_LEAD seconds before it ends so the
+        tickets are fresh when used. Returns (pool, {account: future})."""
+        mgr, server_key = self.mgr, job["server"]
+        with self._lock:
+            accounts = list(job["accounts"])
+        start_at = wait_end - RESTART_PREFETCH_LEAD
+
+        def prepare(acc_name):
+            time.sleep(max(0, start_at - time.time()))
+            return mgr.prepare_launch(acc_name, server_key)
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(BATCH_TICKET_WORKERS, len(accounts) + 1)),
+                                  thread_name_prefix=f"prefetch-{server_key}")
+        pool.submit(mgr.find_roblox_path)  # Warm the exe lookup for direct launches
+        return pool, {acc_name: pool.submit(prepare, acc_name) for acc_name in accounts}
+
+    def _verify(self, job, launched_at):
+        """Wait for each relaunched account to appear in a heartbeat for the server.
+        Woken by every heartbeat for that server; finishes as soon as everyone is in.
+        An account that misses its deadline is killed and relaunched, with the next
+        deadline VERIFY_BACKOFF times longer, up to VERIFY_MAX_ATTEMPTS launches."""
+        mgr, server_key = self.mgr, job["server"]
+        wake = threading.Event()
+        listener = mgr.subscribe_heartbeats(lambda rep, srv, players, ts: srv == server_key and wake.set())
+        first_launch = dict(launched_at)
+        waiting = {acc: {"attempt": 1, "timeout": VERIFY_JOIN_TIMEOUT,
+                         "deadline": t + VERIFY_JOIN_TIMEOUT} for acc, t in launched_at.items()}
+        self._set(job, "verifying", tag="VERIFY", msg=f"Waiting for {len(waiting)} account(s) to join {server_key}...")
+        try:
+            while waiting:
+                now = time.time()
+                present = set(mgr.get_missing_accounts(server_key, max_age=now - min(first_launch.values()) + 1)
+                              .get("present", []))
+                for acc in [a for a in waiting if a in present]:
+                    st = waiting.pop(acc)
+                    join = {"seconds": round(now - launched_at[acc], 1),
+                            "total_seconds": round(now - first_launch[acc], 1), "attempts": st["attempt"]}
+                    with self._lock:
+                        job["joins"][acc] = join
+                    activity.log(f"{acc} joined {server_key} in {join['seconds']}s (attempt {st['attempt']})", "info", tag="VERIFY")
+
+                for acc, st in list(waiting.items()):
+                    if now < st["deadline"]:
+                        continue
+                    if st["attempt"] >= VERIFY_MAX_ATTEMPTS:
+                        waiting.pop(acc)
+                        with self._lock:
+                            job["missing"].append(acc)
+                        activity.log(f"{acc} still missing after {st['attempt']} launch(es) â€” giving up", "warn", tag="VERIFY")
+                        continue
+                    # Kill stale process if any, then relaunch with a longer deadline
+                    pid = mgr.server_pids(server_key, accounts=[acc]).get(acc)
+                    if pid:
+                        process_registry.kill_many([pid])
+                    mgr.drop_instance(acc)
+                    st["attempt"] += 1
+                    st["timeout"] *= VERIFY_BACKOFF
+                    launched_at[acc] = time.time()
+                    st["deadline"] = launched_at[acc] + st["timeout"]
+                    result = mgr.launch_instance(acc, server_key)
+                    activity.log(f"Re-relaunched {acc} â†’ {server_key} (attempt {st['attempt']}, "
+                          f"deadline {st['timeout']:.0f}s): {result}", "info", tag="VERIFY")
+
+                if waiting:
+                    # Sleep until the next heartbeat for this server or the nearest deadline
+                    wake.wait(max(0.05, min(st["deadline"] for st in waiting.values()) - time.time()))
+                    wake.clear()
+        finally:
+            mgr.unsubscribe_heartbeats(listener)
+
+        with self._lock:
+            missing, joined = list(job["missing"]), len(job["joins"])
+        if missing:
+            self._set(job, level="warn", tag="VERIFY", msg=f"{server_key}: {joined} joined, missing: {missing}")
+        else:
+            self._set(job, level="success", tag="VERIFY", msg=f"All accounts confirmed in {server_key}!")
+
+
+# ============================================================================
+# SUPERVISOR (auto-rejoin watchdog, runs without the UI)
+# ============================================================================
+
+class Supervisor:
+    """Watches selected accounts and relaunches the ones that drop out.
+    Each account moves through launching -> joining -> alive; an account that goes
+    offline becomes stale and is queued for relaunch, then cooling-down until
+    SUPERVISOR_COOLDOWN has passed since its last launch. Next-check times live in
+    a heap, spread across the interval, so checks don't all fire at once.
+    Config is the watchdog part of the UI settings and is persisted there.
+    Messages go to the activity log; listeners get ("state", (account, state))
+    and ("config", config)."""
+
+    STATES = ("launching", "joining", "alive", "stale", "cooling-down")
+
+    def __init__(self, mgr):
+        self.mgr = mgr
+        self._cond = threading.Condition()
+        self._heap = []        # (next_check, account)
+        self._due = {}         # {account: next_check} - heap entries that don't match are stale
+        self._relaunch_q = deque()
+        self._listeners = []
+        self.accounts = {}     # {account: {state, since, reason, pid, last_launch, launches, next_check}}
+        self._threads = []
+        saved = load_ui_settings()
+        self.cfg = {
+            "enabled": saved.get("autoRejoin", False),
+            "interval": saved.get("autoRejoinInterval", 30),
+            "server": saved.get("autoRejoinServer", "farm"),
+            "accounts": [a for a in saved.get("watchdogAccounts", [])],
+            "require_heartbeat": saved.get("requireHeartbeat", True),
+        }
+
+    # -- listeners ---------------------------------------------------
+    def subscribe(self, fn):
+        self._listeners.append(fn)
+
+    def _emit(self, event, data):
+        for fn in list(self._listeners):
+            try:
+                fn(event, data)
+            except Exception:
+                pass
+
+    def _log(self, text, level="info"):
+        activity.log(text, level, tag="WATCHDOG")
+
+    # -- config ------------------------------------------------------
+    def config(self):
+        with self._cond:
+            return dict(self.cfg, accounts=list(self.cfg["accounts"]))
+
+    def configure(self, enabled=None, interval=None, server=None, accounts=None,
+                  require_heartbeat=None, persist=True):
+        """Update any subset of the config. Returns the new config."""
+        with self._cond:
+            old_interval = self.cfg["interval"]
+            if enabled is not None:
+                self.cfg["enabled"] = bool(enabled)
+            if interval is not None:
+                self.cfg["interval"] = max(5, int(interval))
+            if server is not None:
+                self.cfg["server"] = server
+            if accounts is not None:
+                self.cfg["accounts"] = [a for a in accounts if a in self.mgr.accounts]
+            if require_heartbeat is not None:
+                self.cfg["require_heartbeat"] = bool(require_heartbeat)
+            self._reschedule(old_interval)
+            cfg = dict(self.cfg, accounts=list(self.cfg["accounts"]))
+            self._cond.notify_all()
+        if persist:
+            for key, value in (("autoRejoin", cfg["enabled"]), ("autoRejoinInterval", cfg["interval"]),
+                               ("autoRejoinServer", cfg["server"]), ("watchdogAccounts", cfg["accounts"]),
+                               ("requireHeartbeat", cfg["require_heartbeat"])):
+                store.set(("ui_settings", key), value)
+        if cfg["enabled"] and cfg["accounts"]:
+            self._log(f"Watchdog ON: {', '.join(cfg['accounts'])} â†’ {cfg['server']} (check every {cfg['interval']}s)")
+        self._emit("config", cfg)
+        return cfg
+
+    def _reschedule(self, old_interval=None):
+        """Bring the schedule in line with the watched set: drop unwatched accounts,
+        spread first checks for newly watched ones over one interval and, if the
+        interval shrank, pull in checks due later than one new interval from now.
+        Every other entry keeps its slot."""
+        watched = self.cfg["accounts"] if self.cfg["enabled"] else []
+        for name in list(self.accounts):
+            if name not in watched:
+                del self.accounts[name]
+                self._due.pop(name, None)  # its heap entry is now stale
+        now, interval = time.time(), self.cfg["interval"]
+        if old_interval and interval < old_interval:
+            for name, when in list(self._due.items()):
+                if when > now + interval:
+                    self._schedule(name, now + interval)
+        new = [name for name in watched if name not in self.accounts]
+        for i, name in enumerate(new):
+            self.accounts[name] = {"state": "alive", "since": now, "reason": None, "pid": None,
+                                   "last_launch": 0, "launches": 0, "next_check": None}
+            self._schedule(name, now + interval * (i + 1) / len(new))
+        if len(self._heap) > 4 * len(self._due) + 64:
+            self._heap = [(when, name) for name, when in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def _schedule(self, name, when):
+        self._due[name] = when
+        self.accounts[name]["next_check"] = when
+        heapq.heappush(self._heap, (when, name))
+
+    # -- engine ------------------------------------------------------
+    def start(self):
+        if self._threads:
+            return
+        with self._cond:
+            self._reschedule()
+        for target, tname in ((self._loop, "supervisor"), (self._relaunch_loop, "supervisor-relaunch")):
+            t = threading.Thread(target=target, daemon=True, name=tname)
+            t.start()
+            self._threads.append(t)
+
+    def check_now(self, name):
+        with self._cond:
+            if name not in self.accounts:
+                return False
+            self._schedule(name, time.time())
+            self._cond.notify_all()
+        return True
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                        heapq.heappop(self._heap)
+                    if self._heap and self._heap[0][0] <= time.time():
+                        when, name = heapq.heappop(self._heap)
+                        del self._due[name]
+                        break
+                    self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+            try:
+                self._check(name)
+            except Exception as ex:
+                self._log(f"Watchdog error: {ex}", "error")
+                with self._cond:
+                    if name in self.accounts and name not in self._due:
+                        self._schedule(name, time.time() + self.cfg["interval"])
+
+    def _set_state(self, name, state, reason=None, **fields):
+        st = self.accounts.get(name)
+        if st is None:
+            return
+        changed = st["state"] != state
+        if changed:
+            st["since"] = time.time()
+        st.update(state=state, reason=reason, **fields)
+        if changed:
+            self._emit("state", (name, state))
+            events.publish("watchdog", account=name, state=state, reason=reason)
+
+    def _check(self, name):
+        with self._cond:
+            if name not in self.accounts:
+                return
+            cfg = dict(self.cfg)
+            st = dict(self.accounts[name])
+        now = time.time()
+        running, pid, _ = self.mgr.get_instance_status(name, require_heartbeat=cfg["require_heartbeat"])
+        proc_alive = self.mgr.get_instance_status(name, require_heartbeat=False)[0]
+        since_launch = now - st["last_launch"]
+        interval = cfg["interval"]
+
+        with self._cond:
+            if name not in self.accounts:
+                return
+            if running:
+                if st["state"] != "alive":
+                    self._log(f"\U0001F6E1 {name}: alive (pid={pid})", "dim")
+                self._set_state(name, "alive", pid=pid)
+                self._schedule(name, now + interval)
+                return
+
+            if st["state"] in ("launching", "joining") and since_launch < SUPERVISOR_JOIN_GRACE:
+                # Still coming up - look again sooner than the regular interval
+                self._set_state(name, "joining" if proc_alive else "launching", pid=pid)
+                self._schedule(name, now + min(interval, 10))
+                return
 
-    def get_missing_accounts(self, server_key, max_age=60):
-        """Check which managed accounts are NOT in the specified server.
-        Compares account usernames against the latest player list from heartbeats.
-        Returns: {present: [...], missing: [...], unknown: [...]}"""
-        now = time.time()
+            cooldown_left = SUPERVISOR_COOLDOWN - since_launch
+            if cooldown_left > 0:
+                if st["state"] != "cooling-down":
+                    self._log(f"\u23F3 {name}: offline, cooldown {int(cooldown_left)}s remaining", "dim")
+                self._set_state(name, "cooling-down", "offline during cooldown", pid=pid)
+                self._schedule(name, now + cooldown_left)
+                return
 
-        # Collect all players reported to be in this server
-        in_server = set()
-        have_report = False
-        for reporter, report in self.player_reports.items():
-            if report.get("server") == server_key and (now - report["timestamp"]) < max_age:
-                have_report = True
-                for p in report["players"]:
-                    in_server.add(p.lower())
+            # Determine why it's offline
+            if pid:
+                reason = ("process alive but no heartbeat (disconnected/stuck)" if proc_alive
+                          else "process dead (crashed/closed)")
+            else:
+                reason = "no tracked instance (not launched or cleared)"
+            self._set_state(name, "stale", reason, pid=pid)
+            if name not in self._relaunch_q:
+                self._relaunch_q.append(name)
+            self._cond.notify_all()
+        self._log(f"\U0001F6A8 {name} is offline ({reason}) â€” queued for relaunch", "warn")
+
+    def _relaunch_loop(self):
+        while True:
+            with self._cond:
+                while not self._relaunch_q:
+                    self._cond.wait()
+                name = self._relaunch_q.popleft()
+                if name not in self.accounts:
+                    continue
+                server = self.cfg["server"]
+                self._set_state(name, "launching", self.accounts[name]["reason"],
+                                last_launch=time.time(), launches=self.accounts[name]["launches"] + 1)
+            self._relaunch(name, server)
+            with self._cond:
+                if name in self.accounts:
+                    self._schedule(name, time.time() + min(self.cfg["interval"], 10))
+                    self._cond.notify_all()
+            time.sleep(SUPERVISOR_STAGGER)
+
+    def _relaunch(self, acc_name, srv_key):
+        """Kill the stale Roblox process first (disconnect screen), then relaunch."""
+        try:
+            # Kill the stale process if it's still running (e.g. sitting on disconnect screen)
+            pid = self.mgr.server_pids(None, accounts=[acc_name]).get(acc_name)
+            if pid and process_registry.kill_many([pid]):
+                self._log(f"\U0001F4A5 Killed stale process for {acc_name} (PID {pid})")
+            self.mgr.drop_instance(acc_name)
 
-        if not have_report:
-            return {"present": [], "missing": [], "unknown": list(self.accounts.keys()),
-                    "error": "No recent heartbeats for this server"}
+            # Clear old heartbeat so get_instance_status hits the grace period
+            # instead of seeing a stale timestamp from the previous process
+            roblox_username = self.mgr.accounts.get(acc_name, {}).get("username", "")
+            if roblox_username:
+                self.mgr.clear_reports(reporter=roblox_username)
 
-        present = []
-        missing = []
-        for acc_name, acc_data in self.accounts.items():
-            username = acc_data.get("username", "").lower()
-            display_name = acc_data.get("display_name", "").lower()
-            if username in in_server or display_name in in_server:
-                present.append(acc_name)
+            result = self.mgr.launch_instance(acc_name, srv_key)
+            if result.get("success"):
+                self._log(f"\u2705 {acc_name} relaunched to {srv_key}", "success")
             else:
-                missing.append(acc_name)
+                self._log(f"\u274C {acc_name} relaunch failed: {result.get('error', 'unknown')}", "error")
+        except Exception as ex:
+            self._log(f"\u274C {acc_name} relaunch crashed: {ex}", "error")
 
-        return {"present": present, "missing": missing, "unknown": [],
-                "players_in_server": sorted(in_server), "server": server_key}
+    def status(self):
+        with self._cond:
+            return {"config": dict(self.cfg, accounts=list(self.cfg["accounts"])),
+                    "queued": list(self._relaunch_q),
+                    "accounts": copy.deepcopy(self.accounts)}
 
-    def get_instance_status(self, name, require_heartbeat=True):
-        """Check if an account's Roblox instance is actually alive and in-game.
-        Returns: (running, pid, server_key)
-        If require_heartbeat=True (default): 'running' requires both process alive AND recent heartbeat
-        If require_heartbeat=False: 'running' only requires process to be alive (for when Lua isn't loaded)"""
-        inst = self.instances.get(name)
-        if not inst:
-            return False, None, None
-        pid = inst.get("pid")
-        srv = inst.get("server_key")
 
-        # Check if process is alive
-        process_alive = False
-        try:
-            p = psutil.Process(pid)
-            process_alive = p.is_running()
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
+# ============================================================================
+# STATUS SNAPSHOT (per-account status computed off the UI thread)
+# ============================================================================
 
-        if not process_alive:
-            return False, pid, srv
+class StatusSnapshot:
+    """Per-account status rows for the account list and bottom bar.
+    refresh_async(on_done) computes them on a worker thread; requests made while
+    a run is in progress collapse into one follow-up run, and every waiting
+    on_done(rows) is called with the result."""
+
+    def __init__(self, mgr):
+        self.mgr = mgr
+        self._lock = threading.Lock()
+        self._running = False
+        self._again = False
+        self._callbacks = []
+        self.rows = {}
+        self.taken_at = 0
+
+    def compute(self):
+        rows = {}
+        for name, acc in list(self.mgr.accounts.items()):
+            running, pid, srv = self.mgr.get_instance_status(name)
+            rows[name] = {
+                "username": acc.get("username", "?"),
+                "display_name": acc.get("display_name", "?"),
+                "running": running,
+                "pid": pid,
+                "server": srv,
+                "default_server": self.mgr.get_default_server(name),
+            }
+        self.rows, self.taken_at = rows, time.time()
+        return rows
+
+    def refresh_async(self, on_done=None):
+        with self._lock:
+            if on_done:
+                self._callbacks.append(on_done)
+            if self._running:
+                self._again = True
+                return
+            self._running = True
+        threading.Thread(target=self._run, daemon=True, name="status-snapshot").start()
 
-        # If we don't require heartbeat, just check process is alive
-        if not require_heartbeat:
-            return True, pid, srv
+    def _run(self):
+        while True:
+            try:
+                rows = self.compute()
+            except Exception as ex:
+                activity.log(f"Snapshot failed: {ex}", "error", tag="STATUS")
+                rows = self.rows
+            with self._lock:
+                callbacks, self._callbacks = self._callbacks, []
+                again, self._again = self._again, False
+                if not again:
+                    self._running = False
+            for fn in callbacks:
+                try:
+                    fn(rows)
+                except Exception:
+                    pass
+            if not again:
+                return
 
-        # Process is alive â€” but is it actually in-game or stuck on disconnect screen?
-        # Check heartbeat freshness: if Lua hasn't reported in, the client is likely dead
-        account_data = self.accounts.get(name, {})
-        roblox_username = account_data.get("username", "")
-        report = self.player_reports.get(roblox_username)
-        
-        # Debug: show what we're looking for vs what we have
-        # print(f"[STATUS] {name}: looking for heartbeat from '{roblox_username}', reports={list(self.player_reports.keys())}")
-        
-        if report:
-            age = time.time() - report["timestamp"]
-            if age < 60:  # Heartbeat within last 60s = definitely alive
-                return True, pid, srv
-            # Stale heartbeat = client probably disconnected but process still running
-            return False, pid, srv
 
-        # No heartbeat at all â€” check how long ago we launched
-        launched_at = inst.get("launched_at", 0)
-        age_since_launch = time.time() - launched_at
-        if age_since_launch < 90:
-            # Launched less than 90s ago â€” still loading, give it time
-            return True, pid, srv
+# ============================================================================
+# WIRE FORMATS (content negotiation for API responses)
+# ============================================================================
+# json  - the default, unchanged
+# terse - JSON with short field names, no nulls, no whitespace. Keys of the
+#         name-keyed maps (TERSE_MAPS, or a whole /players body) are kept as-is
+# bin   - length-prefixed binary: one type byte per value, then
+#         "i" int64 | "d" float64 | "s"/"l"/"m" uint32 length + payload |
+#         "N" null | "T"/"F" booleans. Maps are key string + value pairs.
+# Picked with ?fmt=json|terse|bin or an Accept header naming one of WIRE_TYPES.
+
+WIRE_TYPES = {
+    "json": "application/json",
+    "terse": "application/vnd.rm.terse+json",
+    "bin": "application/vnd.rm.bin",
+}
 
-        # Process alive, no heartbeat, been a while since launch = stuck/disconnected
-        return False, pid, srv
+TERSE_KEYS = {
+    "accounts": "a", "username": "u", "display_name": "dn", "running": "r", "pid": "p",
+    "server": "s", "servers": "sv", "players": "pl", "reporters": "rp", "jobId": "j",
+    "stale": "st", "status": "x", "heartbeats": "hb", "timestamp": "t", "missing": "m",
+    "present": "pr", "unknown": "uk", "error": "e", "default_server": "ds",
+}
+TERSE_MAPS = ("accounts", "players", "servers")  # fields whose dict keys are account/server names
+
+
+def _terse(data, keyed=False):
+    """Shorten field names; a `keyed` dict is a name -> record map, so only its values are."""
+    if isinstance(data, dict):
+        if keyed:
+            return {k: _terse(v) for k, v in data.items() if v is not None}
+        return {TERSE_KEYS.get(k, k): _terse(v, k in TERSE_MAPS) for k, v in data.items() if v is not None}
+    if isinstance(data, (list, tuple, set, frozenset)):
+        return [_terse(v) for v in data]
+    return data
+
+
+def _pack(data, out):
+    if data is None:
+        out.append(b"N")
+    elif data is True or data is False:
+        out.append(b"T" if data else b"F")
+    elif isinstance(data, int) and -(1 << 63) <= data < (1 << 63):
+        out.append(b"i" + struct.pack("<q", data))
+    elif isinstance(data, float):
+        out.append(b"d" + struct.pack("<d", data))
+    elif isinstance(data, dict):
+        out.append(b"m" + struct.pack("<I", len(data)))
+        for k, v in data.items():
+            key = str(k).encode()
+            out.append(struct.pack("<I", len(key)) + key)
+            _pack(v, out)
+    elif isinstance(data, (list, tuple, set, frozenset)):
+        out.append(b"l" + struct.pack("<I", len(data)))
+        for v in data:
+            _pack(v, out)
+    else:
+        raw = str(data).encode()
+        out.append(b"s" + struct.pack("<I", len(raw)) + raw)
+
+
+def wire_encode(data, fmt="json", keyed=False):
+    """Serialize an API response body in the given wire format. keyed=True marks
+    a body that is itself a name-keyed map (e.g. /players)."""
+    if fmt == "terse":
+        return json.dumps(_terse(data, keyed), default=str, separators=(",", ":")).encode()
+    if fmt == "bin":
+        out = []
+        _pack(data, out)
+        return b"".join(out)
+    return json.dumps(data, default=str).encode()
+
+
+def wire_decode(raw, fmt="json"):
+    """Inverse of wire_encode (terse keys stay short). For clients and tools."""
+    if fmt != "bin":
+        return json.loads(raw)
+    view = memoryview(raw)
+
+    def read(pos):
+        tag = view[pos:pos + 1].tobytes()
+        pos += 1
+        if tag == b"N":
+            return None, pos
+        if tag in (b"T", b"F"):
+            return tag == b"T", pos
+        if tag == b"i":
+            return struct.unpack_from("<q", view, pos)[0], pos + 8
+        if tag == b"d":
+            return struct.unpack_from("<d", view, pos)[0], pos + 8
+        (n,) = struct.unpack_from("<I", view, pos)
+        pos += 4
+        if tag == b"s":
+            return view[pos:pos + n].tobytes().decode(), pos + n
+        if tag == b"l":
+            items = []
+            for _ in range(n):
+                v, pos = read(pos)
+                items.append(v)
+            return items, pos
+        if tag == b"m":
+            out = {}
+            for _ in range(n):
+                (kn,) = struct.unpack_from("<I", view, pos)
+                key = view[pos + 4:pos + 4 + kn].tobytes().decode()
+                out[key], pos = read(pos + 4 + kn)
+            return out, pos
+        raise ValueError(f"Bad wire tag {tag!r} at {pos - 1}")
+
+    return read(0)[0]
 
 
 # ============================================================================
@@ -1285,34 +3730,177 @@ class AccountManager:
 # ============================================================================
 
 manager = AccountManager()
+atexit.register(lambda: manager.db and manager.db.close())
 
 # Load saved servers from data file
 load_servers()
+if manager.db:
+    manager.db.sync_servers(SERVERS)
+
+# One process snapshot loop for the whole manager; re-attach restored instances to it
+process_registry.start()
+for _name, _inst in list(manager.instances.items()):
+    if not process_registry.claim(_inst["pid"], _name):
+        manager.drop_instance(_name)
 
 # Hold the Roblox singleton mutex/event at startup so multi-instance always works
 ensure_multi_instance()
 
+# Resolve RobloxPlayerBeta.exe now so the first launch doesn't pay for it
+roblox_resolver.preload()
+
+# Keep privateServerIds for every configured place resolved ahead of shutdowns
+private_servers.start(lambda: manager.get_cookie(next(iter(manager.accounts), None)))
+
+batch_launcher = BatchLauncher(manager)
+restart_jobs = RestartScheduler(manager)
+supervisor = Supervisor(manager)
+supervisor.start()
+status_snapshot = StatusSnapshot(manager)
+
+# (view, fmt) -> (etag, encoded body) for GET /status and /players. The tag is
+# manager.state_version + the presence version plus an API_ETAG_WINDOW time
+# bucket: the account/instance/report mutators bump the former, and the bucket
+# bounds how long age-based fields (stale flags, HTTP counters) can lag behind.
+_view_cache = {}
+_view_cache_lock = threading.Lock()
+
+
+def _num_param(value, default=None, cast=float, minimum=0):
+    """A numeric query/body parameter, or `default` if absent. Raises ValueError
+    for non-numbers, booleans, NaN/inf and values below `minimum`."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        raise ValueError(value)
+    number = cast(value)
+    if not minimum <= number < float("inf"):
+        raise ValueError(value)
+    return number
+
 
 class APIHandler(http.server.BaseHTTPRequestHandler):
     def log_message(self, fmt, *args):
         pass
 
-    def _cors(self):
+    def _cors(self, content_type="application/json"):
         self.send_header("Access-Control-Allow-Origin", "*")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, DELETE, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type")
-        self.send_header("Content-Type", "application/json")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, If-None-Match")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        self.send_header("Content-Type", content_type)
 
     def do_OPTIONS(self):
         self.send_response(200)
         self._cors()
         self.end_headers()
 
-    def _respond(self, code, data):
+    def _wire_format(self):
+        """?fmt= wins, then the first WIRE_TYPES media type named in Accept, else json."""
+        fmt = getattr(self, "_query", {}).get("fmt")
+        if fmt in WIRE_TYPES:
+            return fmt
+        accept = self.headers.get("Accept", "")
+        for name, ctype in WIRE_TYPES.items():
+            if name != "json" and ctype in accept:
+                return name
+        return "json"
+
+    def _send_body(self, code, body, fmt, etag=None):
         self.send_response(code)
-        self._cors()
+        self._cors(WIRE_TYPES[fmt])
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(json.dumps(data, default=str).encode())
+        self.wfile.write(body)
+
+    def _respond(self, code, data):
+        fmt = self._wire_format()
+        self._send_body(code, wire_encode(data, fmt), fmt)
+
+    def _respond_view(self, view, build, keyed=False):
+        """Respond with a cacheable view: 304 on a matching If-None-Match, else the
+        cached encoding for this state version / time bucket, else build and encode."""
+        fmt = self._wire_format()
+        etag = (f'"{view}.{fmt}.{manager.state_version}.{manager.presence.version}.'
+                f'{int(time.time() // API_ETAG_WINDOW)}"')
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self._cors(WIRE_TYPES[fmt])
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with _view_cache_lock:
+            cached = _view_cache.get((view, fmt))
+        if cached and cached[0] == etag:
+            body = cached[1]
+        else:
+            body = wire_encode(build(), fmt, keyed)
+            with _view_cache_lock:
+                _view_cache[(view, fmt)] = (etag, body)
+        self._send_body(200, body, fmt, etag)
+
+    def _stream_events(self, query):
+        """GET /events â€” Server-Sent Events. Resumes after Last-Event-ID (or ?since=)."""
+        try:
+            cursor = _num_param(self.headers.get("Last-Event-ID") or query.get("since"), events.version, int)
+        except ValueError:
+            self._respond(400, {"error": "Last-Event-ID / since must be an event id >= 0"})
+            return
+        if not self._take_slot("streams", EVENT_STREAMS_MAX):
+            self._respond(503, {"error": "Too many event streams; use /events/poll"})
+            return
+        try:
+            types = set(query["types"].split(",")) if query.get("types") else None
+            self.send_response(200)
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            self.wfile.write(f"retry: 2000\n: cursor {cursor}\n\n".encode())
+            self.wfile.flush()
+            while True:
+                batch, reset, latest = events.wait(cursor, 15, types)
+                out = []
+                if reset:
+                    out.append(f"event: reset\ndata: {json.dumps({'cursor': latest})}\n\n")
+                for e in batch:
+                    out.append(f"id: {e['id']}\nevent: {e['type']}\ndata: {json.dumps(e, default=str)}\n\n")
+                if not out:
+                    out.append(": keepalive\n\n")
+                self.wfile.write("".join(out).encode())
+                self.wfile.flush()
+                cursor = batch[-1]["id"] if batch else latest
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            self._free_slot("streams")
+
+    def _take_slot(self, kind, limit):
+        """Reserve an SSE ("streams") or long-poll ("polls") slot. Both park an API
+        worker, so together they never hold more than the server's blocking_max
+        workers - the rest stay free for heartbeats."""
+        with events._cond:
+            held = events.streams + events.polls
+            if getattr(events, kind) >= limit or held >= self.server.blocking_max:
+                return False
+            setattr(events, kind, getattr(events, kind) + 1)
+            return True
+
+    def _free_slot(self, kind):
+        with events._cond:
+            setattr(events, kind, getattr(events, kind) - 1)
+
+    def _route(self):
+        """Split the request path into (path, parts, query)."""
+        url = urllib.parse.urlsplit(self.path)
+        path = url.path.strip("/")
+        self._query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        return path, path.split("/"), self._query
 
     def _read_body(self):
         length = int(self.headers.get("Content-Length", 0))
@@ -1323,22 +3911,24 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
             return {}
 
     def do_GET(self):
-        path = self.path.strip("/")
-        parts = path.split("/")
+        path, parts, query = self._route()
 
         if path == "status":
-            st = {}
-            for n, a in manager.accounts.items():
-                running, pid, srv = manager.get_instance_status(n)
-                st[n] = {"username": a.get("username", "?"), "display_name": a.get("display_name", "?"),
-                         "running": running, "pid": pid, "server": srv}
-            players = manager.get_server_players()
-            self._respond(200, {
-                "status": "running", "accounts": st,
-                "servers": {k: v["name"] for k, v in SERVERS.items()},
-                "players": players,
-                "heartbeats": len(manager.player_reports),
-            })
+            def build():
+                st = {}
+                for n, a in manager.accounts.items():
+                    running, pid, srv = manager.get_instance_status(n)
+                    st[n] = {"username": a.get("username", "?"), "display_name": a.get("display_name", "?"),
+                             "running": running, "pid": pid, "server": srv}
+                return {
+                    "status": "running", "accounts": st,
+                    "servers": {k: v["name"] for k, v in SERVERS.items()},
+                    "players": manager.get_server_players(),
+                    "heartbeats": len(manager.player_reports),
+                    "http": dict(http_client.stats),
+                    "csrf": manager.csrf_status(),
+                }
+            self._respond_view("status", build)
             return
         if len(parts) == 2 and parts[0] == "shutdown":
             self._respond(200, manager.shutdown_server(None, parts[1]))
@@ -1351,20 +3941,79 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
             self._respond(200, manager.launch_instance(parts[1], parts[2] if len(parts) > 2 else None))
             return
         if path == "kill-mutex":
-            for p in psutil.process_iter(["pid", "name"]):
-                try:
-                    if p.info["name"] and "RobloxPlayerBeta" in p.info["name"]:
-                        close_singleton_from_process(p.info["pid"])
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            self._respond(200, {"status": "ok"})
+            closed = close_singletons(process_registry.pids(fresh=True))
+            self._respond(200, {"status": "ok", "closed": closed})
             return
 
         # GET /players â€” all player reports from Lua heartbeats
         # GET /players/<server> â€” players in a specific server
         if parts[0] == "players":
             server_key = parts[1] if len(parts) >= 2 else None
-            self._respond(200, manager.get_server_players(server_key))
+            self._respond_view(path, lambda: manager.get_server_players(server_key), keyed=True)
+            return
+
+        # GET /events â€” SSE stream of instance/heartbeat/launch/restart/... events
+        # GET /events/poll?since=<id>&timeout=<s>&types=a,b â€” long-poll with a resume cursor
+        if path == "events":
+            self._stream_events(query)
+            return
+        if path == "events/poll":
+            try:
+                since = _num_param(query.get("since"), 0, int)
+                timeout = min(_num_param(query.get("timeout"), 25), 60)
+            except ValueError:
+                self._respond(400, {"error": "since must be an event id >= 0 and timeout seconds >= 0"})
+                return
+            types = set(query["types"].split(",")) if query.get("types") else None
+            if not self._take_slot("polls", EVENT_POLLS_MAX):
+                self._respond(503, {"error": "Too many long-polls; retry shortly"})
+                return
+            try:
+                batch, reset, latest = events.wait(since, timeout, types)
+            finally:
+                self._free_slot("polls")
+            self._respond(200, {"events": batch, "reset": reset,
+                                "cursor": batch[-1]["id"] if batch else latest})
+            return
+
+        # GET /logs?since=<seq>&limit=<n>&level=<min> â€” log entries after a sequence number
+        if path == "logs":
+            try:
+                since, limit = _num_param(query.get("since"), 0, int), _num_param(query.get("limit"), 200, int)
+            except ValueError:
+                self._respond(400, {"error": "since must be a sequence number >= 0 and limit an integer >= 0"})
+                return
+            self._respond(200, {"entries": activity.entries(since, limit, query.get("level")),
+                                "last": activity.last_seq()})
+            return
+
+        # GET /servers â€” full server configs
+        if path == "servers":
+            self._respond(200, SERVERS)
+            return
+
+        # GET /settings â€” UI/enforcement settings (watchdog settings live under /supervisor)
+        if path == "settings":
+            self._respond(200, load_ui_settings())
+            return
+
+        # GET /supervisor â€” watchdog config and per-account state
+        if path == "supervisor":
+            self._respond(200, supervisor.status())
+            return
+
+        # GET /jobs â€” recent restart jobs; GET /jobs/<id> â€” one job's progress
+        if parts[0] == "jobs":
+            if len(parts) == 1:
+                self._respond(200, {"jobs": restart_jobs.list()})
+                return
+            job = restart_jobs.get(parts[1])
+            self._respond(200 if job else 404, job or {"error": "Unknown job"})
+            return
+
+        # GET /batch â€” progress of the current/last batch launch
+        if path == "batch":
+            self._respond(200, batch_launcher.status())
             return
 
         # GET /missing/<server> â€” which managed accounts are NOT in this server
@@ -1375,8 +4024,7 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
         self._respond(200, {"info": "Roblox Manager API", "servers": list(SERVERS.keys())})
 
     def do_POST(self):
-        path = self.path.strip("/")
-        parts = path.split("/")
+        path, parts, query = self._route()
         data = self._read_body()
         game_id = data.get("gameId")
         delay = data.get("delay", 5)
@@ -1407,12 +4055,38 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
             server = data.get("server", "")
             missing_info = {}
             if server:
-                missing_info = manager.get_missing_accounts(server)
+                missing_info = manager.heartbeat_missing(server)
             result["missing"] = missing_info.get("missing", [])
             result["present"] = missing_info.get("present", [])
             self._respond(200, result)
             return
 
+        # POST /heartbeat/batch â€” many reporters in one request
+        # Body: {reports: [{username, players, jobId, server}, ...]}
+        #   or  {server, jobId, players, reporters: [...]}  (one list seen by several clients)
+        # Reply: per-server missing list once, plus per-reporter changes since its last batch reply
+        if path == "heartbeat/batch":
+            reports = list(data.get("reports") or [])
+            if data.get("reporters"):
+                reports += [{"username": u, "players": data.get("players", []), "jobId": data.get("jobId", ""),
+                             "server": data.get("server", "")} for u in data["reporters"]]
+            accepted, merged, servers = manager.process_heartbeat_batch(reports)
+            by_server = {}
+            for srv in servers:
+                if srv:
+                    info = manager.heartbeat_missing(srv)
+                    by_server[srv] = {"missing": info.get("missing", []), "present": len(info.get("present", []))}
+            diff = {}
+            for r in reports:
+                srv = r.get("server", "")
+                if r.get("username") and srv in by_server:
+                    added, cleared = manager.heartbeat_diff(r["username"], srv, by_server[srv]["missing"])
+                    if added or cleared:
+                        diff[r["username"]] = {"server": srv, "missing": added, "back": cleared}
+            self._respond(200, {"ok": True, "accepted": accepted, "merged": merged,
+                                "servers": by_server, "diff": diff})
+            return
+
         # POST /shutdown/<server> â€” shutdown only
         if len(parts) >= 2 and parts[0] == "shutdown":
             server_key = parts[1]
@@ -1435,103 +4109,94 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
             server_key = parts[-1]  # last part is always the server
             specific_account = parts[1] if len(parts) >= 3 else None
 
-            # Attempt shutdown (best-effort â€” may 404 if not game owner)
-            shutdown_acc = specific_account or next(iter(manager.accounts), None)
-            shutdown_result = manager.shutdown_server(shutdown_acc, server_key, game_id)
-            shutdown_ok = shutdown_result.get("status") == 200 or "error" not in shutdown_result
-            if not shutdown_ok:
-                print(f"[API] Restart {server_key}: shutdown failed (this is OK â€” will kill processes instead)")
-                print(f"[API]   Private server will auto-close ~30s after all players leave")
-            else:
-                print(f"[API] Restart {server_key}: shutdown successful")
-
-            # Figure out which accounts to relaunch
-            if specific_account:
-                relaunch_accounts = [specific_account]
-            else:
-                # Relaunch all accounts that had running instances
-                relaunch_accounts = []
-                for acc_name in manager.accounts:
-                    running, pid, srv = manager.get_instance_status(acc_name)
-                    if running or srv == server_key:
-                        relaunch_accounts.append(acc_name)
-                # Fallback: relaunch all accounts
-                if not relaunch_accounts:
-                    relaunch_accounts = list(manager.accounts.keys())
-
-            # â”€â”€ KILL ALL ROBLOX PROCESSES IMMEDIATELY â”€â”€
-            # Do this BEFORE responding so the disconnected clients close right away
-            # and don't pile up as stale windows
-            print(f"[RESTART] Killing all Roblox processes immediately...")
-            killed = 0
-            for p in psutil.process_iter(["pid", "name"]):
-                try:
-                    if p.info["name"] and "RobloxPlayerBeta" in p.info["name"]:
-                        p.kill()
-                        killed += 1
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            print(f"[RESTART] Killed {killed} Roblox process(es)")
-            # Clear tracked instances since we just killed everything
-            for acc_name in relaunch_accounts:
-                manager.instances.pop(acc_name, None)
-
+            # Every executor in the server calls this when the boss dies - one job per
+            # server does the shutdown/kill/relaunch, duplicates attach to it
+            job, duplicate = restart_jobs.submit(server_key, game_id, delay, specific_account,
+                                                 sweep=data.get("sweep"))
             self._respond(200, {
-                "shutdown": shutdown_result,
-                "shutdown_ok": shutdown_ok,
-                "killed": killed,
+                "accepted": True,
+                "job": job["id"],
+                "duplicate": duplicate,
+                "status": job["state"],
+                "shutdown": job["shutdown"] or "pending",
                 "server": SERVERS.get(server_key, {}).get("name", "unknown"),
                 "gameId": game_id,
-                "relaunching": relaunch_accounts,
+                "relaunching": job["accounts"],
             })
+            return
 
-            # Relaunch in background after delay, then verify all made it in
-            def delayed_relaunch():
-                # Clear old heartbeats for this server so we get fresh ones
-                for reporter in list(manager.player_reports.keys()):
-                    if manager.player_reports[reporter].get("server") == server_key:
-                        del manager.player_reports[reporter]
-
-                # Wait for private server to auto-close after all players left
-                actual_delay = delay if shutdown_ok else max(delay, 15)
-                print(f"[RESTART] Waiting {actual_delay}s for server to clear (shutdown_ok={shutdown_ok})...")
-                time.sleep(actual_delay)
-
-                # Relaunch all accounts
-                for acc_name in relaunch_accounts:
-                    result = manager.launch_instance(acc_name, server_key)
-                    print(f"[RESTART] Relaunched {acc_name} â†’ {server_key}: {result}")
-                    time.sleep(2)  # Stagger launches
-
-                # Verify phase: wait for heartbeats then check who's missing
-                print(f"[VERIFY] Waiting 45s for all accounts to join {server_key}...")
-                time.sleep(45)
-
-                missing_info = manager.get_missing_accounts(server_key, max_age=60)
-                missing = missing_info.get("missing", [])
-                present = missing_info.get("present", [])
-                print(f"[VERIFY] {server_key}: {len(present)} present, {len(missing)} missing")
-
-                if missing:
-                    print(f"[VERIFY] Missing accounts: {missing} â€” relaunching...")
-                    for acc_name in missing:
-                        # Kill stale process if any
-                        inst = manager.instances.get(acc_name)
-                        if inst and inst.get("pid"):
-                            try:
-                                p = psutil.Process(inst["pid"])
-                                if p.is_running():
-                                    p.kill()
-                                    time.sleep(0.5)
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                pass
-                        result = manager.launch_instance(acc_name, server_key)
-                        print(f"[VERIFY] Re-relaunched {acc_name} â†’ {server_key}: {result}")
-                        time.sleep(2)
-                else:
-                    print(f"[VERIFY] All accounts confirmed in {server_key}!")
+        # POST /servers â€” {name, link_code, place_id?}
+        if path == "servers":
+            name, link_code = data.get("name"), data.get("link_code")
+            if not name or not link_code:
+                self._respond(400, {"error": "Need name and link_code"})
+                return
+            key = add_server(name, link_code, data.get("place_id"))
+            activity.log(f"Added server: {name} ({key})", "success")
+            self._respond(200, {"added": key, "server": SERVERS[key]})
+            return
+
+        # POST /accounts/<name>/server â€” {server: key or ""} assigns the account's default server
+        if len(parts) == 3 and parts[0] == "accounts" and parts[2] == "server":
+            srv = data.get("server") or ""
+            if parts[1] not in manager.accounts or (srv and srv not in SERVERS):
+                self._respond(404, {"error": "Unknown account or server"})
+                return
+            manager.set_default_server(parts[1], srv)
+            self._respond(200, {"account": parts[1], "server": srv})
+            return
+
+        # POST /settings â€” {privateServerOnly?, forcedServer?, launchMode?: "shell"|"direct"}
+        if path == "settings":
+            if "launchMode" in data:
+                if not manager.set_launch_mode(data["launchMode"]):
+                    self._respond(400, {"error": f"Unknown launchMode: {data['launchMode']}",
+                                        "modes": list(LAUNCHERS)})
+                    return
+            for key in ("privateServerOnly", "forcedServer", "launchMode"):
+                if key in data:
+                    store.set(("ui_settings", key), data[key])
+            self._respond(200, load_ui_settings())
+            return
+
+        # POST /supervisor â€” {enabled?, interval?, server?, accounts?: [...], requireHeartbeat?}
+        # POST /supervisor/check/<account> â€” check an account now instead of at its next slot
+        if path == "supervisor":
+            if data.get("server") is not None and data["server"] not in SERVERS:
+                self._respond(400, {"error": f"Unknown server: {data['server']}"})
+                return
+            try:
+                interval = _num_param(data.get("interval"))
+            except (TypeError, ValueError):
+                self._respond(400, {"error": f"interval must be a number of seconds, got {data['interval']!r}"})
+                return
+            cfg = supervisor.configure(enabled=data.get("enabled"), interval=interval,
+                                       server=data.get("server"), accounts=data.get("accounts"),
+                                       require_heartbeat=data.get("requireHeartbeat"))
+            self._respond(200, {"config": cfg})
+            return
+        if len(parts) == 3 and parts[:2] == ["supervisor", "check"]:
+            ok = supervisor.check_now(parts[2])
+            self._respond(200 if ok else 404, {"checking": parts[2]} if ok else {"error": "Not watched"})
+            return
 
-            threading.Thread(target=delayed_relaunch, daemon=True).start()
+        # POST /batch/launch â€” {accounts: [...], server?: key, pacing?: seconds}
+        # Without "server", each account goes to its assigned default server
+        if path == "batch/launch":
+            names = data.get("accounts") or list(manager.accounts.keys())
+            unknown = [n for n in names if n not in manager.accounts]
+            if unknown:
+                self._respond(400, {"error": f"Unknown account(s): {', '.join(unknown)}"})
+                return
+            try:
+                pacing = _num_param(data.get("pacing"))
+            except (TypeError, ValueError):
+                self._respond(400, {"error": f"pacing must be a number of seconds >= 0, got {data['pacing']!r}"})
+                return
+            srv = data.get("server")
+            targets = [(n, srv if srv else manager.launch_target(n)) for n in names]
+            result = batch_launcher.start(targets, pacing=pacing, on_progress=log_batch_progress)
+            self._respond(409 if "error" in result else 200, result)
             return
 
         # POST /launch/<account>/<server>
@@ -1541,8 +4206,19 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
         self._respond(404, {"error": "Unknown"})
 
     def do_DELETE(self):
-        path = self.path.strip("/")
-        parts = path.split("/")
+        path, parts, query = self._route()
+        if path == "logs":
+            activity.clear()
+            self._respond(200, {"cleared": True})
+            return
+        if len(parts) == 2 and parts[0] == "servers":
+            if parts[1] not in SERVERS:
+                self._respond(404, {"error": "not found"})
+                return
+            remove_server(parts[1])
+            activity.log(f"Removed server: {parts[1]}", "warn")
+            self._respond(200, {"removed": parts[1]})
+            return
         if len(parts) == 2 and parts[0] == "accounts":
             removed = manager.remove_account(parts[1])
             self._respond(200 if removed else 404,
@@ -1551,15 +4227,126 @@ class APIHandler(http.server.BaseHTTPRequestHandler):
         self._respond(404, {"error": "Unknown"})
 
 
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTPServer that hands each connection to a bounded worker pool, so one slow
+    management call can't hold up executor heartbeats. SSE streams and long-polls
+    together may park at most `blocking_max` (half) of the workers."""
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_cls, workers=API_WORKERS):
+        super().__init__(server_address, handler_cls)
+        self.blocking_max = workers // 2
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def make_api_server(port=PORT, workers=API_WORKERS):
+    return PooledHTTPServer(("127.0.0.1", port), APIHandler, workers=workers)
+
+
 def start_api_server():
-    server = http.server.HTTPServer(("127.0.0.1", PORT), APIHandler)
+    server = make_api_server()
     server.serve_forever()
 
 
+def start_backend():
+    """Start the API server thread. Everything else in the backend (account
+    manager, persistence, process registry, supervisor) is already running
+    once the module is imported."""
+    api_thread = threading.Thread(target=start_api_server, daemon=True, name="api")
+    api_thread.start()
+    activity.log(f"[+] API on http://localhost:{PORT}", "info")
+    return api_thread
+
+
 # ============================================================================
 # DESKTOP UI
 # ============================================================================
 
+def load_tk():
+    """Import tkinter on demand so --headless never loads Tk."""
+    global tk, ttk, messagebox, simpledialog
+    import tkinter as tk
+    from tkinter import ttk, messagebox, simpledialog
+
+
+class AccountRow:
+    """One account card in the virtualized account list. Rows are pooled and
+    re-bound to whichever account scrolls into their slot; widgets are only
+    reconfigured when the bound account's displayed data changes."""
+
+    HEIGHT = 64
+
+    def __init__(self, app, canvas):
+        self.canvas = canvas
+        self.name = None
+        self.key = None
+        self.card = app._card(canvas)
+        self.cb = tk.Checkbutton(self.card, bg=Theme.bg_card, activebackground=Theme.bg_card,
+                                 selectcolor=Theme.bg_input, command=app._update_sel_count)
+        self.cb.pack(side="left", padx=(0, 6))
+        left = tk.Frame(self.card, bg=Theme.bg_card)
+        left.pack(side="left", fill="x", expand=True)
+        self.title = tk.Label(left, font=("Consolas", 11, "bold"), bg=Theme.bg_card, anchor="w")
+        self.title.pack(anchor="w")
+        self.detail = tk.Label(left, font=("Consolas", 9), bg=Theme.bg_card, fg=Theme.text_muted, anchor="w")
+        self.detail.pack(anchor="w")
+        right = tk.Frame(self.card, bg=Theme.bg_card)
+        right.pack(side="right")
+        app._btn(right, "\u25B6", lambda: app._quick_launch(self.name), color=Theme.green_dim, small=True).pack(side="left", padx=2)
+        app._btn(right, "\u270F", lambda: app._edit_account(self.name), color=Theme.blue_dim, small=True).pack(side="left", padx=2)
+        app._btn(right, "\u2715", lambda: app._remove_acc(self.name), color=Theme.red_dim, small=True).pack(side="left", padx=2)
+        self.item = canvas.create_window(0, 0, window=self.card, anchor="nw")
+        # Wheel over a card scrolls the list, same as over the canvas
+        for w in (self.card, left, self.title, self.detail):
+            app._bind_account_wheel(w)
+
+    def place(self, y, width):
+        self.canvas.coords(self.item, 0, y)
+        self.canvas.itemconfigure(self.item, width=width, height=self.HEIGHT - 6, state="normal")
+
+    def hide(self):
+        self.canvas.itemconfigure(self.item, state="hidden")
+        self.key = None
+
+    def update(self, name, st, sel_var):
+        running, pid, srv = st.get("running"), st.get("pid"), st.get("server")
+        default_srv = st.get("default_server")
+        key = (name, running, pid, srv, default_srv, st.get("username"), st.get("display_name"),
+               SERVERS.get(default_srv, {}).get("name"))
+        if key == self.key:
+            return
+        self.key, self.name = key, name
+        self.cb.configure(variable=sel_var)
+        self.title.configure(text=f"{'ðŸŸ¢' if running else 'ðŸ‘¤'}  {name}",
+                             fg=Theme.green if running else Theme.text)
+        det = f"{st.get('username', '?')} \u00b7 {st.get('display_name', '?')}"
+        if running and pid:
+            det += f" \u00b7 PID {pid}"
+        # Show assigned server
+        if default_srv and default_srv in SERVERS:
+            det += f" \u00b7 \U0001F4E1 {SERVERS[default_srv]['name']}"
+        elif default_srv == "":
+            det += f" \u00b7 \U0001F310 Public"
+        if running and srv:
+            det += f" \u00b7 on {srv}"
+        self.detail.configure(text=det)
+
+
 class RobloxManagerApp:
     def __init__(self, root):
         self.root = root
@@ -1579,8 +4366,11 @@ class RobloxManagerApp:
             except Exception:
                 pass
 
-        self.logs = []
-        self.auto_restart_job = None
+        # Logs tab: entries queued by _on_log_entry, appended in batches by _flush_logs
+        self._log_pending = deque()
+        self._log_flush_lock = threading.Lock()
+        self._log_flush_scheduled = False
+        self._log_dirty = True
         self.watchdog_accounts = {}  # {account_name: server_key} - accounts being watched
 
         # Load persisted settings (watchdog state, etc.)
@@ -1588,6 +4378,7 @@ class RobloxManagerApp:
         self.settings = {
             "privateServerOnly": saved.get("privateServerOnly", False),
             "forcedServer": saved.get("forcedServer", "farm"),
+            "launchMode": saved.get("launchMode", LAUNCH_BACKEND),
             "autoRejoin": saved.get("autoRejoin", False),
             "autoRejoinInterval": saved.get("autoRejoinInterval", 30),
             "autoRejoinServer": saved.get("autoRejoinServer", "farm"),
@@ -1604,6 +4395,8 @@ class RobloxManagerApp:
 
         # Apply saved settings to UI widgets (checkboxes, dropdowns, etc.)
         self._apply_persisted_settings_to_ui()
+        supervisor.subscribe(self._on_supervisor_event)
+        activity.subscribe(self._on_log_entry)
 
         self.log("Manager started")
         self.log(f"API server on http://localhost:{PORT}")
@@ -1612,21 +4405,53 @@ class RobloxManagerApp:
     # Logging
     # ----------------------------------------------------------------
     def log(self, text, level="info"):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.logs.append((ts, text, level))
-        if len(self.logs) > 300:
-            self.logs = self.logs[-200:]
-        if hasattr(self, "log_text") and self.current_tab.get() == "logs":
-            self._update_log_display()
+        activity.log(text, level)
+
+    def _on_log_entry(self, entry):
+        """Activity log listener (any thread): queue the line, flush at most once per frame."""
+        if ActivityLog.LEVELS.get(entry["level"], 20) < ActivityLog.LEVELS[LOG_UI_LEVEL]:
+            return
+        self._log_pending.append(entry)
+        with self._log_flush_lock:
+            if self._log_flush_scheduled:
+                return
+            self._log_flush_scheduled = True
+        self.root.after(LOG_UI_FRAME_MS, self._flush_logs)
+
+    def _flush_logs(self):
+        with self._log_flush_lock:
+            self._log_flush_scheduled = False
+        batch = []
+        while self._log_pending:
+            batch.append(self._log_pending.popleft())
+        if not batch or not hasattr(self, "log_text"):
+            return
+        if self.current_tab.get() != "logs":
+            # Redrawn from the ring buffer when the tab is opened
+            self._log_dirty = True
+            return
+        self._append_log_lines(batch)
+
+    def _append_log_lines(self, batch):
+        self.log_text.configure(state="normal")
+        for e in batch:
+            self.log_text.insert("end", f"{e['time']}  ", "dim")
+            self.log_text.insert("end", f"{e['text']}\n", e["level"] if e["level"] != "debug" else "dim")
+        # Keep the widget bounded: drop lines from the top
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_UI_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.configure(state="disabled")
+        self.log_text.see("end")
 
     def _update_log_display(self):
+        """Full redraw from the ring buffer (tab switch / Clear)."""
+        self._log_pending.clear()
+        self._log_dirty = False
         self.log_text.configure(state="normal")
         self.log_text.delete("1.0", "end")
-        for ts, txt, lvl in self.logs[-100:]:
-            self.log_text.insert("end", f"{ts}  ", "dim")
-            self.log_text.insert("end", f"{txt}\n", lvl)
         self.log_text.configure(state="disabled")
-        self.log_text.see("end")
+        self._append_log_lines(activity.entries(limit=LOG_UI_LINES, level=LOG_UI_LEVEL))
 
     # ----------------------------------------------------------------
     # UI BUILD
@@ -1690,7 +4515,7 @@ class RobloxManagerApp:
         for c in self.content.winfo_children():
             c.pack_forget()
         self.tab_frames[key].pack(fill="both", expand=True, padx=12, pady=10)
-        if key == "logs":
+        if key == "logs" and self._log_dirty:
             self._update_log_display()
         elif key == "accounts":
             self._refresh_accounts()
@@ -1726,20 +4551,22 @@ class RobloxManagerApp:
         # Selection state: {account_name: BooleanVar}
         self.acc_selection = {}
 
-        # Scrollable list
-        canvas = tk.Canvas(f, bg=Theme.bg, highlightthickness=0)
-        scrollbar = tk.Scrollbar(f, orient="vertical", command=canvas.yview)
-        self.acc_inner = tk.Frame(canvas, bg=Theme.bg)
-        self.acc_inner.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=self.acc_inner, anchor="nw", tags="inner")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        def on_canvas_resize(e):
-            canvas.itemconfig("inner", width=e.width)
-        canvas.bind("<Configure>", on_canvas_resize)
-
-        canvas.pack(side="top", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # Virtualized list: only the rows in (or near) the viewport exist as widgets,
+        # recycled from a pool as the list scrolls
+        self.acc_canvas = tk.Canvas(f, bg=Theme.bg, highlightthickness=0)
+        self.acc_scrollbar = tk.Scrollbar(f, orient="vertical", command=self._acc_yview)
+        self.acc_canvas.configure(yscrollcommand=self.acc_scrollbar.set)
+        self.acc_canvas.bind("<Configure>", lambda e: self._render_account_rows(resized=True))
+        self._bind_account_wheel(self.acc_canvas)
+        self.acc_empty = self.acc_canvas.create_text(10, 20, anchor="nw", text="", font=("Consolas", 10),
+                                                     fill=Theme.text_dim)
+        self.acc_names = []      # account order as displayed
+        self.acc_status = {}     # latest StatusSnapshot rows
+        self.acc_visible = {}    # {row index: AccountRow}
+        self.acc_pool = []       # hidden AccountRows ready for reuse
+
+        self.acc_canvas.pack(side="top", fill="both", expand=True)
+        self.acc_scrollbar.pack(side="right", fill="y")
 
         # Launch Selected bar
         self.launch_bar = tk.Frame(f, bg=Theme.bg_card, padx=10, pady=6)
@@ -1773,66 +4600,59 @@ class RobloxManagerApp:
         self._btn(br, "\U0001F4DD Paste Cookie", self._paste_cookie, color=Theme.accent_dim).pack(side="left", expand=True, fill="x", padx=(3, 0))
 
     def _refresh_accounts(self):
-        for w in self.acc_inner.winfo_children():
-            w.destroy()
-
-        if not manager.accounts:
-            tk.Label(self.acc_inner, text="No accounts yet", font=("Consolas", 10), bg=Theme.bg, fg=Theme.text_dim).pack(pady=20)
-            self.acc_selection = {}
-            self._update_sel_count()
-            self._update_bottom()
-            return
+        """Recompute account status off the Tk thread, then update rows in place."""
+        status_snapshot.refresh_async(lambda rows: self.root.after(0, lambda: self._apply_account_status(rows)))
 
+    def _apply_account_status(self, rows):
+        names = [n for n in manager.accounts if n in rows]
         # Sync selection vars: keep existing, add new, remove stale
-        old_sel = self.acc_selection if hasattr(self, 'acc_selection') else {}
-        new_sel = {}
-        for name in manager.accounts:
-            if name in old_sel:
-                new_sel[name] = old_sel[name]
-            else:
-                new_sel[name] = tk.BooleanVar(value=False)
-        self.acc_selection = new_sel
-
-        for name, acc in manager.accounts.items():
-            running, pid, srv = manager.get_instance_status(name)
-            default_srv = manager.get_default_server(name)
-            c = self._card(self.acc_inner)
-            c.pack(fill="x", pady=(0, 6), padx=(0, 12))
-
-            # Checkbox on far left
-            cb = tk.Checkbutton(c, variable=self.acc_selection[name], bg=Theme.bg_card,
-                                activebackground=Theme.bg_card, selectcolor=Theme.bg_input,
-                                command=self._update_sel_count)
-            cb.pack(side="left", padx=(0, 6))
-
-            left = tk.Frame(c, bg=Theme.bg_card)
-            left.pack(side="left", fill="x", expand=True)
-
-            icon_col = Theme.green if running else Theme.text
-            tk.Label(left, text=f"{'ðŸŸ¢' if running else 'ðŸ‘¤'}  {name}", font=("Consolas", 11, "bold"),
-                     bg=Theme.bg_card, fg=icon_col).pack(anchor="w")
-
-            det = f"{acc.get('username', '?')} \u00b7 {acc.get('display_name', '?')}"
-            if running and pid:
-                det += f" \u00b7 PID {pid}"
-            # Show assigned server
-            if default_srv and default_srv in SERVERS:
-                det += f" \u00b7 \U0001F4E1 {SERVERS[default_srv]['name']}"
-            elif default_srv == "":
-                det += f" \u00b7 \U0001F310 Public"
-            if running and srv:
-                det += f" \u00b7 on {srv}"
-            tk.Label(left, text=det, font=("Consolas", 9), bg=Theme.bg_card, fg=Theme.text_muted).pack(anchor="w")
-
-            right = tk.Frame(c, bg=Theme.bg_card)
-            right.pack(side="right")
-            self._btn(right, "\u25B6", lambda n=name: self._quick_launch(n), color=Theme.green_dim, small=True).pack(side="left", padx=2)
-            self._btn(right, "\u270F", lambda n=name: self._edit_account(n), color=Theme.blue_dim, small=True).pack(side="left", padx=2)
-            self._btn(right, "\u2715", lambda n=name: self._remove_acc(n), color=Theme.red_dim, small=True).pack(side="left", padx=2)
-
+        self.acc_selection = {n: self.acc_selection[n] if n in self.acc_selection else tk.BooleanVar(value=False)
+                              for n in names}
+        if names != self.acc_names:
+            self.acc_names = names
+            # Row indexes moved: hand every visible row back to the pool
+            for row in self.acc_visible.values():
+                row.hide()
+                self.acc_pool.append(row)
+            self.acc_visible = {}
+        self.acc_status = rows
+        self.acc_canvas.itemconfigure(self.acc_empty, text="" if names else "No accounts yet")
+        self.acc_canvas.configure(scrollregion=(0, 0, 0, len(names) * AccountRow.HEIGHT))
+        self._render_account_rows()
         self._update_sel_count()
         self._update_bottom()
 
+    def _bind_account_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self._acc_yview("scroll", int(-e.delta / 120) or (-1 if e.delta > 0 else 1), "units"))
+        widget.bind("<Button-4>", lambda e: self._acc_yview("scroll", -1, "units"))
+        widget.bind("<Button-5>", lambda e: self._acc_yview("scroll", 1, "units"))
+
+    def _acc_yview(self, *args):
+        self.acc_canvas.yview(*args)
+        self._render_account_rows()
+
+    def _render_account_rows(self, resized=False):
+        """Materialize rows for the visible index range; rows only reconfigure when their data changed."""
+        canvas = self.acc_canvas
+        width = max(canvas.winfo_width() - 12, 100)
+        top = canvas.canvasy(0)
+        first = max(0, int(top // AccountRow.HEIGHT) - 2)
+        last = min(len(self.acc_names), int((top + canvas.winfo_height()) // AccountRow.HEIGHT) + 3)
+        for i in [i for i in self.acc_visible if not first <= i < last]:
+            row = self.acc_visible.pop(i)
+            row.hide()
+            self.acc_pool.append(row)
+        for i in range(first, last):
+            name = self.acc_names[i]
+            row = self.acc_visible.get(i)
+            if row is None:
+                row = self.acc_pool.pop() if self.acc_pool else AccountRow(self, canvas)
+                self.acc_visible[i] = row
+                row.place(i * AccountRow.HEIGHT, width)
+            elif resized:
+                row.place(i * AccountRow.HEIGHT, width)
+            row.update(name, self.acc_status.get(name, {}), self.acc_selection[name])
+
     def _update_sel_count(self):
         """Update the 'X selected' label in the launch bar."""
         if not hasattr(self, 'sel_count_label'):
@@ -1855,45 +4675,26 @@ class RobloxManagerApp:
         return [name for name, var in self.acc_selection.items() if var.get()]
 
     def _launch_selected(self):
-        """Launch all selected accounts with a 3s stagger between each."""
+        """Launch all selected accounts through the batch launcher."""
         selected = self._get_selected_accounts()
         if not selected:
             self.log("No accounts selected", "warn")
             return
-        if getattr(self, '_batch_launching', False):
+        if batch_launcher.running():
             self.log("Batch launch already in progress", "warn")
             return
 
-        self._batch_launching = True
         total = len(selected)
-        self.log(f"Launching {total} account{'s' if total != 1 else ''} with 3s delay...")
-
-        def staggered():
-            for i, name in enumerate(selected):
-                default_srv = manager.get_default_server(name)
-                srv = default_srv if default_srv and default_srv in SERVERS else None
-                label = SERVERS[srv]["name"] if srv else "public"
-
-                self.root.after(0, lambda n=name, s=label, idx=i: self.log(
-                    f"[{idx+1}/{total}] Launching {n} \u2192 {s}..."))
-
-                r = manager.launch_instance(name, srv)
-                if r.get("success"):
-                    self.root.after(0, lambda n=name, p=r['pid']: self.log(
-                        f"\u2714 {n} launched (PID {p})", "success"))
-                else:
-                    self.root.after(0, lambda n=name, e=r.get('error', '?'): self.log(
-                        f"\u2718 {n} failed: {e}", "error"))
+        pacing = batch_launcher.pacing
+        self.log(f"Launching {total} account{'s' if total != 1 else ''} "
+                 f"(tickets in parallel, {pacing:g}s between starts)...")
 
-                # Wait 3s before next launch (skip after last one)
-                if i < total - 1:
-                    time.sleep(3)
+        def on_progress(event, item):
+            log_batch_progress(event, item)
+            if event == "done":
+                self.root.after(500, self._refresh_accounts)
 
-            self._batch_launching = False
-            self.root.after(0, lambda: self.log(f"Batch launch complete ({total} accounts)", "success"))
-            self.root.after(500, self._refresh_accounts)
-
-        threading.Thread(target=staggered, daemon=True).start()
+        batch_launcher.start([(n, manager.launch_target(n)) for n in selected], on_progress=on_progress)
 
     def _login_browser(self):
         if getattr(self, '_login_pending', False):
@@ -2218,13 +5019,7 @@ class RobloxManagerApp:
     def _do_kill_mutex(self):
         self.log("Cleaning singleton handles from running Roblox processes...")
         def do():
-            c = 0
-            for p in psutil.process_iter(["pid", "name"]):
-                try:
-                    if p.info["name"] and "RobloxPlayerBeta" in p.info["name"]:
-                        c += close_singleton_from_process(p.info["pid"])
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            c = close_singletons(process_registry.pids(fresh=True))
             self.root.after(0, lambda: self.log(f"Closed {c} handle(s)", "success" if c else "warn"))
         threading.Thread(target=do, daemon=True).start()
 
@@ -2257,6 +5052,19 @@ class RobloxManagerApp:
         tk.Label(pc, text="\U0001F4A1 Executor relaunches to this server\n   if player joins wrong one.",
                  font=("Consolas", 8), bg=Theme.bg_card, fg=Theme.text_dim, justify="left").pack(anchor="w", pady=(6, 0))
 
+        # Launch mode
+        self._lbl(f, "LAUNCH").pack(anchor="w", pady=(14, 6))
+        lc = self._card(f)
+        lc.pack(fill="x")
+
+        self.direct_var = tk.BooleanVar(value=self.settings.get("launchMode") == "direct")
+        tk.Checkbutton(lc, text="  Direct Launch", variable=self.direct_var, font=("Consolas", 10, "bold"),
+                       bg=Theme.bg_card, fg=Theme.text, selectcolor=Theme.bg_input,
+                       activebackground=Theme.bg_card, activeforeground=Theme.accent,
+                       command=self._save_settings).pack(anchor="w")
+        tk.Label(lc, text="\U0001F4A1 Starts RobloxPlayerBeta.exe directly (exact PID,\n   no bootstrapper). Falls back to roblox-player: links.",
+                 font=("Consolas", 8), bg=Theme.bg_card, fg=Theme.text_dim, justify="left").pack(anchor="w", pady=(2, 0))
+
         # Auto Rejoin Watchdog
         self._lbl(f, "AUTO REJOIN").pack(anchor="w", pady=(14, 6))
         arc = self._card(f)
@@ -2331,6 +5139,8 @@ class RobloxManagerApp:
     def _save_settings(self):
         self.settings["privateServerOnly"] = self.ps_var.get()
         self.settings["forcedServer"] = self.forced_var.get()
+        self.settings["launchMode"] = "direct" if self.direct_var.get() else "shell"
+        manager.set_launch_mode(self.settings["launchMode"])
         self.settings["autoRejoin"] = self.ar_var.get()
         self.settings["autoRejoinInterval"] = self.ar_delay_var.get()
         self.settings["autoRejoinServer"] = self.ar_srv_var.get()
@@ -2345,34 +5155,17 @@ class RobloxManagerApp:
         self._setup_watchdog()
         self._update_bottom()
         # Persist to disk so settings survive restarts
-        save_ui_settings(self.settings)
-        # Persist to disk so settings survive restarts
         self._persist_settings()
 
     def _persist_settings(self):
         """Save watchdog/UI settings to the data file so they survive restarts."""
-        try:
-            data = {}
-            if os.path.exists(DATA_FILE):
-                with open(DATA_FILE, "r") as f:
-                    data = json.load(f)
-            data["ui_settings"] = {
-                "privateServerOnly": self.settings["privateServerOnly"],
-                "forcedServer": self.settings["forcedServer"],
-                "autoRejoin": self.settings["autoRejoin"],
-                "autoRejoinInterval": self.settings["autoRejoinInterval"],
-                "autoRejoinServer": self.settings["autoRejoinServer"],
-                "watchdogAccounts": self.settings.get("watchdogAccounts", []),
-            }
-            with open(DATA_FILE, "w") as f:
-                json.dump(data, f, indent=2)
-        except Exception:
-            pass
+        save_ui_settings(self.settings)
 
     def _apply_persisted_settings_to_ui(self):
         """After UI is built, apply persisted settings to the UI widgets."""
         self.ps_var.set(self.settings["privateServerOnly"])
         self.forced_var.set(self.settings["forcedServer"])
+        self.direct_var.set(self.settings["launchMode"] == "direct")
         self.ar_var.set(self.settings["autoRejoin"])
         self.ar_delay_var.set(self.settings["autoRejoinInterval"])
         self.ar_delay_lbl.configure(text=f"{self.settings['autoRejoinInterval']}s")
@@ -2381,126 +5174,43 @@ class RobloxManagerApp:
         self._setup_watchdog()
 
     def _setup_watchdog(self):
-        """Start or stop the watchdog polling loop."""
-        if self.auto_restart_job:
-            self.root.after_cancel(self.auto_restart_job)
-            self.auto_restart_job = None
-
+        """Push the watchdog settings to the supervisor (which runs off the UI thread)."""
+        names = list(self.watchdog_accounts.keys())
+        supervisor.configure(enabled=self.settings["autoRejoin"], interval=self.settings["autoRejoinInterval"],
+                             server=self.settings["autoRejoinServer"], accounts=names,
+                             require_heartbeat=self.settings.get("requireHeartbeat", True), persist=False)
+        self._update_watchdog_status()
+
+    def _update_watchdog_status(self):
         if self.settings["autoRejoin"] and self.watchdog_accounts:
-            interval_s = self.settings["autoRejoinInterval"]
-            names = list(self.watchdog_accounts.keys())
-            srv = self.settings["autoRejoinServer"]
             self.ar_status.configure(
-                text=f"\U0001F6E1 Watching {len(names)} account(s) â†’ {srv} (every {interval_s}s)")
-            self.log(f"Watchdog ON: {', '.join(names)} â†’ {srv} (check every {interval_s}s)")
-
-            # Cooldown: don't relaunch same account within 120s of last relaunch
-            relaunch_cooldowns = {}  # {acc_name: timestamp of last relaunch}
-            check_count = [0]
-
-            def check():
-                check_count[0] += 1
-                now = time.time()
-                require_heartbeat = self.settings.get("requireHeartbeat", True)
-
-                # Collect accounts that need relaunching
-                accounts_to_relaunch = []
-
-                for acc_name in list(self.watchdog_accounts.keys()):
-                    try:
-                        running, pid, _ = manager.get_instance_status(acc_name, require_heartbeat=require_heartbeat)
-
-                        if running:
-                            # Only log every 5th check to reduce spam
-                            if check_count[0] % 5 == 0:
-                                self.root.after(0, lambda a=acc_name, p=pid: self.log(
-                                    f"\U0001F6E1 {a}: alive (pid={p})", "dim"))
-                            continue
-
-                        # â”€â”€ Account is NOT running â”€â”€
-
-                        # Check cooldown â€” don't spam relaunches
-                        last_relaunch = relaunch_cooldowns.get(acc_name, 0)
-                        cooldown_remaining = 120 - (now - last_relaunch)
-                        if cooldown_remaining > 0:
-                            if check_count[0] % 3 == 0:
-                                self.root.after(0, lambda a=acc_name, cd=int(cooldown_remaining): self.log(
-                                    f"\u23F3 {a}: offline, cooldown {cd}s remaining", "dim"))
-                            continue
-
-                        # Determine why it's offline
-                        inst = manager.instances.get(acc_name)
-                        if inst and inst.get("pid"):
-                            process_alive = False
-                            try:
-                                process_alive = psutil.Process(inst["pid"]).is_running()
-                            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                pass
-                            if process_alive:
-                                reason = "process alive but no heartbeat (disconnected/stuck)"
-                            else:
-                                reason = "process dead (crashed/closed)"
-                        else:
-                            reason = "no tracked instance (not launched or cleared)"
-
-                        self.root.after(0, lambda a=acc_name, r=reason: self.log(
-                            f"\U0001F6A8 {a} is offline ({r}) â€” queued for relaunch", "warn"))
-                        relaunch_cooldowns[acc_name] = now
-                        accounts_to_relaunch.append(acc_name)
-                    except Exception as ex:
-                        self.root.after(0, lambda e=str(ex): self.log(f"Watchdog error: {e}", "error"))
-
-                # Relaunch all offline accounts SEQUENTIALLY in one thread
-                if accounts_to_relaunch:
-                    def relaunch_all():
-                        for acc_name in accounts_to_relaunch:
-                            self._watchdog_rejoin(acc_name, srv)
-                            time.sleep(5)  # Wait 5s between launches for PID tracking
-                    threading.Thread(target=relaunch_all, daemon=True).start()
-
-                self.auto_restart_job = self.root.after(interval_s * 1000, check)
-            self.auto_restart_job = self.root.after(interval_s * 1000, check)
+                text=f"\U0001F6E1 Watching {len(self.watchdog_accounts)} account(s) â†’ "
+                     f"{self.settings['autoRejoinServer']} (every {self.settings['autoRejoinInterval']}s)")
         elif self.settings["autoRejoin"]:
             self.ar_status.configure(text="\u26A0 No accounts selected")
         else:
             self.ar_status.configure(text="")
 
-    def _watchdog_rejoin(self, acc_name, srv_key):
-        """Rejoin an account that went offline. Runs in background thread.
-        Kills the stale Roblox process first (disconnect screen), then relaunches."""
-        try:
-            # Kill the stale process if it's still running (e.g. sitting on disconnect screen)
-            inst = manager.instances.get(acc_name)
-            if inst and inst.get("pid"):
-                try:
-                    p = psutil.Process(inst["pid"])
-                    if p.is_running():
-                        p.kill()
-                        self.root.after(0, lambda: self.log(
-                            f"\U0001F4A5 Killed stale process for {acc_name} (PID {inst['pid']})"))
-                        time.sleep(1)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-            manager.instances.pop(acc_name, None)
-
-            # Clear old heartbeat so get_instance_status hits the grace period
-            # instead of seeing a stale timestamp from the previous process
-            acc_data = manager.accounts.get(acc_name, {})
-            roblox_username = acc_data.get("username", "")
-            if roblox_username and roblox_username in manager.player_reports:
-                del manager.player_reports[roblox_username]
-
-            result = manager.launch_instance(acc_name, srv_key)
-            if result.get("success"):
-                self.root.after(0, lambda: self.log(
-                    f"\u2705 {acc_name} relaunched to {srv_key}", "success"))
-            else:
-                err = result.get("error", "unknown")
-                self.root.after(0, lambda: self.log(
-                    f"\u274C {acc_name} relaunch failed: {err}", "error"))
-        except Exception as ex:
-            self.root.after(0, lambda: self.log(
-                f"\u274C {acc_name} relaunch crashed: {ex}", "error"))
+    def _on_supervisor_event(self, event, data):
+        """Supervisor listener - called from its threads, so hop onto the Tk loop."""
+        if event == "config":
+            self.root.after(0, lambda: self._sync_supervisor_config(data))
+
+    def _sync_supervisor_config(self, cfg):
+        """Reflect config changes made over the API in the settings widgets."""
+        self.settings.update({"autoRejoin": cfg["enabled"], "autoRejoinInterval": cfg["interval"],
+                              "autoRejoinServer": cfg["server"], "watchdogAccounts": cfg["accounts"],
+                              "requireHeartbeat": cfg["require_heartbeat"]})
+        self.watchdog_accounts = {name: cfg["server"] for name in cfg["accounts"]}
+        self.ar_var.set(cfg["enabled"])
+        self.ar_delay_var.set(cfg["interval"])
+        self.ar_delay_lbl.configure(text=f"{cfg['interval']}s")
+        self.ar_srv_var.set(cfg["server"])
+        self.ar_heartbeat_var.set(cfg["require_heartbeat"])
+        for name, var in self.ar_acc_vars.items():
+            var.set(name in self.watchdog_accounts)
+        self._update_watchdog_status()
+        self._update_bottom()
 
     # ----------------------------------------------------------------
     # LOGS TAB
@@ -2512,7 +5222,7 @@ class RobloxManagerApp:
         top = tk.Frame(f, bg=Theme.bg)
         top.pack(fill="x", pady=(0, 6))
         self._lbl(top, "ACTIVITY LOG").pack(side="left")
-        self._btn(top, "Clear", lambda: (self.logs.clear(), self._update_log_display()), color=Theme.text_dim, small=True).pack(side="right")
+        self._btn(top, "Clear", lambda: (activity.clear(), self._update_log_display()), color=Theme.text_dim, small=True).pack(side="right")
 
         self.log_text = tk.Text(f, font=("Consolas", 9), bg=Theme.bg_card, fg=Theme.text_muted,
                                 relief="flat", highlightbackground=Theme.border, highlightthickness=1,
@@ -2529,7 +5239,7 @@ class RobloxManagerApp:
     # ----------------------------------------------------------------
     def _update_bottom(self):
         n = len(manager.accounts)
-        r = sum(1 for nm in manager.accounts if manager.get_instance_status(nm)[0])
+        r = sum(1 for row in status_snapshot.rows.values() if row["running"])
         self.bot_left.configure(text=f"{n} account{'s' if n != 1 else ''} \u00b7 {r} running")
 
         flags = []
@@ -2544,26 +5254,69 @@ class RobloxManagerApp:
 # MAIN
 # ============================================================================
 
+def run_headless():
+    """Backend only - the HTTP API is the whole control surface."""
+    api_thread = start_backend()
+    activity.log("Manager started (headless)")
+    activity.log(f"API server on http://localhost:{PORT}")
+    try:
+        while api_thread.is_alive():
+            api_thread.join(1)
+    except KeyboardInterrupt:
+        activity.log("[+] Shutting down", "info")
+
+
 def main():
-    api_thread = threading.Thread(target=start_api_server, daemon=True)
-    api_thread.start()
-    print(f"[+] API on http://localhost:{PORT}")
+    if "--headless" in sys.argv[1:]:
+        run_headless()
+        return
 
+    start_backend()
+    load_tk()
     root = tk.Tk()
     app = RobloxManagerApp(root)
 
+    # Redraw when the event bus reports a change (coalesced); heartbeats arrive
+    # every few seconds per client, so they only schedule a redraw HEARTBEAT_REDRAW_MS
+    # out. The slow timer catches heartbeats going stale, which doesn't produce an event
+    pending = [None, 0]  # [after id, due time]
+
     def poll():
+        pending[0] = None
+        # The bottom bar's running count reads the status snapshot, so refresh it on
+        # every tab; the accounts tab also re-renders its rows from the result
         if app.current_tab.get() == "accounts":
             app._refresh_accounts()
-        elif app.current_tab.get() == "settings":
+            return
+        status_snapshot.refresh_async(lambda rows: root.after(0, app._update_bottom))
+        if app.current_tab.get() == "settings":
             # Refresh watchdog account list if accounts changed
             current_names = set(app.ar_acc_vars.keys())
             actual_names = set(manager.accounts.keys())
             if current_names != actual_names:
                 app._refresh_watchdog_accounts()
-        app._update_bottom()
-        root.after(5000, poll)
-    root.after(5000, poll)
+
+    def schedule_poll(delay=1000):
+        due = time.time() + delay / 1000
+        if pending[0] is not None:
+            if pending[1] <= due:
+                return
+            root.after_cancel(pending[0])
+        pending[:] = [root.after(delay, poll), due]
+
+    def slow_poll():
+        schedule_poll(0)
+        root.after(30000, slow_poll)
+
+    ui_events = {"instance", "process", "launch", "watchdog", "batch", "restart"}
+
+    def on_event(e):
+        if e["type"] in ui_events:
+            root.after(0, schedule_poll)
+        elif e["type"] == "heartbeat":
+            root.after(0, schedule_poll, HEARTBEAT_REDRAW_MS)
+    events.subscribe(on_event)
+    root.after(30000, slow_poll)
 
     root.mainloop()
 